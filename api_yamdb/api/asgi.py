@@ -0,0 +1,168 @@
+"""ASGI-приложение поверх WSGI-обработчика Django.
+
+Django 2.2 не поддерживает ASGI и асинхронные представления, поэтому
+запрос выполняет обычный обработчик в пуле потоков, а чтение тела
+запроса и отправка ответа идут в цикле событий uvicorn: пока медленный
+клиент отправляет запрос или читает обычный ответ, он не занимает ни
+процесс, ни поток. Потоковый ответ (StreamingHttpResponse) формируется
+по мере отправки и занимает поток пула, пока клиент его не прочитает.
+Горячие запросы чтения (HOT_READ_PATHS) выполняются в отдельном пуле и
+не ждут, пока освободятся потоки, занятые записью.
+
+WsgiToAsgi из asgiref не подходит: он выполняет все запросы процесса
+в одном потоке (sync_to_async с thread_sensitive=True).
+"""
+import asyncio
+import logging
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+BODY_MEMORY_LIMIT = 64 * 1024
+
+# Списки и карточки произведений, списки отзывов и комментариев.
+HOT_READ_PATHS = re.compile(
+    r'^/api/v1/titles/(\d+/)?$'
+    r'|^/api/v1/titles/\d+/reviews/(\d+/comments/)?$'
+)
+READ_METHODS = ('GET', 'HEAD')
+
+SERVER_ERROR = {
+    'type': 'http.response.start',
+    'status': 500,
+    'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+}
+
+logger = logging.getLogger(__name__)
+
+
+def is_hot_read(scope) -> bool:
+    return (scope['method'] in READ_METHODS
+            and HOT_READ_PATHS.match(scope['path']) is not None)
+
+
+def build_environ(scope, body) -> dict:
+    """WSGI environ по описанию ASGI-запроса."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiBridge:
+    """ASGI-приложение, которое выполняет WSGI-приложение в потоках."""
+
+    def __init__(self, wsgi_application, threads: int, read_threads: int):
+        self.wsgi_application = wsgi_application
+        self.pool = ThreadPoolExecutor(threads, 'asgi')
+        self.read_pool = ThreadPoolExecutor(read_threads, 'asgi-read')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип соединения: '
+                             f'{scope["type"]}')
+        with SpooledTemporaryFile(max_size=BODY_MEMORY_LIMIT) as body:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            loop = asyncio.get_event_loop()
+            pool = self.read_pool if is_hot_read(scope) else self.pool
+            start, chunks = await loop.run_in_executor(
+                pool, self.run, scope, body, send, loop)
+        if start is None:
+            return
+        # Ответ целиком в памяти: поток уже свободен, пока его читает
+        # клиент.
+        await send(start)
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    def run(self, scope, body, send, loop):
+        """Выполняет запрос в потоке пула.
+
+        Обычный ответ возвращается целиком, потоковый отправляется
+        по частям из потока, и тогда возвращается (None, None).
+        """
+        environ = build_environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'),
+                             value.encode('latin1'))
+                            for name, value in headers],
+            }
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            if getattr(result, 'streaming', False) and 'start' in response:
+                self.stream(result, response['start'], send, loop)
+                return None, None
+            # start_response можно вызвать и при чтении результата.
+            body = list(result)
+            if 'start' not in response:
+                logger.error('Приложение не вызвало start_response: %s',
+                             environ['PATH_INFO'])
+                return SERVER_ERROR, [b'Internal Server Error']
+            return response['start'], body
+        finally:
+            # Сигнал request_finished закрывает соединения с БД потока.
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+
+    def stream(self, result, start, send, loop) -> None:
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        send_sync(start)
+        for chunk in result:
+            if chunk:
+                send_sync({'type': 'http.response.body', 'body': chunk,
+                           'more_body': True})
+        send_sync({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.pool.shutdown()
+                self.read_pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,113 @@
+"""Аутентификация по данным из access-токена без запроса к БД.
+
+В токен, который выдаёт JWTView, записываются username, role и
+is_staff. ClaimsJWTAuthentication строит по ним ClaimsUser, а к БД
+обращается только для старых токенов без этих полей и для токенов,
+выданных до изменения пользователя (см. revoke_claims).
+
+Отзыв хранится в кэше, поэтому без общего для воркеров кэша
+(memcached, redis, файлы) пользователь всегда читается из БД: иначе
+остальные воркеры не узнали бы о смене роли.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import ADMIN_ROLE, MODERATOR_ROLE, USER_ROLE, User
+
+from . import cache
+
+ISSUED_AT_CLAIM = 'iat'
+CLAIMS = ('username', 'role', 'is_staff')
+# Кэши, содержимое которых не видят другие процессы.
+LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def _revoked_key(user_id) -> str:
+    return f'auth:{user_id}:revoked'
+
+
+def get_access_token(user: User):
+    """Access-токен с ролью пользователя."""
+    token = RefreshToken.for_user(user).access_token
+    token[ISSUED_AT_CLAIM] = int(time.time())
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def revoke_claims(user_id) -> None:
+    """Токены, выданные до этого момента, проверяются по БД.
+
+    Запись живёт столько же, сколько access-токен.
+    """
+    timeout = settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    cache.get_cache().set(
+        _revoked_key(user_id), int(time.time()), timeout=int(timeout))
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из токена."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', USER_ROLE)
+
+    @property
+    def is_admin(self):
+        return self.is_staff or self.role == ADMIN_ROLE
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR_ROLE
+
+    def get_reference(self) -> User:
+        """Несохраняемая ссылка для внешних ключей на пользователя."""
+        return User(pk=self.pk, username=self.username, role=self.role,
+                    is_staff=self.is_staff)
+
+    @cached_property
+    def instance(self) -> User:
+        return User.objects.get(pk=self.pk)
+
+
+def get_db_user(user) -> User:
+    """Пользователь из БД, если запросу нужны все его поля."""
+    if isinstance(user, ClaimsUser):
+        return user.instance
+    return user
+
+
+def get_author(user) -> User:
+    """Пользователь для записи в поле author."""
+    if isinstance(user, ClaimsUser):
+        return user.get_reference()
+    return user
+
+
+def claims_trusted() -> bool:
+    """Отзыв из revoke_claims виден всем воркерам."""
+    return not isinstance(cache.get_cache(), LOCAL_CACHES)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+
+    def is_revoked(self, validated_token) -> bool:
+        revoked = cache.get_cache().get(
+            _revoked_key(validated_token[api_settings.USER_ID_CLAIM]))
+        return revoked is not None and (
+            validated_token[ISSUED_AT_CLAIM] <= revoked)
+
+    def get_user(self, validated_token):
+        if (not claims_trusted()
+                or any(claim not in validated_token
+                       for claim in CLAIMS + (ISSUED_AT_CLAIM,))
+                or self.is_revoked(validated_token)):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
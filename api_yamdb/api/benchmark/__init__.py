@@ -0,0 +1,209 @@
+"""Нагрузочный бенчмарк REST API.
+
+Запросы выполняются тестовым клиентом в том же процессе, поэтому
+измеряется время Django и БД без сети. Для каждого сценария
+считаются перцентили задержки, пропускная способность и число
+запросов к БД на один вызов.
+
+Сценарии отдельных возможностей API лежат в модулях пакета и
+добавляются к Benchmark примесями, замеры по HTTP - в модуле load.
+"""
+import math
+import random
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from reviews.models import ADMIN_ROLE, Category, Genre, Review, Title, User
+
+from .. import cache
+from ..authentication import get_access_token
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: List[float], rank: int) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def get_percentiles(timings: List[float]) -> dict:
+    return {
+        f'p{rank}_ms': round(percentile(timings, rank) * 1000, 3)
+        for rank in PERCENTILES
+    }
+
+
+def summarize(timings: List[float], queries: List[int],
+              statuses: Counter) -> dict:
+    total = sum(timings)
+    result = get_percentiles(timings)
+    result.update({
+        'requests': len(timings),
+        'mean_ms': round(total / len(timings) * 1000, 3),
+        'throughput_rps': round(len(timings) / max(total, 1e-9), 1),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+        'statuses': {str(code): count for code, count in statuses.items()},
+    })
+    return result
+
+
+class Benchmark:
+    """Сценарии обращения к основным endpoint API."""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.anonymous = APIClient()
+        admin = User.objects.create(
+            username=f'bench_admin_{self.rng.randrange(10 ** 9)}',
+            email=f'bench_admin_{self.rng.randrange(10 ** 9)}@yamdb.fake',
+            role=ADMIN_ROLE
+        )
+        token = get_access_token(admin)
+        self.admin = APIClient()
+        self.admin.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.title_ids = list(Title.objects.values_list('pk', flat=True))
+        self.reviews = list(
+            Review.objects.filter(comments__isnull=False).values_list(
+                'title_id', 'pk').distinct())
+        self.category_slugs = list(
+            Category.objects.values_list('slug', flat=True))
+        self.genre_slugs = list(Genre.objects.values_list('slug', flat=True))
+        self.created = []
+
+    def get_scenarios(self) -> Dict[str, Callable[[], object]]:
+        return {
+            'titles_list': self.titles_list,
+            'titles_filter': self.titles_filter,
+            'titles_search': self.titles_search,
+            'title_retrieve': self.title_retrieve,
+            'reviews_page': self.reviews_page,
+            'reviews_cursor': self.reviews_cursor,
+            'comments_page': self.comments_page,
+            'signup_token': self.signup_token,
+            'admin_title_create': self.admin_title_create,
+            'admin_title_update': self.admin_title_update,
+            'admin_title_delete': self.admin_title_delete,
+        }
+
+    def titles_list(self):
+        page = self.rng.randint(1, max(len(self.title_ids) // 10, 1))
+        return self.anonymous.get('/api/v1/titles/', {'page': page})
+
+    def titles_filter(self):
+        return self.anonymous.get('/api/v1/titles/', {
+            'genre': self.rng.choice(self.genre_slugs),
+            'category': self.rng.choice(self.category_slugs),
+        })
+
+    def titles_search(self):
+        return self.anonymous.get(
+            '/api/v1/titles/', {'search': str(self.rng.randrange(10))})
+
+    def title_retrieve(self):
+        title_id = self.rng.choice(self.title_ids)
+        return self.anonymous.get(f'/api/v1/titles/{title_id}/')
+
+    def reviews_page(self):
+        title_id = self.rng.choice(self.title_ids)
+        return self.anonymous.get(f'/api/v1/titles/{title_id}/reviews/')
+
+    def reviews_cursor(self):
+        title_id = self.rng.choice(self.title_ids)
+        return self.anonymous.get(
+            f'/api/v1/titles/{title_id}/reviews/', {'pagination': 'cursor'})
+
+    def comments_page(self):
+        title_id, review_id = self.rng.choice(self.reviews)
+        return self.anonymous.get(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/')
+
+    def signup_token(self):
+        """Регистрация и получение токена, два запроса к API."""
+        username = f'bench_signup_{self.rng.randrange(10 ** 9)}'
+        self.anonymous.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'})
+        code = User.objects.filter(username=username).values_list(
+            'confirmation_code', flat=True).first()
+        return self.anonymous.post('/api/v1/auth/token/', {
+            'username': username, 'confirmation_code': code})
+
+    def admin_title_create(self):
+        response = self.admin.post('/api/v1/titles/', {
+            'name': f'Новое произведение {self.rng.randrange(10 ** 6)}',
+            'year': 2000,
+            'category': self.rng.choice(self.category_slugs),
+            'genre': self.rng.sample(self.genre_slugs, 2),
+        }, format='json')
+        if response.status_code == 201:
+            self.created.append(response.data['id'])
+        return response
+
+    def admin_title_update(self):
+        title_id = self.rng.choice(self.title_ids)
+        return self.admin.patch(f'/api/v1/titles/{title_id}/', {
+            'description': f'Описание {self.rng.randrange(10 ** 6)}'
+        }, format='json')
+
+    def prepare_admin_title_delete(self, count: int) -> None:
+        self.created.extend(
+            Title.objects.create(name=f'Удаляемое {i}', year=2000).pk
+            for i in range(count - len(self.created))
+        )
+
+    def admin_title_delete(self):
+        return self.admin.delete(f'/api/v1/titles/{self.created.pop()}/')
+
+    def run_scenario(self, name: str, requests: int, warmup: int) -> dict:
+        scenario = self.get_scenarios()[name]
+        prepare = getattr(self, f'prepare_{name}', None)
+        if prepare is not None:
+            prepare(requests + warmup)
+        # Каждый сценарий начинается с холодного кэша ответов.
+        cache.invalidate(cache.TITLES, cache.GENRES, cache.CATEGORIES)
+        for _ in range(warmup):
+            scenario()
+        timings, queries, statuses = [], [], Counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = scenario()
+                timings.append(time.perf_counter() - started)
+            queries.append(len(context))
+            statuses[response.status_code] += 1
+        return summarize(timings, queries, statuses)
+
+    # Письма регистрации не должны уходить наружу, а лимиты частоты
+    # исказили бы замеры.
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        THROTTLE_RATES={})
+    def run(self, requests: int, warmup: int = 0,
+            only: List[str] = None) -> Dict[str, dict]:
+        return {
+            name: self.run_scenario(name, requests, warmup)
+            for name in self.get_scenarios()
+            if not only or name in only
+        }
+
+
+def compare(baseline: dict, report: dict,
+            keys=('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+            ) -> List[str]:
+    """Строки с изменением задержки и числа запросов между отчётами."""
+    lines = []
+    for name, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        deltas = ', '.join(
+            f'{key} {previous[key]} -> {current[key]}'
+            for key in keys
+        )
+        lines.append(f'{name}: {deltas}')
+    return lines
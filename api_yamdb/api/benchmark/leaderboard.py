@@ -0,0 +1,25 @@
+"""Сценарий страницы рейтинга, см. reviews.leaderboard."""
+import math
+
+from reviews.leaderboard import refresh_leaderboard
+from reviews.models import LEADERBOARD_ALL
+
+from ..paginators import StandardResultsSetPagination
+
+
+class LeaderboardScenarios:
+    """Примесь к Benchmark: случайная страница общего рейтинга."""
+
+    def get_scenarios(self):
+        scenarios = super().get_scenarios()
+        scenarios['leaderboard_page'] = self.leaderboard_page
+        return scenarios
+
+    def prepare_leaderboard_page(self, count: int) -> None:
+        places = refresh_leaderboard()[LEADERBOARD_ALL]
+        self.leaderboard_pages = max(math.ceil(
+            places / StandardResultsSetPagination.page_size), 1)
+
+    def leaderboard_page(self):
+        return self.anonymous.get('/api/v1/leaderboard/', {
+            'page': self.rng.randint(1, self.leaderboard_pages)})
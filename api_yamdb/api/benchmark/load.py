@@ -0,0 +1,50 @@
+"""Нагрузка по HTTP на запущенный сервер.
+
+load_test нагружает сервер несколькими одновременными соединениями:
+так сравниваются режимы WSGI и ASGI, см. команду load_test.
+"""
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from . import get_percentiles
+
+
+def fetch(url: str, timeout: float) -> Tuple[float, str]:
+    """Время запроса и статус ответа (или имя ошибки соединения)."""
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = str(response.status)
+    except HTTPError as error:
+        status = str(error.code)
+    except (URLError, OSError) as error:
+        status = type(getattr(error, 'reason', error)).__name__
+    return time.perf_counter() - started, status
+
+
+def load_test(base_url: str, paths: List[str], concurrency: int,
+              requests: int, timeout: float = 30) -> dict:
+    """Выполняет requests запросов по кругу путей в concurrency потоков."""
+    urls = [base_url.rstrip('/') + paths[i % len(paths)]
+            for i in range(requests)]
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda url: fetch(url, timeout), urls))
+        elapsed = time.perf_counter() - started
+    timings = [timing for timing, _ in results]
+    result = get_percentiles(timings)
+    result.update({
+        'requests': requests,
+        'concurrency': concurrency,
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        # В отличие от summarize, пропускная способность считается по
+        # общему времени: запросы идут одновременно.
+        'throughput_rps': round(requests / max(elapsed, 1e-9), 1),
+        'statuses': dict(Counter(status for _, status in results)),
+    })
+    return result
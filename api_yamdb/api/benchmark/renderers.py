@@ -0,0 +1,65 @@
+"""Время кодирования и размер ответов в разных рендерерах.
+
+RendererBenchmark.run_renderers сравнивает основные endpoint во всех
+рендерерах RENDERERS, см. команду benchmark_renderers.
+"""
+import time
+from typing import Dict, List
+
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from ..renderers import MessagePackRenderer, ORJSONRenderer
+from . import Benchmark, get_percentiles
+
+RENDERERS = {
+    'json': JSONRenderer,
+    'orjson': ORJSONRenderer,
+    'msgpack': MessagePackRenderer,
+}
+
+
+class RendererBenchmark(Benchmark):
+    """Данные ответов API, закодированные каждым рендерером."""
+
+    # Рендерерам нужны данные ответа, а не потоковый ответ.
+    @override_settings(API_STREAM_PAGE_SIZE=0)
+    def get_payloads(self) -> Dict[str, object]:
+        """Данные ответов для сравнения рендереров."""
+        title_id, review_id = self.rng.choice(self.reviews)
+        responses = {
+            'titles_1000': self.anonymous.get(
+                '/api/v1/titles/', {'count': 1000}),
+            'title_retrieve': self.anonymous.get(
+                f'/api/v1/titles/{title_id}/'),
+            'reviews_100': self.anonymous.get(
+                f'/api/v1/titles/{title_id}/reviews/', {'count': 100}),
+            'comments_page': self.anonymous.get(
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'),
+        }
+        return {name: response.data for name, response in responses.items()}
+
+    def run_renderers(self, repeat: int, warmup: int = 0,
+                      only: List[str] = None) -> Dict[str, dict]:
+        """Время кодирования и размер ответа: '<ответ>.<рендерер>'."""
+        results = {}
+        for name, data in self.get_payloads().items():
+            if only and name not in only:
+                continue
+            for renderer_name, renderer_class in RENDERERS.items():
+                renderer = renderer_class()
+                for _ in range(warmup):
+                    renderer.render(data, renderer.media_type)
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    content = renderer.render(data, renderer.media_type)
+                    timings.append(time.perf_counter() - started)
+                result = get_percentiles(timings)
+                result.update({
+                    'requests': repeat,
+                    'mean_ms': round(sum(timings) / repeat * 1000, 3),
+                    'bytes': len(content),
+                })
+                results[f'{name}.{renderer_name}'] = result
+        return results
@@ -0,0 +1,16 @@
+"""Сценарий большой страницы, которая отдаётся потоком."""
+
+
+class StreamingScenarios:
+    """Примесь к Benchmark: страница из 1000 произведений."""
+
+    def get_scenarios(self):
+        scenarios = super().get_scenarios()
+        scenarios['titles_large_page'] = self.titles_large_page
+        return scenarios
+
+    def titles_large_page(self):
+        response = self.anonymous.get('/api/v1/titles/', {'count': 1000})
+        # Потоковый ответ формируется при чтении.
+        response.getvalue()
+        return response
@@ -0,0 +1,170 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from . import metrics
+
+TITLES = 'titles'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+
+HIT = 'hit'
+MISS = 'miss'
+
+CACHE_HEADER = 'X-Cache'
+CACHED_HEADERS = ('ETag', 'Last-Modified', 'Vary')
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+# Разделы пространства имён: списки и отдельные объекты.
+LIST = 'list'
+
+
+def _generation_key(namespace: str, scope: str = '') -> str:
+    if scope:
+        return f'api:{namespace}:{scope}:generation'
+    return f'api:{namespace}:generation'
+
+
+def _object_scope(pk) -> str:
+    return f'object:{pk}'
+
+
+def _stats_key(namespace: str, result: str) -> str:
+    return f'api:{namespace}:{result}'
+
+
+def get_generations(namespace: str, *scopes: str) -> tuple:
+    """Поколения пространства имён кэша и его разделов."""
+    cache = get_cache()
+    keys = [_generation_key(namespace)]
+    keys.extend(_generation_key(namespace, scope) for scope in scopes)
+    generations = cache.get_many(keys)
+    for key in keys:
+        if generations.get(key) is None:
+            # Время в мс: после вытеснения ключа старые записи не оживут.
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+def get_generation(namespace: str) -> int:
+    """Текущее поколение пространства имён кэша."""
+    return get_generations(namespace)[0]
+
+
+def _bump(keys) -> None:
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+
+
+def invalidate(*namespaces: str) -> None:
+    """Сбрасывает закэшированные ответы указанных пространств имён."""
+    _bump(_generation_key(namespace) for namespace in namespaces)
+
+
+def invalidate_objects(namespace: str, *pks) -> None:
+    """Сбрасывает ответы об объектах и списки пространства имён.
+
+    Ответы о других объектах остаются в кэше.
+    """
+    _bump([_generation_key(namespace, LIST)] + [
+        _generation_key(namespace, _object_scope(pk)) for pk in pks
+    ])
+
+
+def _count(namespace: str, result: str) -> None:
+    metrics.CACHE_REQUESTS.labels(namespace, result).inc()
+    cache = get_cache()
+    key = _stats_key(namespace, result)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_stats() -> dict:
+    """Счётчики попаданий и промахов по пространствам имён."""
+    cache = get_cache()
+    return {
+        namespace: {
+            result: cache.get(_stats_key(namespace, result), 0)
+            for result in (HIT, MISS)
+        }
+        for namespace in (TITLES, GENRES, CATEGORIES)
+    }
+
+
+def get_scope(view, kwargs) -> str:
+    """Раздел кэша действия: объект для detail-действий, иначе список."""
+    if not view.detail:
+        return LIST
+    return _object_scope(kwargs[view.lookup_url_kwarg or view.lookup_field])
+
+
+def get_response_key(namespace: str, request, scope: str = LIST) -> str:
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    # ETag ответа зависит от формата, см. api.conditional.
+    digest = hashlib.md5(
+        f'{request.path}?{query}:{request.accepted_media_type}'.encode()
+    ).hexdigest()
+    generations = ':'.join(map(str, get_generations(namespace, scope)))
+    return f'api:{namespace}:{generations}:{digest}'
+
+
+def cached_response(method):
+    """Кэширует ответ действия чтения с ключом по полному запросу.
+
+    Пространство имён берётся из cache_namespace представления, ключ
+    включает поколение списка или запрошенного объекта. Вместе с
+    данными сохраняются ETag и Last-Modified, поэтому условный запрос
+    к закэшированному ответу не обращается к БД.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_cache()
+        namespace = self.cache_namespace
+        key = get_response_key(namespace, request, get_scope(self, kwargs))
+        cached = cache.get(key)
+        if cached is not None:
+            _count(namespace, HIT)
+            data, headers = cached
+            not_modified = get_conditional_response(
+                request._request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified'))
+            )
+            response = not_modified or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response[CACHE_HEADER] = 'HIT'
+            return response
+        _count(namespace, MISS)
+        response = method(self, request, *args, **kwargs)
+        # Потоковый ответ не собирается в памяти и не кэшируется.
+        if response.status_code == 200 and not response.streaming:
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS if response.has_header(header)
+            }
+            cache.set(key, (response.data, headers),
+                      settings.API_CACHE_TIMEOUT)
+        response[CACHE_HEADER] = 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,130 @@
+"""Сжатие ответов API по заголовку Accept-Encoding.
+
+Клиент получает brotli или gzip, в зависимости от того, что он
+принимает: при равном приоритете выбирается brotli, он сжимает
+JSON плотнее. Потоковые ответы сжимаются по частям, каждая часть
+сразу уходит клиенту.
+"""
+import re
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+BROTLI = 'br'
+GZIP = 'gzip'
+# По убыванию предпочтения при одинаковом q.
+ENCODINGS = (BROTLI, GZIP)
+
+MIN_LENGTH = 200
+GZIP_LEVEL = 6
+# Заголовок и контрольная сумма gzip вокруг потока deflate.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+_coding = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$')
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Приоритеты кодировок из Accept-Encoding: {кодировка: q}."""
+    weights = {}
+    for item in header.split(','):
+        match = _coding.match(item)
+        if match is None:
+            continue
+        coding, weight = match.groups()
+        try:
+            weights[coding.lower()] = float(weight) if weight else 1.0
+        except ValueError:
+            continue
+    return weights
+
+
+def choose_encoding(header: str):
+    """Кодировка ответа или None, если сжатие клиенту не подходит."""
+    weights = parse_accept_encoding(header)
+    default = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress_gzip_sequence(sequence):
+    # compress_sequence из Django 2.2 не сбрасывает буфер GzipFile,
+    # и сжатый ответ уходил клиенту одним куском в конце.
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    for item in sequence:
+        data = compressor.compress(item) + compressor.flush(
+            zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_brotli(data: bytes, quality: int) -> bytes:
+    return brotli.compress(data, quality=quality)
+
+
+def compress_brotli_sequence(sequence, quality: int):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        # flush отдаёт клиенту всё, что сжато к этому моменту.
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli.
+
+    Не сжимаются ответы короче MIN_LENGTH байт и уже сжатые ответы.
+    Уровень brotli задаётся API_BROTLI_QUALITY.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.brotli_quality = settings.API_BROTLI_QUALITY
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.has_header('Content-Encoding')
+                or (not response.streaming
+                    and len(response.content) < MIN_LENGTH)):
+            return response
+        # Ответ зависит от Accept-Encoding, даже если он не сжат.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = self.compress_sequence(
+                encoding, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = self.compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        # Сжатый ответ не совпадает с исходным побайтно.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, encoding: str, data: bytes) -> bytes:
+        if encoding == BROTLI:
+            return compress_brotli(data, self.brotli_quality)
+        return compress_string(data)
+
+    def compress_sequence(self, encoding: str, sequence):
+        if encoding == BROTLI:
+            return compress_brotli_sequence(sequence, self.brotli_quality)
+        return compress_gzip_sequence(sequence)
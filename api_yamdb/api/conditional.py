@@ -0,0 +1,66 @@
+import hashlib
+from calendar import timegm
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.utils.cache import (get_conditional_response, patch_vary_headers,
+                                quote_etag)
+from django.utils.http import http_date
+
+
+def get_validators(view, request, kwargs) -> dict:
+    """Количество и дата изменения объектов ответа одним агрегатом.
+
+    Объекты и связи не загружаются, поэтому проверка дешевле, чем
+    сериализация страницы.
+    """
+    queryset = view.filter_queryset(view.get_queryset()).order_by()
+    if view.action == 'retrieve':
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        queryset = queryset.filter(
+            **{view.lookup_field: kwargs[lookup_url_kwarg]})
+    return queryset.aggregate(count=Count('pk'), modified=Max('modified'))
+
+
+def get_etag(request, validators: dict) -> str:
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    modified = validators['modified']
+    source = (
+        f'{request.path}?{query}:{request.accepted_media_type}:'
+        f'{validators["count"]}:{modified.isoformat() if modified else ""}'
+    )
+    return quote_etag(hashlib.md5(source.encode()).hexdigest())
+
+
+def conditional_response(method):
+    """Отвечает 304 Not Modified по If-None-Match / If-Modified-Since.
+
+    ETag и Last-Modified вычисляются по полю modified запрашиваемых
+    объектов до сериализации ответа. Last-Modified ставится только
+    для одного объекта: дата самого нового объекта списка не меняется
+    при удалении остальных, список проверяется только по ETag.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        validators = get_validators(self, request, kwargs)
+        if not validators['count'] and self.action == 'retrieve':
+            return method(self, request, *args, **kwargs)
+        etag = get_etag(request, validators)
+        last_modified = None
+        if (self.action == 'retrieve'
+                and validators['modified'] is not None):
+            last_modified = timegm(validators['modified'].utctimetuple())
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Без Vary браузер может отдать из кэша ответ в другом формате.
+            patch_vary_headers(response, ('Accept',))
+        return response
+    return wrapper
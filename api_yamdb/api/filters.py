@@ -1,5 +1,6 @@
 import django_filters
 from reviews import models as review_models
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -15,7 +16,21 @@ class TitleFilter(django_filters.FilterSet):
         field_name='genre__slug',
         lookup_expr='exact'
     )
+    search = django_filters.CharFilter(method='filter_search')
+    # Учитывается фильтром search.
+    fuzzy = django_filters.BooleanFilter(method='filter_fuzzy')
 
     class Meta:
         model = review_models.Title
         fields = ['name', 'category', 'genre', 'year']
+
+    def filter_search(self, queryset, name, value):
+        """Поиск по названию и описанию с сортировкой по релевантности."""
+        if not value.strip():
+            return queryset
+        return search_titles(
+            queryset, value, fuzzy=bool(self.form.cleaned_data.get('fuzzy'))
+        )
+
+    def filter_fuzzy(self, queryset, name, value):
+        return queryset
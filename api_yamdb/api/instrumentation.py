@@ -0,0 +1,190 @@
+"""Замеры времени и запросов к БД для отдельных запросов к API.
+
+InstrumentationMiddleware для выбранной доли запросов считает время
+ответа, число и время запросов к БД, время сериализации и размер
+ответа и пишет их в лог одной JSON-строкой: медленные запросы с уровнем
+WARNING, остальные INFO. Заголовок Server-Timing получают только
+администраторы, всем - при INSTRUMENTATION_PUBLIC_TIMING.
+Потоковый ответ читает БД уже после представления, поэтому его замеры
+пишутся, когда ответ прочитан, и без Server-Timing.
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import observe_request
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.db_queries += 1
+
+
+@contextmanager
+def serializing():
+    """Учитывает время блока как время сериализации текущего запроса.
+
+    Блоком оборачивают .data сериализатора в представлении, см.
+    SerializerTimingMixin.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+
+
+def get_view_name(request) -> str:
+    """Имя viewset и action, обработавших запрос."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return ''
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or ''
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def format_server_timing(timings: dict) -> str:
+    return ', '.join(
+        f'{name};dur={seconds * 1000:.1f}'
+        + (f';desc="{description}"' if description else '')
+        for name, (seconds, description) in timings.items()
+    )
+
+
+class InstrumentationMiddleware:
+    """Метрики запросов.
+
+    Server-Timing и лог пишутся для доли запросов
+    INSTRUMENTATION_SAMPLE_RATE, метрики Prometheus - для всех,
+    если включен METRICS_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        self.public_timing = settings.INSTRUMENTATION_PUBLIC_TIMING
+        self.slow = settings.INSTRUMENTATION_SLOW_MS / 1000
+        # Гистограммы Prometheus считаются по всем запросам.
+        self.collect_metrics = settings.METRICS_ENABLED
+
+    def __call__(self, request):
+        sampled = (self.sample_rate > 0
+                   and random.random() < self.sample_rate)
+        if not sampled and not self.collect_metrics:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        started = time.perf_counter()
+        with self.measure(metrics):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, metrics,
+                started, sampled)
+        else:
+            self.finish(request, response, metrics, started, sampled,
+                        len(response.content))
+        return response
+
+    @contextmanager
+    def measure(self, metrics: RequestMetrics):
+        """Считает запросы к БД и сериализацию внутри блока."""
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute))
+                yield
+        finally:
+            _current.reset(token)
+
+    def measure_stream(self, request, response, content,
+                       metrics: RequestMetrics, started: float,
+                       sampled: bool):
+        content = iter(content)
+        size = 0
+        try:
+            while True:
+                with self.measure(metrics):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            # Замеры пишутся и для оборванного ответа.
+            self.finish(request, response, metrics, started, sampled,
+                        size)
+
+    def finish(self, request, response, metrics: RequestMetrics,
+               started: float, sampled: bool, size: int) -> None:
+        total = time.perf_counter() - started
+        if self.collect_metrics:
+            observe_request(
+                get_view_name(request), request.method,
+                response.status_code, total, metrics.db_queries,
+                metrics.db_time
+            )
+        if sampled:
+            self.report(request, response, metrics, total, size)
+
+    def show_timing(self, request) -> bool:
+        """Server-Timing раскрывает время и число запросов к БД."""
+        # Пользователя API по токену выставляет DRF уже в представлении.
+        user = getattr(request, 'user', None)
+        return self.public_timing or getattr(user, 'is_admin', False)
+
+    def report(self, request, response, metrics: RequestMetrics,
+               total: float, size: int) -> None:
+        if not response.streaming and self.show_timing(request):
+            response['Server-Timing'] = format_server_timing({
+                'db': (metrics.db_time, f'{metrics.db_queries} queries'),
+                'serialize': (metrics.serializer_time, ''),
+                'total': (total, ''),
+            })
+        level = logging.WARNING if total >= self.slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        logger.log(level, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': get_view_name(request),
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 2),
+            'db_queries': metrics.db_queries,
+            'db_ms': round(metrics.db_time * 1000, 2),
+            'serializer_ms': round(metrics.serializer_time * 1000, 2),
+            'response_bytes': size,
+            'cache': response.get('X-Cache'),
+        }, ensure_ascii=False))
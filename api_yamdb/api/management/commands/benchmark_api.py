@@ -0,0 +1,110 @@
+import json
+import subprocess
+import sys
+
+import django
+from api.benchmark import Benchmark, compare
+from api.benchmark.leaderboard import LeaderboardScenarios
+from api.benchmark.streaming import StreamingScenarios
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reviews.seed import seed_dataset
+
+
+class APIBenchmark(LeaderboardScenarios, StreamingScenarios, Benchmark):
+    """Основные сценарии и сценарии отдельных возможностей API."""
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный бенчмарк API на синтетических данных. '
+            'Пишет отчёт в JSON, данные откатываются.')
+    compare_keys = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews-per-title', type=int, default=10)
+        parser.add_argument('--comments-per-review', type=int, default=2)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Число замеряемых запросов на сценарий.'
+        )
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Запустить только указанные сценарии.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл отчёта; по умолчанию отчёт выводится в stdout.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Отчёт предыдущего запуска для сравнения.'
+        )
+
+    def get_commit(self) -> str:
+        try:
+            return subprocess.run(
+                ('git', 'rev-parse', '--short', 'HEAD'),
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    def measure(self, options: dict) -> dict:
+        return APIBenchmark(seed=options['seed']).run(
+            options['requests'], options['warmup'], options['scenario'])
+
+    def run_benchmark(self, options: dict) -> dict:
+        with transaction.atomic():
+            dataset = seed_dataset(
+                users=options['users'],
+                categories=options['categories'],
+                genres=options['genres'],
+                titles=options['titles'],
+                reviews_per_title=options['reviews_per_title'],
+                comments_per_review=options['comments_per_review'],
+                seed=options['seed']
+            )
+            scenarios = self.measure(options)
+            transaction.set_rollback(True)
+        return {
+            'meta': {
+                'commit': self.get_commit(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': sys.version.split()[0],
+                'dataset': dataset,
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'seed': options['seed'],
+            },
+            'scenarios': scenarios,
+        }
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать отчёт: {error}')
+        report = self.run_benchmark(options)
+        text = json.dumps(report, ensure_ascii=False, indent=2,
+                          sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        if baseline is not None:
+            for line in compare(baseline, report, self.compare_keys):
+                self.stderr.write(line)
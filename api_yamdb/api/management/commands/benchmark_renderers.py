@@ -0,0 +1,14 @@
+from api.benchmark.renderers import RendererBenchmark
+
+from .benchmark_api import Command as BenchmarkCommand
+
+
+class Command(BenchmarkCommand):
+    help = ('Время кодирования и размер ответов API в JSON (DRF и orjson) '
+            'и MessagePack на синтетических данных. Параметр --requests '
+            'задаёт число повторов, --scenario - имена ответов.')
+    compare_keys = ('p50_ms', 'p95_ms', 'bytes')
+
+    def measure(self, options: dict) -> dict:
+        return RendererBenchmark(seed=options['seed']).run_renderers(
+            options['requests'], options['warmup'], options['scenario'])
@@ -0,0 +1,76 @@
+import json
+
+from api.benchmark import compare
+from api.benchmark.load import load_test
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/1/',
+    '/api/v1/titles/1/reviews/',
+)
+
+
+class Command(BaseCommand):
+    help = ('Нагрузка по HTTP на запущенный сервер с разным числом '
+            'одновременных соединений. Пишет отчёт в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument(
+            '--path',
+            action='append',
+            help='Путь запроса, можно указать несколько.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            action='append',
+            help='Число соединений, можно указать несколько.'
+        )
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--label', default='')
+        parser.add_argument(
+            '--output',
+            help='Файл отчёта; по умолчанию отчёт выводится в stdout.'
+        )
+        parser.add_argument(
+            '--compare',
+            help='Отчёт предыдущего запуска для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Не удалось прочитать отчёт: {error}')
+        paths = options['path'] or list(DEFAULT_PATHS)
+        report = {
+            'meta': {
+                'label': options['label'],
+                'url': options['url'],
+                'paths': paths,
+                'requests': options['requests'],
+            },
+            'scenarios': {
+                f'c{concurrency}': load_test(
+                    options['url'], paths, concurrency,
+                    options['requests'], options['timeout'])
+                for concurrency in options['concurrency'] or (1, 10, 50)
+            },
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2,
+                          sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+        if baseline is not None:
+            keys = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')
+            for line in compare(baseline, report, keys):
+                self.stderr.write(line)
@@ -0,0 +1,73 @@
+"""Метрики Prometheus.
+
+Под gunicorn каждый воркер пишет значения в файлы каталога
+PROMETHEUS_MULTIPROC_DIR, а /metrics суммирует их по всем процессам.
+Без этой переменной используется реестр текущего процесса. Число
+воркеров и очистку файлов завершившихся процессов ведут хуки из
+gunicorn.conf.py.
+"""
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+REQUEST_DURATION = Histogram(
+    'yamdb_http_request_duration_seconds',
+    'Время обработки запроса.',
+    ('route', 'method', 'status'),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries_per_request',
+    'Число запросов к БД на один запрос к API.',
+    ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds_per_request',
+    'Суммарное время запросов к БД на один запрос к API.',
+    ('route',),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+CACHE_REQUESTS = Counter(
+    'yamdb_api_cache_requests',
+    'Обращения к кэшу ответов API.',
+    ('namespace', 'result')
+)
+THROTTLED_REQUESTS = Counter(
+    'yamdb_throttled_requests',
+    'Запросы, отклонённые ограничением частоты.',
+    ('scope',)
+)
+WORKERS = Gauge(
+    'yamdb_gunicorn_workers',
+    'Число живых процессов, обслуживающих запросы.',
+    multiprocess_mode='livesum'
+)
+
+
+def observe_request(route: str, method: str, status: int,
+                    duration: float, db_queries: int,
+                    db_duration: float) -> None:
+    route = route or UNMATCHED_ROUTE
+    REQUEST_DURATION.labels(route, method, status).observe(duration)
+    DB_QUERIES.labels(route).observe(db_queries)
+    DB_DURATION.labels(route).observe(db_duration)
+
+
+def get_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    return HttpResponse(generate_latest(get_registry()),
+                        content_type=CONTENT_TYPE_LATEST)
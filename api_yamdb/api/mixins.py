@@ -0,0 +1,297 @@
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import cache
+from .instrumentation import serializing
+from .serializers import BULK_MAX_ITEMS
+
+READ_ACTIONS = ('list', 'retrieve')
+
+logger = logging.getLogger(__name__)
+
+
+def get_field_columns(model, name: str, field) -> list:
+    """Колонки модели, которые читает поле сериализатора.
+
+    None, если источник поля не колонка и не связь модели.
+    """
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if model_field.many_to_many or model_field.one_to_many:
+        return []
+    if not model_field.is_relation:
+        return [name]
+    related = model_field.related_model
+    if isinstance(field, serializers.SlugRelatedField):
+        return [name, f'{name}__{field.slug_field}']
+    if isinstance(field, serializers.Serializer):
+        columns = [name]
+        for child in field.fields.values():
+            child_columns = get_field_columns(related, child.source, child)
+            if child_columns is None:
+                return [name]
+            columns.extend(f'{name}__{column}' for column in child_columns)
+        return columns
+    return [name]
+
+
+def get_serializer_columns(serializer):
+    """Колонки для .only() или None, если их не определить."""
+    model = serializer.Meta.model
+    columns = [model._meta.pk.name]
+    for field in serializer.fields.values():
+        field_columns = get_field_columns(
+            model, field.source.split('.')[0], field)
+        if field_columns is None:
+            return None
+        columns.extend(field_columns)
+    return columns
+
+
+class SerializerTimingMixin:
+    """Список, в замерах которого учтено время сериализации.
+
+    Повторяет ListModelMixin.list, но .data сериализатора читается
+    в блоке instrumentation.serializing.
+    """
+
+    def serialize(self, *args, **kwargs):
+        with serializing():
+            return self.get_serializer(*args, **kwargs).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.serialize(page, many=True))
+        return Response(self.serialize(queryset, many=True))
+
+
+class ReadQuerysetMixin(SerializerTimingMixin):
+    """Подгружает связанные объекты для действий чтения.
+
+    Связи перечисляются в read_select_related и read_prefetch_related,
+    поэтому страница любого размера загружается за постоянное число
+    запросов к БД.
+    """
+    read_select_related = ()
+    read_prefetch_related = ()
+
+    def plan_queryset(self, queryset):
+        if self.action not in READ_ACTIONS:
+            return queryset
+        select_related = self.read_select_related
+        prefetch_related = self.read_prefetch_related
+        serializer = self.get_serializer()
+        if getattr(serializer, 'sparse', False):
+            # Связи и колонки, не попавшие в ответ, не загружаются.
+            sources = {field.source.split('.')[0]
+                       for field in serializer.fields.values()}
+            select_related = [name for name in select_related
+                              if name.split('__')[0] in sources]
+            prefetch_related = [name for name in prefetch_related
+                                if name.split('__')[0] in sources]
+            columns = get_serializer_columns(serializer)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset.prefetch_related(*prefetch_related)
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.serialize(self.get_object()))
+
+
+def iterate_chunks(queryset, size: int):
+    """Объекты queryset порциями, связи prefetch_related - на порцию.
+
+    iterator() не выполняет prefetch_related, поэтому связи
+    подгружаются отдельно для каждой порции.
+    """
+    lookups = queryset._prefetch_related_lookups
+    objects = queryset.prefetch_related(None).iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(objects, size))
+        if not chunk:
+            return
+        prefetch_related_objects(chunk, *lookups)
+        yield chunk
+        # Queryset в кэше prefetch_related ссылается на свой объект, и
+        # без разрыва ссылки порцию освобождала бы только полная сборка
+        # мусора.
+        for obj in chunk:
+            obj.__dict__.pop('_prefetched_objects_cache', None)
+
+
+class StreamingListMixin:
+    """Потоковая отдача больших страниц списка в JSON.
+
+    Страница от API_STREAM_PAGE_SIZE строк не собирается в памяти:
+    строки читаются из БД и сериализуются порциями по
+    stream_chunk_size, и каждая порция сразу уходит клиенту. Ответ
+    не отличается от обычной постраничной выдачи. Поток воркера (и
+    в режиме ASGI поток пула) занят, пока клиент не прочитает ответ.
+    """
+    stream_chunk_size = 100
+
+    def get_stream_paginator(self, request):
+        min_page_size = settings.API_STREAM_PAGE_SIZE
+        get_page_paginator = getattr(self.paginator, 'get_page_paginator',
+                                     None)
+        if (not min_page_size or get_page_paginator is None
+                or not isinstance(request.accepted_renderer, JSONRenderer)):
+            return None
+        paginator = get_page_paginator(request, self)
+        if (paginator is None
+                or (paginator.get_page_size(request) or 0) < min_page_size):
+            return None
+        return paginator
+
+    def render_rows(self, chunks):
+        """Строки массива results, по части на порцию."""
+        renderer = self.request.accepted_renderer
+        media_type = self.request.accepted_media_type
+        context = self.get_renderer_context()
+        # Один сериализатор на все порции: поля сериализатора ссылаются
+        # друг на друга, и новый на каждую порцию освобождала бы только
+        # полная сборка мусора.
+        serializer = self.get_serializer(many=True)
+        for chunk in chunks:
+            with serializing():
+                rows = serializer.to_representation(chunk)
+            yield b','.join(
+                renderer.render(row, media_type, context) for row in rows)
+
+    def stream_page(self, paginator, page):
+        """Тело ответа; первая порция строк читается сразу.
+
+        Ошибка запроса к БД до отправки заголовков вернётся клиенту
+        обычным ответом 500.
+        """
+        head = paginator.get_paginated_response(None).data
+        del head['results']
+        # Ответ пагинатора без results, затем строки массива results.
+        head = self.request.accepted_renderer.render(
+            head, self.request.accepted_media_type,
+            self.get_renderer_context())[:-1] + b',"results":['
+        parts = self.render_rows(
+            iterate_chunks(page.object_list, self.stream_chunk_size))
+        return self.join_parts(head + next(parts, b''), parts)
+
+    def join_parts(self, head, parts):
+        try:
+            yield head
+            for part in parts:
+                yield b',' + part
+            yield b']}'
+        except Exception:
+            # Заголовки уже отправлены: исключение обрывает соединение,
+            # и клиент не примет обрезанный JSON за полный ответ.
+            logger.exception('Ошибка потоковой отдачи %s',
+                             self.request.path)
+            raise
+        finally:
+            parts.close()
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.get_stream_paginator(request)
+        if paginator is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = paginator.get_page(queryset, request)
+        return StreamingHttpResponse(
+            self.stream_page(paginator, page),
+            content_type=request.accepted_renderer.media_type)
+
+
+class BulkWriteMixin:
+    """Пакетное создание и удаление: POST и DELETE на <prefix>/bulk/.
+
+    POST принимает список объектов, DELETE - список значений
+    bulk_lookup_field. Пакет сохраняется или удаляется целиком.
+    """
+    bulk_serializer_class = None
+    bulk_lookup_field = 'pk'
+
+    @action(methods=('post', 'delete'), detail=False, url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+        return self.bulk_create(request)
+
+    def get_bulk_response_queryset(self, instances):
+        queryset = self.get_queryset()
+        opts = queryset.model._meta
+        return queryset.filter(
+            pk__in=[instance.pk for instance in instances]
+        ).select_related(
+            *(field.name for field in opts.concrete_fields
+              if field.is_relation)
+        ).prefetch_related(*(field.name for field in opts.many_to_many))
+
+    def bulk_create(self, request):
+        serializer = self.bulk_serializer_class(
+            data=request.data,
+            many=True,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        instances = serializer.save()
+        # bulk_create не отправляет post_save, кэш сбрасывается явно.
+        cache.invalidate(self.cache_namespace)
+        response_serializer = self.bulk_serializer_class(
+            self.get_bulk_response_queryset(instances), many=True)
+        return Response(response_serializer.data,
+                        status=status.HTTP_201_CREATED)
+
+    def get_bulk_lookup_field(self):
+        """Поле модели, по которому удаляется пакет."""
+        opts = self.get_queryset().model._meta
+        if self.bulk_lookup_field == 'pk':
+            return opts.pk
+        return opts.get_field(self.bulk_lookup_field)
+
+    def bulk_destroy(self, request):
+        values = serializers.ListField(
+            child=serializers.CharField(),
+            allow_empty=False,
+            max_length=BULK_MAX_ITEMS
+        ).run_validation(request.data)
+        field = self.get_bulk_lookup_field()
+        lookups, errors = [], []
+        for value in values:
+            try:
+                lookups.append(field.to_python(value))
+                errors.append({})
+            except DjangoValidationError as error:
+                errors.append({value: error.messages})
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = self.get_queryset().filter(
+            **{f'{self.bulk_lookup_field}__in': lookups})
+        found = set(
+            queryset.values_list(self.bulk_lookup_field, flat=True))
+        errors = [
+            {} if lookup in found else {value: ['Объект не найден.']}
+            for value, lookup in zip(values, lookups)
+        ]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,153 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from django.core.paginator import InvalidPage
+from django.db.models import Max
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGE_MODE = 'page'
+CURSOR_MODE = 'cursor'
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'count'
     max_page_size = 1000
+
+    def get_page(self, queryset, request):
+        """Страница без загрузки строк: object_list - срез queryset."""
+        paginator = self.django_paginator_class(
+            queryset, self.get_page_size(request))
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as error:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(error)))
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.get_page_size(request):
+            return None
+        return list(self.get_page(queryset, request))
+
+    def get_page_paginator(self, request, view=None):
+        return self
+
+
+class PositionPagination(StandardResultsSetPagination):
+    """Постраничная пагинация по номеру места без OFFSET.
+
+    Страница - диапазон значений position_field, число записей -
+    наибольшее место. Места должны идти подряд с 1, см.
+    reviews.leaderboard.renumber.
+    """
+    position_field = 'position'
+
+    def get_page_paginator(self, request, view=None):
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        self.count = queryset.aggregate(
+            count=Max(self.position_field))['count'] or 0
+        start = (self.page_number - 1) * self.page_size
+        if self.page_number < 1 or 0 < self.count <= start:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.page_number, message=''))
+        return list(queryset.filter(**{
+            f'{self.position_field}__gt': start,
+            f'{self.position_field}__lte': start + self.page_size,
+        }))
+
+    def get_next_link(self):
+        if self.page_number * self.page_size >= self.count:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(),
+                                   self.page_query_param,
+                                   self.page_number + 1)
+
+    def get_previous_link(self):
+        url = self.request.build_absolute_uri()
+        if self.page_number == 1:
+            return None
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация без OFFSET и COUNT(*).
+
+    Порядок берётся из cursor_ordering представления и должен
+    опираться на индексированное поле.
+    """
+    page_size = StandardResultsSetPagination.page_size
+    page_size_query_param = StandardResultsSetPagination.page_size_query_param
+    max_page_size = StandardResultsSetPagination.max_page_size
+    ordering = '-pk'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class PageOrCursorPagination(BasePagination):
+    """Постраничная пагинация с переключением в курсорный режим.
+
+    Режим выбирается параметром запроса ?pagination=cursor (или наличием
+    ?cursor=), иначе атрибутом pagination_mode представления.
+    По умолчанию ответ сохраняет формат count/next/previous/results.
+    """
+    mode_query_param = 'pagination'
+    paginator_classes = {
+        PAGE_MODE: StandardResultsSetPagination,
+        CURSOR_MODE: KeysetPagination,
+    }
+
+    def get_mode(self, request, view):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return CURSOR_MODE
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in self.paginator_classes:
+            return mode
+        return getattr(view, 'pagination_mode', PAGE_MODE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.paginator_classes[
+            self.get_mode(request, view)]()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_page_paginator(self, request, view=None):
+        """Постраничный пагинатор, если запрошен постраничный режим."""
+        if self.get_mode(request, view) != PAGE_MODE:
+            return None
+        return self.paginator_classes[PAGE_MODE]()
@@ -11,7 +11,7 @@ class OnlyContributionAdminModeratorOrRead(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in permissions.SAFE_METHODS
-                or request.user == obj.author
+                or request.user.pk == obj.author_id
                 or request.user.is_admin or request.user.is_moderator)
 
 
@@ -0,0 +1,74 @@
+"""Быстрые рендереры и парсеры ответов API.
+
+ORJSONRenderer выдаёт тот же JSON, что и JSONRenderer DRF, но
+кодирует его orjson. MessagePackRenderer отдаёт компактный двоичный
+ответ клиентам, которые присылают Accept: application/msgpack.
+Типы, которые не умеют кодировать orjson и msgpack (Decimal,
+ленивые строки, QuerySet), приводятся кодировщиком DRF.
+"""
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON через orjson, с отступами - стандартным рендерером."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        # orjson умеет только отступ в 2 пробела.
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        # Даты кодирует DRF: у orjson другой формат UTC.
+        ret = orjson.dumps(data, default=encode_default,
+                           option=orjson.OPT_NON_STR_KEYS
+                           | orjson.OPT_PASSTHROUGH_DATETIME)
+        # Как и JSONRenderer: разделители строк ломают JSONP.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK_MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default,
+                             use_bin_type=True)
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f'JSON parse error - {error}')
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as error:
+            raise ParseError(f'MessagePack parse error - {error}')
@@ -1,11 +1,76 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connection, transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 from reviews import models as review_models
+from reviews import stats
 from reviews.validators import username_validator, validate_year_title
 
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
 
-class ReviewSerializer(serializers.ModelSerializer):
+
+def get_param_names(request, param: str):
+    """Имена из параметра вида ?fields=id,name или None."""
+    if request is None or param not in request.query_params:
+        return None
+    return {
+        name.strip()
+        for name in request.query_params[param].split(',') if name.strip()
+    }
+
+
+class SparseFieldsMixin:
+    """Выбор полей ответа параметрами fields и expand.
+
+    fields оставляет в ответе перечисленные поля. Если указан fields или
+    expand, вложенные объекты из expandable_fields заменяются слагами,
+    кроме перечисленных в expand. Без параметров ответ не меняется.
+    Поля выбираются только для чтения, запись их не касается.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        self.sparse = False
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        names = get_param_names(request, FIELDS_PARAM)
+        expand = get_param_names(request, EXPAND_PARAM)
+        if names is None and expand is None:
+            return
+        self.sparse = True
+        self.restrict(names)
+        self.collapse(expand or set())
+
+    def restrict(self, names) -> None:
+        if names is None:
+            return
+        unknown = ', '.join(sorted(names - set(self.fields)))
+        if unknown:
+            raise serializers.ValidationError(
+                {FIELDS_PARAM: [f'Неизвестные поля: {unknown}.']})
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
+
+    def collapse(self, expand) -> None:
+        unknown = ', '.join(sorted(expand - set(self.expandable_fields)))
+        if unknown:
+            raise serializers.ValidationError(
+                {EXPAND_PARAM: [f'Нельзя раскрыть поля: {unknown}.']})
+        for name, slug_field in self.expandable_fields.items():
+            if name not in self.fields or name in expand:
+                continue
+            self.fields[name] = serializers.SlugRelatedField(
+                slug_field=slug_field,
+                read_only=True,
+                many=isinstance(self.fields[name], serializers.ListSerializer)
+            )
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username',
@@ -34,13 +99,13 @@ class ReviewSerializer(serializers.ModelSerializer):
         title_id = self.context['view'].kwargs.get('title_id')
         title = get_object_or_404(review_models.Title, pk=title_id)
         if title.reviews.filter(
-                author=self.context['request'].user).exists():
+                author_id=self.context['request'].user.pk).exists():
             raise serializers.ValidationError(
                 'Можно оставить только 1 отзыв.')
         return attrs
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -59,19 +124,20 @@ class CommentSerializer(serializers.ModelSerializer):
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = review_models.Category
-        exclude = ('id',)
+        exclude = ('id', 'modified')
 
 
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = review_models.Genre
-        exclude = ('id',)
+        exclude = ('id', 'modified')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
+    expandable_fields = {'category': 'slug', 'genre': 'slug'}
 
     class Meta:
         model = review_models.Title
@@ -100,6 +166,173 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         return validate_year_title(value)
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(source='rating_count')
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = review_models.Title
+        fields = ('id', 'name', 'rating', 'reviews_count', 'scores')
+
+    def get_scores(self, obj):
+        return stats.get_title_scores(obj)
+
+
+class TopTitleSerializer(serializers.ModelSerializer):
+    rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(source='rating_count')
+
+    class Meta:
+        model = review_models.Title
+        fields = ('id', 'name', 'year', 'rating', 'reviews_count')
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    title = TopTitleSerializer()
+
+    class Meta:
+        model = review_models.LeaderboardEntry
+        fields = ('position', 'score', 'title')
+
+
+class GroupTopSerializer(serializers.Serializer):
+    """Статистика категории или жанра с лучшими произведениями."""
+    slug = serializers.SlugField(source='group.slug')
+    name = serializers.CharField(source='group.name')
+    reviews_count = serializers.IntegerField(source='stats.reviews_count')
+    rating = serializers.FloatField(source='stats.rating')
+    titles = TopTitleSerializer(many=True)
+
+
+BULK_MAX_ITEMS = 1000
+
+
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """Ищет объект по слагу в карте, загруженной BulkListSerializer."""
+
+    def to_internal_value(self, data):
+        objects = self.context['preloaded'][self.queryset.model]
+        try:
+            return objects[smart_str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Пакетное создание объектов одной транзакцией.
+
+    Слаги связанных объектов всего пакета разрешаются одним запросом
+    на модель, уникальные слаги проверяются одним запросом.
+    Ошибки возвращаются списком по позициям пакета.
+    """
+
+    def preload(self, data: list) -> None:
+        preloaded = self.context.setdefault('preloaded', {})
+        for name, field in self.child.fields.items():
+            field = getattr(field, 'child_relation', field)
+            if not isinstance(field, PreloadedSlugRelatedField):
+                continue
+            slugs = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                if isinstance(value, list):
+                    slugs.update(map(smart_str, value))
+                elif value is not None:
+                    slugs.add(smart_str(value))
+            preloaded[field.queryset.model] = field.queryset.in_bulk(
+                slugs, field_name=field.slug_field)
+
+    def validate_unique_slugs(self, data: list) -> None:
+        model = self.child.Meta.model
+        slugs = [item['slug'] for item in data]
+        existing = set(model.objects.filter(
+            slug__in=slugs).values_list('slug', flat=True))
+        errors = []
+        seen = set()
+        for slug in slugs:
+            if slug in existing or slug in seen:
+                errors.append({'slug': [f'Слаг {slug} уже существует.']})
+            else:
+                errors.append({})
+            seen.add(slug)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Не больше {BULK_MAX_ITEMS} объектов за запрос.')
+        if isinstance(data, list):
+            self.preload(data)
+        value = super().to_internal_value(data)
+        if 'slug' in self.child.fields:
+            self.validate_unique_slugs(value)
+        return value
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        m2m_fields = [
+            field.name for field in model._meta.many_to_many
+            if field.name in self.child.fields
+        ]
+        with transaction.atomic():
+            instances = [
+                model(**{key: value for key, value in item.items()
+                         if key not in m2m_fields})
+                for item in validated_data
+            ]
+            if connection.features.can_return_ids_from_bulk_insert:
+                model.objects.bulk_create(instances)
+            else:
+                # Без RETURNING первичные ключи для связей получаем save().
+                for instance in instances:
+                    instance.save()
+            for name in m2m_fields:
+                field = model._meta.get_field(name)
+                through = field.remote_field.through
+                source = f'{field.m2m_field_name()}_id'
+                target = f'{field.m2m_reverse_field_name()}_id'
+                through.objects.bulk_create([
+                    through(**{source: instance.pk, target: related.pk})
+                    for instance, item in zip(instances, validated_data)
+                    for related in item.get(name, ())
+                ])
+        return instances
+
+
+class BulkCategorySerializer(serializers.ModelSerializer):
+    slug = serializers.SlugField(max_length=50)
+
+    class Meta:
+        model = review_models.Category
+        fields = ('name', 'slug')
+        list_serializer_class = BulkListSerializer
+
+
+class BulkGenreSerializer(serializers.ModelSerializer):
+    slug = serializers.SlugField(max_length=50)
+
+    class Meta:
+        model = review_models.Genre
+        fields = ('name', 'slug')
+        list_serializer_class = BulkListSerializer
+
+
+class BulkTitleSerializer(TitleCreateSerializer):
+    genre = PreloadedSlugRelatedField(
+        slug_field='slug',
+        queryset=review_models.Genre.objects.all(),
+        many=True)
+    category = PreloadedSlugRelatedField(
+        slug_field='slug',
+        queryset=review_models.Category.objects.all())
+
+    class Meta(TitleCreateSerializer.Meta):
+        list_serializer_class = BulkListSerializer
+
+
 class RegistrationSerializer(serializers.Serializer):
     """ Сериализация регистрации пользователя и создания нового. """
     username = serializers.CharField(
@@ -0,0 +1,62 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Genre, Review, Title, User,
+                            is_title_deleting)
+
+from . import cache
+from .authentication import revoke_claims
+
+INVALIDATES = {
+    Genre: (cache.GENRES, cache.TITLES),
+    Category: (cache.CATEGORIES, cache.TITLES),
+}
+
+
+def invalidate_cache(sender, **kwargs):
+    cache.invalidate(*INVALIDATES[sender])
+
+
+for model in INVALIDATES:
+    post_save.connect(invalidate_cache, sender=model)
+    post_delete.connect(invalidate_cache, sender=model)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    cache.invalidate_objects(cache.TITLES, instance.pk)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """Отзыв меняет рейтинг своего произведения."""
+    # Удаляемое произведение сбрасывает кэш само.
+    if not is_title_deleting(instance.title_id):
+        cache.invalidate_objects(cache.TITLES, instance.title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genre_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        cache.invalidate_objects(cache.TITLES, instance.pk)
+    elif pk_set is not None:
+        cache.invalidate_objects(cache.TITLES, *pk_set)
+    else:
+        cache.invalidate(cache.TITLES)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    claims = instance.get_token_claims()
+    if not created and getattr(instance, '_loaded_claims', None) != claims:
+        revoke_claims(instance.pk)
+    instance._loaded_claims = claims
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_claims(instance.pk)
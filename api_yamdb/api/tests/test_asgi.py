@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+from api.asgi import WsgiBridge
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+
+def call(application, method='GET', path='/', body=b'', headers=()):
+    messages = [{'type': 'http.request', 'body': body[:3],
+                 'more_body': True},
+                {'type': 'http.request', 'body': body[3:]}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': b'a=1', 'http_version': '1.1',
+        'headers': list(headers), 'client': ('10.0.0.1', 5000),
+    }
+    asyncio.run(application(scope, receive, send))
+    return list(sent)
+
+
+class EchoApplication:
+    """WSGI-приложение, которое возвращает тело запроса."""
+
+    def __init__(self, streaming=False):
+        self.streaming = streaming
+        self.closed = False
+        self.threads = []
+
+    def __call__(self, environ, start_response):
+        self.environ = environ
+        self.threads.append(threading.current_thread().name)
+        start_response('201 Created', [('X-Test', 'yes')])
+        body = environ['wsgi.input'].read()
+        application = self
+
+        class Result(list):
+            streaming = self.streaming
+
+            def close(self):
+                application.closed = True
+
+        return Result([body, b'!'])
+
+
+class WsgiBridgeTest(SimpleTestCase):
+
+    def test_request_and_response(self):
+        echo = EchoApplication()
+        sent = call(WsgiBridge(echo, 1, 1), 'POST', '/api/v1/auth/signup/',
+                    b'{"username": "x"}',
+                    [(b'content-type', b'application/json')])
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'x-test', b'yes'), sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'{"username": "x"}!')
+        self.assertEqual(echo.environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(echo.environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(echo.environ['QUERY_STRING'], 'a=1')
+        self.assertTrue(echo.closed)
+        self.assertTrue(echo.threads[0].startswith('asgi_'))
+
+    def test_missing_start_response(self):
+        def application(environ, start_response):
+            return [b'body']
+
+        with self.assertLogs('api.asgi', 'ERROR'):
+            sent = call(WsgiBridge(application, 1, 1))
+        self.assertEqual(sent[0]['status'], 500)
+
+    def test_lazy_start_response(self):
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            yield b'body'
+
+        sent = call(WsgiBridge(application, 1, 1))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(sent[1]['body'], b'body')
+
+    def test_hot_reads_use_read_pool(self):
+        echo = EchoApplication()
+        bridge = WsgiBridge(echo, 1, 1)
+        call(bridge, 'GET', '/api/v1/titles/1/reviews/')
+        call(bridge, 'POST', '/api/v1/titles/1/reviews/')
+        self.assertTrue(echo.threads[0].startswith('asgi-read'))
+        self.assertFalse(echo.threads[1].startswith('asgi-read'))
+
+    def test_streaming_response(self):
+        echo = EchoApplication(streaming=True)
+        sent = call(WsgiBridge(echo, 1, 1), 'POST', '/', b'abcdef')
+        self.assertEqual([message.get('body') for message in sent[1:]],
+                         [b'abcdef', b'!', b''])
+        self.assertTrue(sent[1]['more_body'])
+        self.assertTrue(echo.closed)
+
+    def test_django_application(self):
+        sent = call(WsgiBridge(get_wsgi_application(), 1, 1),
+                    path='/metrics')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(b'yamdb_http_request_duration_seconds', sent[1]['body'])
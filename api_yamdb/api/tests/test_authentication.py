@@ -0,0 +1,115 @@
+import os
+import tempfile
+
+from api.authentication import get_access_token
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from reviews.models import ADMIN_ROLE, USER_ROLE, Review, Title, User
+
+STATS_URL = '/api/v1/cache/stats/'
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+# Файловый кэш общий для процессов, как memcached у воркеров.
+SHARED_CACHE = {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-test-auth'),
+}
+
+
+@override_settings(CACHES={'default': SHARED_CACHE})
+class ClaimsAuthenticationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+        cls.user = User.objects.create(username='user', email='user@ya.ru')
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_client(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_token_view_issues_claims(self):
+        self.user.confirmation_code = '123456'
+        self.user.save()
+        response = APIClient().post('/api/v1/auth/token/', {
+            'username': 'user', 'confirmation_code': '123456'})
+        client = self.get_client(response.data['token'])
+        with self.assertNumQueries(0):
+            response = client.get(STATS_URL)
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_without_user_lookup(self):
+        client = self.get_client(get_access_token(self.admin))
+        with self.assertNumQueries(0):
+            response = client.get(STATS_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_without_claims_uses_db(self):
+        client = self.get_client(
+            RefreshToken.for_user(self.admin).access_token)
+        with self.assertNumQueries(1):
+            response = client.get(STATS_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_revokes_claims(self):
+        client = self.get_client(get_access_token(self.admin))
+        admin = User.objects.get(pk=self.admin.pk)
+        admin.role = USER_ROLE
+        admin.save()
+        with self.assertNumQueries(1):
+            response = client.get(STATS_URL)
+        self.assertEqual(response.status_code, 403)
+
+    def test_review_author_from_claims(self):
+        client = self.get_client(get_access_token(self.user))
+        response = client.post(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'text': 'Отзыв', 'score': 7})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['author'], 'user')
+        self.assertEqual(Review.objects.get().author, self.user)
+        response = client.get('/api/v1/users/me/')
+        self.assertEqual(response.data['email'], 'user@ya.ru')
+
+
+class RevocationAcrossWorkersTest(TestCase):
+    """Роль меняется в одном воркере, токен проверяет другой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+
+    def demote_in_other_worker(self, caches_setting):
+        token = get_access_token(self.admin)
+        with override_settings(CACHES=caches_setting):
+            caches['worker'].clear()
+            # Отзыв пишет первый воркер.
+            with override_settings(API_CACHE_ALIAS='worker'):
+                self.admin.role = USER_ROLE
+                self.admin.save()
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+            return client.get(STATS_URL)
+
+    def test_local_caches_check_db(self):
+        response = self.demote_in_other_worker({
+            'default': {'BACKEND': LOCMEM, 'LOCATION': 'worker-2'},
+            'worker': {'BACKEND': LOCMEM, 'LOCATION': 'worker-1'},
+        })
+        self.assertEqual(response.status_code, 403)
+
+    def test_shared_cache_revokes(self):
+        response = self.demote_in_other_worker({
+            'default': SHARED_CACHE,
+            'worker': SHARED_CACHE,
+        })
+        self.assertEqual(response.status_code, 403)
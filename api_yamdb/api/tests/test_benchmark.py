@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from api.benchmark import compare, percentile
+from api.benchmark.load import load_test
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from reviews.models import Title
+
+
+class BenchmarkTest(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_report_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command(
+                'benchmark_api', users=5, titles=3, reviews_per_title=2,
+                comments_per_review=1, requests=2, warmup=0,
+                output=path, stdout=StringIO()
+            )
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(report['meta']['dataset']['titles'], 3)
+        self.assertIn('leaderboard_page', report['scenarios'])
+        self.assertIn('titles_large_page', report['scenarios'])
+        for name, result in report['scenarios'].items():
+            self.assertEqual(result['requests'], 2, name)
+            self.assertEqual(
+                set(result['statuses']) - {'200', '201', '204'}, set(),
+                name)
+        self.assertEqual(len(compare(report, report)),
+                         len(report['scenarios']))
+        self.assertFalse(Title.objects.exists())
+
+    def test_renderers(self):
+        out = StringIO()
+        call_command(
+            'benchmark_renderers', users=5, titles=3, reviews_per_title=2,
+            comments_per_review=1, requests=2, warmup=0,
+            scenario=['titles_1000'], stdout=out
+        )
+        results = json.loads(out.getvalue())['scenarios']
+        self.assertEqual(set(results), {
+            'titles_1000.json', 'titles_1000.orjson', 'titles_1000.msgpack'})
+        self.assertEqual(results['titles_1000.json']['bytes'],
+                         results['titles_1000.orjson']['bytes'])
+        self.assertLess(results['titles_1000.msgpack']['bytes'],
+                        results['titles_1000.json']['bytes'])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # noqa: N802
+        self.send_response(200 if self.path == '/ok/' else 404)
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestTest(SimpleTestCase):
+
+    def test_load_test(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            result = load_test(
+                f'http://127.0.0.1:{server.server_port}/',
+                ['/ok/', '/missing/'], concurrency=3, requests=6)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(result['statuses'], {'200': 3, '404': 3})
+        self.assertEqual(result['concurrency'], 3)
+        self.assertGreater(result['throughput_rps'], 0)
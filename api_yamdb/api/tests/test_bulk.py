@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from reviews.models import ADMIN_ROLE, Category, Genre, Title, User
+
+
+class BulkWriteTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_create_titles(self):
+        payload = [
+            {'name': f'Произведение {i}', 'year': 2000,
+             'category': 'movie', 'genre': ['drama']}
+            for i in range(5)
+        ]
+        # Карты жанров и категорий, savepoint, произведения, связи,
+        # release, ответ с жанрами. Без RETURNING (SQLite) произведения
+        # записываются по одному.
+        inserts = 1
+        if not connection.features.can_return_ids_from_bulk_insert:
+            inserts = len(payload)
+        with self.assertNumQueries(7 + inserts):
+            response = self.client.post(
+                '/api/v1/titles/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0]['genre'], ['drama'])
+        self.assertEqual(
+            Title.objects.filter(genre__slug='drama').count(), 5)
+
+    def test_bulk_create_reports_item_errors(self):
+        payload = [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ]
+        response = self.client.post(
+            '/api/v1/genres/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('slug', response.data[1])
+        self.assertIn('slug', response.data[2])
+        self.assertFalse(Genre.objects.filter(slug='comedy').exists())
+
+    def test_bulk_delete(self):
+        response = self.client.delete(
+            '/api/v1/categories/bulk/', ['movie', 'book'], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        response = self.client.delete(
+            '/api/v1/categories/bulk/', ['movie'], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Category.objects.exists())
+
+    def test_bulk_delete_titles_by_pk(self):
+        title = Title.objects.create(name='Фильм', year=2000)
+        response = self.client.delete(
+            '/api/v1/titles/bulk/', ['abc', str(title.pk), 0],
+            format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('abc', response.data[0])
+        self.assertEqual(response.data[1:], [{}, {}])
+        response = self.client.delete(
+            '/api/v1/titles/bulk/', [title.pk, 0], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('0', response.data[1])
+        response = self.client.delete(
+            '/api/v1/titles/bulk/', [f' {title.pk}'], format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Title.objects.exists())
+
+    def test_bulk_requires_admin(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(
+            '/api/v1/genres/bulk/', [], format='json')
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from reviews.models import Category, Genre, Review, Title, User
+
+from .utils import QueryCountMixin
+
+
+class ResponseCacheTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=cls.category)
+        cls.url = f'/api/v1/titles/{cls.title.pk}/'
+
+    def test_second_request_is_served_from_cache(self):
+        response = self.assert_endpoint_queries(self.url, 3)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.assert_endpoint_queries(self.url, 0)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_cached_response_answers_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_query_string_is_part_of_key(self):
+        self.client.get('/api/v1/titles/', {'year': 2000, 'count': 2})
+        response = self.client.get(
+            '/api/v1/titles/', {'count': 2, 'year': 2000})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.client.get('/api/v1/titles/', {'year': 1999})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_writes_invalidate_titles(self):
+        self.client.get(self.url)
+        user = User.objects.create(username='user', email='user@ya.ru')
+        Review.objects.create(
+            title=self.title, author=user, text='Отзыв', score=8)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['rating'], 8)
+
+        self.title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['genre']), 1)
+
+        self.category.name = 'Кино'
+        self.category.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['category']['name'], 'Кино')
+
+    def test_title_write_keeps_other_titles_cached(self):
+        other = Title.objects.create(name='Другое', year=2000)
+        other_url = f'/api/v1/titles/{other.pk}/'
+        for url in (self.url, other_url, '/api/v1/titles/'):
+            self.client.get(url)
+        other.name = 'Новое название'
+        other.save()
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        for url in (other_url, '/api/v1/titles/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertIn('Новое название', response.content.decode())
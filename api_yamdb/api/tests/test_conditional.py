@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils.http import http_date
+from reviews.models import Category, Review, Title, User
+
+from .utils import QueryCountMixin
+
+
+class ConditionalGetTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=cls.category)
+        cls.user = User.objects.create(username='user', email='user@ya.ru')
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.user, text='Отзыв', score=5)
+        cls.reviews_url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def test_unchanged_reviews_are_not_modified(self):
+        response = self.client.get(self.reviews_url)
+        # произведение и агрегат по отзывам, без сериализации.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.reviews_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_review_is_not_modified_since(self):
+        url = f'{self.reviews_url}{self.review.pk}/'
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_ignores_if_modified_since(self):
+        older = Title.objects.create(
+            name='Старое', year=1990, category=self.category)
+        Title.objects.filter(pk=older.pk).update(
+            modified=self.title.modified - timedelta(days=1))
+        self.assertNotIn('Last-Modified', self.client.get('/api/v1/titles/'))
+        older.delete()
+        # Дата самого нового произведения не изменилась.
+        response = self.client.get(
+            '/api/v1/titles/', HTTP_IF_MODIFIED_SINCE=http_date(time.time()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_review_update_changes_etag(self):
+        etag = self.client.get(self.reviews_url)['ETag']
+        self.review.text = 'Новый текст'
+        self.review.save()
+        response = self.client.get(
+            self.reviews_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_author_rename_changes_etag(self):
+        comments_url = f'{self.reviews_url}{self.review.pk}/comments/'
+        self.review.comments.create(author=self.user, text='Комментарий')
+        urls = (self.reviews_url, f'{self.reviews_url}{self.review.pk}/',
+                comments_url)
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('renamed', response.content.decode())
+
+    def test_category_rename_changes_title_etag(self):
+        url = f'/api/v1/titles/{self.title.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.category.name = 'Кино'
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['category']['name'], 'Кино')
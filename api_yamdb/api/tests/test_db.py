@@ -0,0 +1,113 @@
+import threading
+import time
+from unittest import mock, skipUnless
+
+from django.core.signals import request_started
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase, override_settings
+
+from api_yamdb.db.base import DatabaseWrapper
+
+
+class HealthCheckTest(TransactionTestCase):
+
+    def check(self, usable, checked_ago=60):
+        connection.ensure_connection()
+        connection.health_checked_at = time.monotonic() - checked_ago
+        patch_usable = mock.patch.object(connection, 'is_usable',
+                                         return_value=usable)
+        patch_close = mock.patch.object(connection, 'close')
+        with patch_usable as check, patch_close as close:
+            request_started.send(sender=None)
+        return check.called, close.called
+
+    def test_unusable_connection_closed(self):
+        self.assertEqual(self.check(usable=False), (True, True))
+
+    def test_usable_connection_kept(self):
+        self.assertEqual(self.check(usable=True), (True, False))
+
+    def test_recently_checked_connection_skipped(self):
+        self.assertEqual(self.check(usable=False, checked_ago=1),
+                         (False, False))
+
+    def test_checked_once_per_interval(self):
+        self.check(usable=True)
+        with mock.patch.object(connection, 'is_usable') as is_usable:
+            request_started.send(sender=None)
+        self.assertFalse(is_usable.called)
+
+    @override_settings(DB_HEALTH_CHECKS=False)
+    def test_disabled(self):
+        self.assertEqual(self.check(usable=False), (False, False))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Пул только для PostgreSQL')
+class PoolTest(TransactionTestCase):
+
+    def setUp(self):
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'ENGINE': 'api_yamdb.db',
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {'pool_min_size': 1, 'pool_max_size': 2,
+                        'pool_timeout': 0.5},
+        }, alias=connection.alias)
+        self.addCleanup(self.wrapper.close_pool)
+        self.addCleanup(self.wrapper.close)
+
+    def test_connection_returned_to_pool(self):
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        self.wrapper.close()
+        self.assertFalse(raw.closed)
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw)
+
+    def test_dead_connection_replaced(self):
+        self.wrapper.ensure_connection()
+        raw = self.wrapper.connection
+        raw.close()
+        self.wrapper.close()
+        self.wrapper.ensure_connection()
+        self.assertIsNot(self.wrapper.connection, raw)
+        self.assertTrue(self.wrapper.is_usable())
+
+    def test_open_transaction_rolled_back(self):
+        self.wrapper.ensure_connection()
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.wrapper.close()
+        self.wrapper.ensure_connection()
+        self.assertTrue(self.wrapper.get_autocommit())
+
+    def test_exhausted_pool_waits(self):
+        self.wrapper.ensure_connection()
+        pool = self.wrapper.get_pool()
+        busy = pool.getconn()
+        timer = threading.Timer(0.1, pool.putconn, (busy,))
+        timer.start()
+        self.addCleanup(timer.join)
+        # Третье соединение при двух в пуле ждёт, пока вернут второе.
+        other = DatabaseWrapper(self.wrapper.settings_dict,
+                                alias=connection.alias)
+        other.ensure_connection()
+        self.assertIs(other.connection, busy)
+        other.close()
+
+    def test_exhausted_pool_timeout(self):
+        self.wrapper.ensure_connection()
+        pool = self.wrapper.get_pool()
+        busy = pool.getconn()
+        self.addCleanup(pool.putconn, busy)
+        other = DatabaseWrapper(self.wrapper.settings_dict,
+                                alias=connection.alias)
+        with self.assertRaises(OperationalError):
+            other.ensure_connection()
+
+    def test_replacement_checked(self):
+        with mock.patch('api_yamdb.db.base.is_alive',
+                        side_effect=[False, False, True]) as is_alive:
+            self.wrapper.ensure_connection()
+        self.assertEqual(is_alive.call_count, 3)
@@ -0,0 +1,60 @@
+import json
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from reviews.models import ADMIN_ROLE, Category, Genre, Title, User
+
+from .utils import QueryCountMixin
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+class InstrumentationTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        for i in range(3):
+            Title.objects.create(
+                name=f'Произведение {i}', year=2000, category=category
+            ).genre.set([genre])
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+
+    def test_server_timing_and_log(self):
+        with override_settings(INSTRUMENTATION_PUBLIC_TIMING=True):
+            with self.assertLogs('api.instrumentation', 'INFO') as logs:
+                response = self.assert_endpoint_queries(
+                    '/api/v1/titles/', 4)
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="4 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'TitleViewSet.list')
+        self.assertEqual(record['db_queries'], 4)
+        self.assertEqual(record['response_bytes'], len(response.content))
+        self.assertGreater(record['serializer_ms'], 0)
+
+    def test_serializer_time_on_retrieve(self):
+        title = Title.objects.first()
+        with self.assertLogs('api.instrumentation', 'INFO') as logs:
+            self.client.get(f'/api/v1/titles/{title.pk}/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'TitleViewSet.retrieve')
+        self.assertGreater(record['serializer_ms'], 0)
+
+    def test_server_timing_only_for_admin(self):
+        with self.assertLogs('api.instrumentation', 'INFO'):
+            response = self.client.get('/api/v1/titles/')
+        self.assertNotIn('Server-Timing', response)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/v1/titles/')
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0,
+                       INSTRUMENTATION_PUBLIC_TIMING=True)
+    def test_not_sampled(self):
+        response = self.client.get('/api/v1/titles/')
+        self.assertNotIn('Server-Timing', response)
@@ -0,0 +1,89 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from reviews.leaderboard import WEIGHTING_NONE, refresh_leaderboard
+from reviews.models import Category, Genre, Review, Title, User
+
+
+class LeaderboardEndpointTest(TestCase):
+    url = '/api/v1/leaderboard/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        cls.titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000,
+                                 category=cls.category if i < 2 else None)
+            for i in range(5)
+        ]
+        cls.titles[4].genre.set([cls.genre])
+        user = User.objects.create(username='user', email='user@ya.ru')
+        for score, title in enumerate(cls.titles, 1):
+            Review.objects.create(title=title, author=user, text='Текст',
+                                  score=score)
+        refresh_leaderboard(WEIGHTING_NONE)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_ids(self, response):
+        return [entry['title']['id'] for entry in response.data['results']]
+
+    def test_pages(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'count': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[4].pk, self.titles[3].pk])
+        self.assertEqual(response.data['results'][0]['position'], 1)
+        self.assertEqual(response.data['results'][0]['score'], 5)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[2].pk, self.titles[1].pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.get_ids(response), [self.titles[0].pk])
+        self.assertIsNone(response.data['next'])
+        self.assertIn('page=2', response.data['previous'])
+
+    def test_pages_after_title_delete(self):
+        self.titles[3].delete()
+        response = self.client.get(self.url, {'count': 2})
+        self.assertEqual(response.data['count'], 4)
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[4].pk, self.titles[2].pk])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[1].pk, self.titles[0].pk])
+        self.assertIsNone(response.data['next'])
+        Title.objects.filter(pk__in=[self.titles[4].pk,
+                                     self.titles[0].pk]).delete()
+        response = self.client.get(self.url, {'count': 2})
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[2].pk, self.titles[1].pk])
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(self.url, {'category': 'movie'})
+        self.assertEqual(response.data['results'][0]['position'], 1)
+
+    def test_groups(self):
+        response = self.client.get(self.url, {'category': 'movie'})
+        self.assertEqual(self.get_ids(response),
+                         [self.titles[1].pk, self.titles[0].pk])
+        response = self.client.get(self.url, {'genre': 'drama'})
+        self.assertEqual(self.get_ids(response), [self.titles[4].pk])
+        response = self.client.get(self.url, {'genre': 'comedy'})
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(response.data['results'], [])
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(
+            self.url, {'category': 'movie', 'genre': 'drama'}
+        ).status_code, 400)
+        self.assertEqual(self.client.get(
+            self.url, {'genre': 'unknown'}).status_code, 404)
+        for page in ('0', '3', 'last'):
+            self.assertEqual(self.client.get(
+                self.url, {'page': page}).status_code, 404, page)
@@ -0,0 +1,51 @@
+from django.test import TestCase
+from prometheus_client import REGISTRY
+from reviews.models import Title
+
+from .utils import QueryCountMixin
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+
+    def test_request_and_cache_metrics(self):
+        route = {'route': 'TitleViewSet.retrieve'}
+        requests = sample('yamdb_http_request_duration_seconds_count',
+                          method='GET', status='200', **route)
+        queries = sample('yamdb_db_queries_per_request_sum', **route)
+        hits = sample('yamdb_api_cache_requests_total',
+                      namespace='titles', result='hit')
+        url = f'/api/v1/titles/{self.title.pk}/'
+        self.assert_endpoint_queries(url, 3)
+        self.assert_endpoint_queries(url, 0)
+        self.assertEqual(
+            sample('yamdb_http_request_duration_seconds_count',
+                   method='GET', status='200', **route),
+            requests + 2
+        )
+        self.assertEqual(
+            sample('yamdb_db_queries_per_request_sum', **route),
+            queries + 3
+        )
+        self.assertEqual(
+            sample('yamdb_api_cache_requests_total',
+                   namespace='titles', result='hit'),
+            hits + 1
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/v1/genres/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'yamdb_http_request_duration_seconds_bucket{'
+            'le="0.005",method="GET",route="GenreViewSet.list"',
+            response.content.decode()
+        )
@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Review, Title, User
+
+from .utils import QueryCountMixin
+
+REVIEWS_COUNT = 7
+
+
+def explain(sql: str) -> str:
+    """План запроса; на PostgreSQL - с индексами, если они подходят."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # На нескольких строках планировщик выбрал бы чтение таблицы
+            # и сортировку, даже если индекс даёт нужный порядок.
+            for option in ('seqscan', 'bitmapscan', 'sort'):
+                cursor.execute(f'SET LOCAL enable_{option} = off')
+            cursor.execute(f'EXPLAIN {sql}')
+        else:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return '\n'.join(str(row) for row in cursor.fetchall())
+
+
+class CursorPaginationTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=category)
+        for i in range(REVIEWS_COUNT):
+            user = User.objects.create(
+                username=f'user{i}', email=f'u{i}@ya.ru')
+            Review.objects.create(
+                title=cls.title, author=user, text=f'Отзыв {i}', score=5)
+        cls.url = f'/api/v1/titles/{cls.title.pk}/reviews/'
+
+    def test_page_mode_is_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], REVIEWS_COUNT)
+
+    def test_cursor_mode_walks_all_reviews(self):
+        # произведение, ETag и страница отзывов, без COUNT(*).
+        response = self.assert_endpoint_queries(
+            self.url, 3, pagination='cursor', count=3)
+        self.assertNotIn('count', response.data)
+        ids = [review['id'] for review in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids.extend(review['id'] for review in response.data['results'])
+        self.assertEqual(
+            ids,
+            list(self.title.reviews.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        )
+
+    def get_page_sql(self, url, table, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'pagination': 'cursor',
+                                             'count': 3, **params})
+        return response, next(
+            query['sql'] for query in context.captured_queries
+            if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+        )
+
+    def assert_uses_index(self, sql, index):
+        plan = explain(sql)
+        self.assertIn(index, plan)
+        # Строки идут в порядке индекса, без сортировки.
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_cursor_pages_use_composite_index(self):
+        response, sql = self.get_page_sql(self.url, 'reviews_review')
+        self.assert_uses_index(sql, 'review_title_pub_date_idx')
+        cursor = response.data['next'].split('cursor=')[1].split('&')[0]
+        _, sql = self.get_page_sql(self.url, 'reviews_review',
+                                   cursor=cursor)
+        self.assert_uses_index(sql, 'review_title_pub_date_idx')
+        review = self.title.reviews.first()
+        Comment.objects.create(review=review, author=review.author,
+                               text='Комментарий')
+        _, sql = self.get_page_sql(f'{self.url}{review.pk}/comments/',
+                                   'reviews_comment')
+        self.assert_uses_index(sql, 'comment_review_pub_date_idx')
@@ -0,0 +1,51 @@
+from django.test import TestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .utils import QueryCountMixin
+
+TITLES_COUNT = 10
+
+
+class QueryCountTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(TITLES_COUNT)
+        ]
+        for i in range(TITLES_COUNT):
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000, category=category)
+            title.genre.set(genres)
+        cls.title = title
+        cls.review = Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=5)
+        for i, user in enumerate(users[1:]):
+            Review.objects.create(
+                title=title, author=user, text=f'Отзыв {i}', score=5)
+            Comment.objects.create(
+                review=cls.review, author=user, text=f'Комментарий {i}')
+
+    def test_titles(self):
+        # ETag, count, страница произведений, жанры страницы.
+        self.assert_endpoint_queries(
+            '/api/v1/titles/', 4, count=TITLES_COUNT)
+        self.assert_endpoint_queries(f'/api/v1/titles/{self.title.pk}/', 3)
+
+    def test_reviews(self):
+        # произведение, ETag, count, страница отзывов с авторами.
+        self.assert_endpoint_queries(
+            f'/api/v1/titles/{self.title.pk}/reviews/', 4,
+            count=TITLES_COUNT)
+
+    def test_comments(self):
+        # отзыв, ETag, count, страница комментариев с авторами.
+        self.assert_endpoint_queries(
+            f'/api/v1/titles/{self.title.pk}/reviews/{self.review.pk}'
+            '/comments/', 4, count=TITLES_COUNT)
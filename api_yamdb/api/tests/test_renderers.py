@@ -0,0 +1,93 @@
+import datetime as dt
+import json
+from decimal import Decimal
+
+import msgpack
+from api.authentication import get_access_token
+from api.renderers import MessagePackRenderer, ORJSONRenderer
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from reviews.models import ADMIN_ROLE, Category, Genre, Title, User
+
+MSGPACK = 'application/msgpack'
+
+
+class RenderersTest(SimpleTestCase):
+    data = {
+        'name': 'Сталкер ',
+        'rating': Decimal('7.5'),
+        'created': dt.datetime(2022, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        'detail': gettext_lazy('Not found.'),
+        'genre': [{'slug': 'drama'}, {'slug': 'sci-fi'}],
+        'scores': {1: 0, 10: 2},
+    }
+
+    def test_orjson_matches_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data),
+                         JSONRenderer().render(self.data))
+
+    def test_indent_falls_back(self):
+        content = ORJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4')
+        self.assertEqual(content, b'{\n    "a": 1\n}')
+
+    def test_msgpack(self):
+        data = msgpack.unpackb(MessagePackRenderer().render(self.data),
+                               strict_map_key=False)
+        self.assertEqual(data['name'], self.data['name'])
+        self.assertEqual(data['rating'], 7.5)
+        self.assertEqual(data['created'], '2022-01-02T03:04:05Z')
+        self.assertEqual(data['scores'], {1: 0, 10: 2})
+
+
+class NegotiationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        Title.objects.create(name='Сталкер', year=1979, category=category)
+        cls.admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_formats_share_data_not_cache(self):
+        as_json = self.client.get('/api/v1/titles/')
+        as_msgpack = self.client.get('/api/v1/titles/',
+                                     HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(as_json['Content-Type'], 'application/json')
+        self.assertEqual(as_msgpack['Content-Type'], MSGPACK)
+        self.assertEqual(as_msgpack['X-Cache'], 'MISS')
+        self.assertNotEqual(as_json['ETag'], as_msgpack['ETag'])
+        self.assertIn('Accept', as_msgpack['Vary'])
+        self.assertEqual(msgpack.unpackb(as_msgpack.content),
+                         json.loads(as_json.content))
+        cached = self.client.get('/api/v1/titles/', HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached['ETag'], as_msgpack['ETag'])
+        self.assertEqual(cached.content, as_msgpack.content)
+
+    def test_parsers(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_access_token(self.admin)}')
+        response = self.client.post(
+            '/api/v1/genres/', msgpack.packb({'name': 'Комедия',
+                                              'slug': 'comedy'}),
+            content_type=MSGPACK)
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(
+            '/api/v1/genres/', '{"name": "Ужасы", "slug": "horror"}',
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        for body, content_type in ((b'\xc1', MSGPACK),
+                                   ('{"name"', 'application/json')):
+            response = self.client.post('/api/v1/genres/', body,
+                                        content_type=content_type)
+            self.assertEqual(response.status_code, 400, content_type)
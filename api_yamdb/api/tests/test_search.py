@@ -0,0 +1,65 @@
+from django.test import TestCase
+from reviews.models import Title
+from reviews.search import InvertedIndex, get_fallback_index
+
+from .utils import QueryCountMixin
+
+
+class InvertedIndexTest(TestCase):
+
+    def test_prefix_and_all_words(self):
+        index = InvertedIndex([
+            (1, 'Война и мир', 'Роман Толстого'),
+            (2, 'Мир', None),
+            (3, 'Анна Каренина', 'Роман о войне'),
+        ])
+        self.assertEqual(index.search('войн мир'), [1])
+        self.assertEqual(index.search('роман'), [1, 3])
+        self.assertEqual(index.search('опера'), [])
+
+    def test_name_outranks_description(self):
+        index = InvertedIndex([
+            (1, 'Песня', 'Про море'),
+            (2, 'Море', 'Песня'),
+        ])
+        self.assertEqual(index.search('море'), [2, 1])
+
+
+class TitleSearchTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.war = Title.objects.create(
+            name='Война и мир', year=1869, description='Роман')
+        cls.river = Title.objects.create(
+            name='Тихий Дон', year=1940, description='Роман о войне')
+        Title.objects.create(name='Ревизор', year=1836)
+
+    def search(self, query):
+        response = self.client.get('/api/v1/titles/', {'search': query})
+        return [title['id'] for title in response.data['results']]
+
+    def test_ranked_results(self):
+        self.assertEqual(self.search('войн'), [self.war.pk, self.river.pk])
+        self.assertEqual(self.search('роман дон'), [self.river.pk])
+        self.assertEqual(self.search('балет'), [])
+
+    def test_prefix_and_all_words(self):
+        self.assertEqual(self.search('тих до'), [self.river.pk])
+        self.assertEqual(self.search('ихий'), [])
+        self.assertEqual(self.search('!&|'), [])
+
+    def test_index_follows_changes(self):
+        self.assertEqual(self.search('балет'), [])
+        ballet = Title.objects.create(name='Балет', year=2000)
+        self.assertEqual(self.search('балет'), [ballet.pk])
+        ballet.name = 'Опера'
+        ballet.save()
+        self.assertEqual(self.search('балет'), [])
+        self.assertEqual(self.search('опер'), [ballet.pk])
+
+    def test_rating_change_keeps_index(self):
+        self.search('войн')
+        index = get_fallback_index(Title)
+        Title.objects.filter(pk=self.war.pk).update_rating(10, 1)
+        self.assertIs(get_fallback_index(Title), index)
@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Review, Title, User
+
+from .utils import QueryCountMixin
+
+TITLES_URL = '/api/v1/titles/'
+
+
+class SparseFieldsTest(QueryCountMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=category,
+            description='Очень длинное описание')
+        cls.title.genre.set([genre])
+        user = User.objects.create(username='user', email='user@ya.ru')
+        Review.objects.create(
+            title=cls.title, author=user, text='Отзыв', score=5)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, ' '.join(
+            query['sql'] for query in context.captured_queries)
+
+    def test_fields_skip_columns_and_relations(self):
+        # ETag, count и страница без запроса жанров.
+        response = self.assert_endpoint_queries(
+            TITLES_URL, 3, fields='id,name,rating')
+        self.assertEqual(list(response.data['results'][0]),
+                         ['id', 'name', 'rating'])
+        response, sql = self.get(TITLES_URL, fields='id,name')
+        self.assertNotIn('description', sql)
+        self.assertNotIn('reviews_category', sql)
+
+    def test_compact_relations(self):
+        response, _ = self.get(TITLES_URL, fields='id,genre,category')
+        self.assertEqual(response.data['results'][0],
+                         {'id': self.title.pk, 'genre': ['drama'],
+                          'category': 'movie'})
+        response, _ = self.get(TITLES_URL, expand='genre')
+        result = response.data['results'][0]
+        self.assertEqual(result['category'], 'movie')
+        self.assertEqual(result['genre'],
+                         [{'name': 'Драма', 'slug': 'drama'}])
+        self.assertEqual(result['description'], 'Очень длинное описание')
+
+    def test_retrieve_and_reviews(self):
+        response, _ = self.get(f'{TITLES_URL}{self.title.pk}/',
+                               fields='name', expand='category')
+        self.assertEqual(response.data, {'name': 'Произведение'})
+        response, sql = self.get(f'{TITLES_URL}{self.title.pk}/reviews/',
+                                 fields='id,author,score')
+        self.assertEqual(response.data['results'][0]['author'], 'user')
+        self.assertNotIn('"text"', sql)
+
+    def test_unknown_fields(self):
+        for params in ({'fields': 'id,secret'}, {'expand': 'name'}):
+            response = self.client.get(TITLES_URL, params)
+            self.assertEqual(response.status_code, 400, params)
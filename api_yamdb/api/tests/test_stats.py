@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+
+class StatsEndpointsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.genre = Genre.objects.create(name='Драма', slug='drama')
+        cls.titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000,
+                                 category=cls.category)
+            for i in range(3)
+        ]
+        for title in cls.titles:
+            title.genre.set([cls.genre])
+        users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(2)
+        ]
+        for title, scores in zip(cls.titles, ((10, 8), (3,), ())):
+            for user, score in zip(users, scores):
+                Review.objects.create(title=title, author=user,
+                                      text='Текст', score=score)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_title_stats(self):
+        response = self.client.get(
+            f'/api/v1/titles/{self.titles[0].pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['reviews_count'], 2)
+        self.assertEqual(response.data['rating'], 9)
+        self.assertEqual(len(response.data['scores']), 10)
+        self.assertEqual(response.data['scores']['10'], 1)
+        self.assertEqual(response.data['scores']['1'], 0)
+
+    def test_group_top(self):
+        for url in ('/api/v1/categories/movie/top/',
+                    '/api/v1/genres/drama/top/'):
+            response = self.client.get(url, {'limit': 1})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['reviews_count'], 3)
+            self.assertEqual(response.data['rating'], 7)
+            self.assertEqual(
+                [title['id'] for title in response.data['titles']],
+                [self.titles[0].pk])
+
+    def test_top_validation(self):
+        self.assertEqual(self.client.get(
+            '/api/v1/categories/movie/top/', {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get(
+            '/api/v1/categories/unknown/top/').status_code, 404)
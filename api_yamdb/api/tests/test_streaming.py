@@ -0,0 +1,232 @@
+import gzip
+import json
+from unittest import mock
+
+import brotli
+from api.compression import (choose_encoding, compress_brotli_sequence,
+                             compress_gzip_sequence)
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from reviews.models import Category, Genre, Review, Title, User
+
+URL = '/api/v1/titles/'
+
+
+def get_content(response) -> bytes:
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class ChooseEncodingTest(SimpleTestCase):
+
+    def test_choose_encoding(self):
+        cases = (
+            ('', None),
+            ('identity', None),
+            ('gzip', 'gzip'),
+            ('gzip, deflate, br', 'br'),
+            ('br;q=0.5, gzip', 'gzip'),
+            ('br;q=0, gzip;q=0', None),
+            ('*', 'br'),
+            ('*;q=0.1, gzip;q=0', 'br'),
+            ('BR', 'br'),
+        )
+        for header, encoding in cases:
+            with self.subTest(header=header):
+                self.assertEqual(choose_encoding(header), encoding)
+
+
+class CompressSequenceTest(SimpleTestCase):
+
+    def test_each_chunk_flushed(self):
+        chunks = [json.dumps([{'id': i * 100 + j, 'name': f'Фильм {j}'}
+                              for j in range(100)]).encode()
+                  for i in range(10)]
+        cases = (
+            (compress_gzip_sequence(chunks), gzip.decompress),
+            (compress_brotli_sequence(chunks, 5), brotli.decompress),
+        )
+        for output, decompress in cases:
+            with self.subTest(decompress=decompress):
+                parts = list(output)
+                # Часть на каждую порцию и завершение потока.
+                self.assertEqual(len(parts), len(chunks) + 1)
+                self.assertTrue(all(parts[:-1]))
+                self.assertEqual(decompress(b''.join(parts)),
+                                 b''.join(chunks))
+
+
+class StreamingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+                  for i in range(2)]
+        for i in range(7):
+            title = Title.objects.create(
+                name=f'Фильм {i}', year=2000 + i, category=category)
+            title.genre.set(genres)
+        cls.title = title
+        for i in range(3):
+            author = User.objects.create(username=f'author{i}',
+                                         email=f'author{i}@ya.ru')
+            Review.objects.create(title=title, author=author,
+                                  text=f'Отзыв {i}', score=7)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get(self, url, stream_page_size, **extra):
+        cache.clear()
+        with override_settings(API_STREAM_PAGE_SIZE=stream_page_size):
+            return self.client.get(url, **extra)
+
+    def test_streamed_page_matches_regular(self):
+        urls = (
+            f'{URL}?count=5',
+            f'{URL}?count=5&page=2',
+            f'{URL}?count=5&genre=genre-0',
+            f'{URL}{self.title.pk}/reviews/?count=3',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                regular = self.get(url, 0)
+                streamed = self.get(url, 2)
+                self.assertFalse(regular.streaming)
+                self.assertTrue(streamed.streaming)
+                self.assertEqual(streamed['Content-Type'],
+                                 'application/json')
+                self.assertEqual(json.loads(get_content(streamed)),
+                                 json.loads(regular.content))
+
+    def test_small_page_and_other_formats_not_streamed(self):
+        cases = (
+            (f'{URL}?count=1', {}),
+            (f'{URL}?count=5', {'HTTP_ACCEPT': 'application/msgpack'}),
+            (f'{URL}?count=5&cursor=', {}),
+        )
+        for url, extra in cases:
+            with self.subTest(url=url, extra=extra):
+                self.assertFalse(self.get(url, 2, **extra).streaming)
+
+    def test_streamed_response_not_cached(self):
+        self.get(f'{URL}?count=5', 2)
+        with override_settings(API_STREAM_PAGE_SIZE=2):
+            response = self.client.get(f'{URL}?count=5')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_queries_per_chunk(self):
+        with override_settings(API_STREAM_PAGE_SIZE=2):
+            with CaptureQueriesContext(connection) as small:
+                get_content(self.client.get(f'{URL}?count=2'))
+            cache.clear()
+            with CaptureQueriesContext(connection) as large:
+                get_content(self.client.get(f'{URL}?count=7'))
+        # Строки и жанры одной порции - два запроса.
+        self.assertEqual(len(large), len(small))
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_stream_measured_when_read(self):
+        with self.assertLogs('api.instrumentation', 'INFO') as logs:
+            response = self.get(f'{URL}?count=7', 2)
+            self.assertFalse(response.has_header('Server-Timing'))
+            content = get_content(response)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'TitleViewSet.list')
+        self.assertEqual(record['response_bytes'], len(content))
+        # Счётчик страницы, строки и жанры, проверка ETag.
+        self.assertGreaterEqual(record['db_queries'], 3)
+        self.assertGreater(record['serializer_ms'], 0)
+
+    def test_error_before_first_chunk(self):
+        def chunks(queryset, size):
+            raise DatabaseError('connection lost')
+            yield
+
+        with mock.patch('api.mixins.iterate_chunks', chunks):
+            # Ошибка в представлении, до отправки заголовков.
+            with self.assertRaises(DatabaseError):
+                self.get(f'{URL}?count=5', 2)
+
+    def test_error_mid_stream(self):
+        def chunks(queryset, size):
+            yield list(queryset[:1])
+            raise DatabaseError('connection lost')
+
+        with mock.patch('api.mixins.iterate_chunks', chunks):
+            response = self.get(f'{URL}?count=5', 2)
+            with self.assertLogs('api.mixins', 'ERROR'):
+                with self.assertRaises(DatabaseError):
+                    get_content(response)
+
+    def test_streamed_response_compressed(self):
+        regular = self.get(f'{URL}?count=7', 0)
+        for encoding, decompress in (('gzip', gzip.decompress),
+                                     ('br', brotli.decompress)):
+            with self.subTest(encoding=encoding):
+                response = self.get(f'{URL}?count=7', 2,
+                                    HTTP_ACCEPT_ENCODING=encoding)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertFalse(response.has_header('Content-Length'))
+                self.assertEqual(
+                    json.loads(decompress(get_content(response))),
+                    json.loads(regular.content))
+
+
+class CompressionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.bulk_create(
+            Title(name=f'Фильм {i}', year=2000, category=category)
+            for i in range(10)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_negotiation(self):
+        plain = self.client.get(URL)
+        cases = (
+            ('gzip', gzip.decompress),
+            ('gzip;q=0.5, br', brotli.decompress),
+        )
+        for header, decompress in cases:
+            with self.subTest(header=header):
+                response = self.client.get(
+                    URL, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(decompress(response.content),
+                                 plain.content)
+                self.assertEqual(response['Content-Length'],
+                                 str(len(response.content)))
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(response['ETag'], f'W/{plain["ETag"]}')
+
+    def test_identity(self):
+        response = self.client.get(
+            URL, HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response.status_code, 200)
+        json.loads(response.content)
+
+    def test_conditional_request_with_weak_etag(self):
+        response = self.client.get(URL, HTTP_ACCEPT_ENCODING='br')
+        not_modified = self.client.get(
+            URL, HTTP_ACCEPT_ENCODING='br',
+            HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_short_response_not_compressed(self):
+        response = self.client.get(f'{URL}?name=nothing',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from api.throttling import CacheBucketStore, LocalBucketStore, get_store
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from reviews.models import ADMIN_ROLE, User
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+class BucketStoreTest(TestCase):
+
+    def check_store(self, store):
+        with mock.patch('time.time', return_value=1000):
+            self.assertEqual(store.consume('key', 2, 1), 0)
+            self.assertEqual(store.consume('key', 2, 1), 0)
+            self.assertAlmostEqual(store.consume('key', 2, 1), 1)
+            self.assertEqual(store.consume('other', 2, 1), 0)
+        with mock.patch('time.time', return_value=1001.5):
+            self.assertEqual(store.consume('key', 2, 1), 0)
+            self.assertAlmostEqual(store.consume('key', 2, 1), 0.5)
+
+    def test_local_store(self):
+        self.check_store(LocalBucketStore())
+
+    def test_cache_store(self):
+        cache.clear()
+        self.check_store(CacheBucketStore())
+
+    def test_local_store_prunes_full_buckets(self):
+        store = LocalBucketStore()
+        with mock.patch('time.time', return_value=1000):
+            store.consume('a', 5, 1)
+            store.consume('b', 5, 2)
+        with mock.patch('time.time', return_value=1000.5):
+            store.consume('a', 5, 1)
+            store.consume('c', 5, 1)
+        # b заполнилась за 0,5 с, а заполнение a отложил второй запрос.
+        self.assertEqual(sorted(store.buckets), ['a', 'c'])
+        with mock.patch('time.time', return_value=1002):
+            store.consume('c', 5, 1)
+        self.assertEqual(list(store.buckets), ['c'])
+        self.assertEqual(len(store.expiry), 1)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    THROTTLE_RATES={'signup_ip': '2/h', 'token_ip': '100/m',
+                    'token_username': '3/m', 'write': '1/m'}
+)
+class AuthThrottleTest(TestCase):
+
+    def setUp(self):
+        get_store().clear()
+
+    def test_signup_limited_by_ip(self):
+        client = APIClient()
+        for i in range(2):
+            response = client.post(SIGNUP_URL, {
+                'username': f'user{i}', 'email': f'user{i}@ya.ru'})
+            self.assertEqual(response.status_code, 200)
+        response = client.post(SIGNUP_URL, {
+            'username': 'user3', 'email': 'user3@ya.ru'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        response = client.post(
+            SIGNUP_URL, {'username': 'user3', 'email': 'user3@ya.ru'},
+            REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_limited_by_username_without_writes(self):
+        User.objects.create(username='victim', email='victim@ya.ru')
+        for i in range(3):
+            response = APIClient().post(
+                TOKEN_URL,
+                {'username': 'victim', 'confirmation_code': '000001'},
+                REMOTE_ADDR=f'10.0.0.{i}')
+            self.assertEqual(response.status_code, 400)
+        with self.assertNumQueries(0):
+            response = APIClient().post(
+                TOKEN_URL,
+                {'username': 'Victim', 'confirmation_code': '000001'},
+                REMOTE_ADDR='10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+
+    def test_write_limit_skips_reads(self):
+        admin = User.objects.create(
+            username='admin', email='admin@ya.ru', role=ADMIN_ROLE)
+        client = APIClient()
+        client.force_authenticate(admin)
+        for slug in ('first', 'second'):
+            response = client.post('/api/v1/genres/', {
+                'name': slug, 'slug': slug})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(client.get('/api/v1/genres/').status_code, 200)
@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+
+class QueryCountMixin:
+    """Проверка числа запросов к БД на один вызов endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        # Ответы из кэша не доходят до БД.
+        cache.clear()
+
+    def assert_endpoint_queries(self, url, expected, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        queries = '\n'.join(
+            query['sql'] for query in context.captured_queries)
+        self.assertEqual(
+            len(context), expected,
+            f'{url}: {len(context)} запросов вместо {expected}:\n{queries}'
+        )
+        return response
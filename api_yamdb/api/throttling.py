@@ -0,0 +1,177 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+В корзине помещается столько запросов, сколько указано в лимите
+"число/период", и она равномерно пополняется за период. Корзины
+хранятся в памяти процесса (LocalBucketStore) или в общем кэше
+(CacheBucketStore), который нужен при нескольких воркерах; хранилище
+выбирается настройкой THROTTLE_STORE.
+"""
+import heapq
+import math
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Ёмкость корзины и скорость пополнения в запросах в секунду."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def refill(state, capacity: int, rate: float, now: float) -> float:
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+class LocalBucketStore:
+    """Корзины в памяти процесса.
+
+    Заполнившаяся корзина не отличается от новой и удаляется: куча
+    упорядочивает корзины по времени заполнения, и каждый запрос
+    удаляет только те, чьё время наступило.
+    """
+
+    def __init__(self):
+        # Ключ: (токены, время обновления, время заполнения).
+        self.buckets = {}
+        # (время заполнения, ключ); после нового запроса прежняя
+        # запись корзины устаревает и пропускается.
+        self.expiry = []
+        self.lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        """Забирает запрос из корзины.
+
+        Возвращает 0, если запрос разрешён, иначе сколько секунд ждать.
+        """
+        now = time.time()
+        with self.lock:
+            self.prune(now)
+            state = self.buckets.get(key)
+            tokens = refill(state and state[:2], capacity, rate, now)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            full_at = now + (capacity - tokens + 1) / rate
+            self.buckets[key] = (tokens - 1, now, full_at)
+            heapq.heappush(self.expiry, (full_at, key))
+        return 0
+
+    def prune(self, now: float) -> None:
+        """Удаляет корзины, заполнившиеся к моменту now."""
+        while self.expiry and self.expiry[0][0] <= now:
+            full_at, key = heapq.heappop(self.expiry)
+            state = self.buckets.get(key)
+            if state is not None and state[2] == full_at:
+                del self.buckets[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.buckets.clear()
+            self.expiry.clear()
+
+
+class CacheBucketStore:
+    """Корзины в кэше THROTTLE_CACHE_ALIAS, общие для всех воркеров.
+
+    Чтение и запись не атомарны: одновременные запросы с одним ключом
+    могут пропустить лишний запрос, что для ограничения частоты
+    допустимо (так же работают троттлы DRF).
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        now = time.time()
+        tokens = refill(self.cache.get(key), capacity, rate, now)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        # Запись не нужна после того, как корзина снова заполнится.
+        timeout = math.ceil((capacity - tokens + 1) / rate)
+        self.cache.set(key, (tokens - 1, now), timeout)
+        return 0
+
+
+@lru_cache(maxsize=None)
+def _load_store(path: str):
+    return import_string(path)()
+
+
+def get_store():
+    return _load_store(settings.THROTTLE_STORE)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Лимит из THROTTLE_RATES[scope] на ключ из get_key.
+
+    Пустой лимит или ключ None отключают проверку.
+    """
+    scope = None
+
+    def get_key(self, request, view) -> Optional[str]:
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.delay = 0
+        rate = settings.THROTTLE_RATES.get(self.scope)
+        if not rate:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        capacity, per_second = parse_rate(rate)
+        self.delay = get_store().consume(
+            f'throttle:{self.scope}:{key}', capacity, per_second)
+        if self.delay:
+            metrics.THROTTLED_REQUESTS.labels(self.scope).inc()
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class SignupIPThrottle(TokenBucketThrottle):
+    scope = 'signup_ip'
+
+
+class TokenIPThrottle(TokenBucketThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(TokenBucketThrottle):
+    """Подбор кода к одному пользователю с разных адресов."""
+    scope = 'token_username'
+
+    def get_key(self, request, view):
+        data = request.data
+        username = data.get('username') if hasattr(data, 'get') else None
+        if not isinstance(username, str) or not username:
+            return None
+        return username.lower()
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Изменяющие запросы пользователя или адреса."""
+    scope = 'write'
+
+    def get_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
@@ -28,6 +28,10 @@ router_v1.register(
     r'genres',
     views.GenreViewSet,
     basename='genres')
+router_v1.register(
+    r'leaderboard',
+    views.LeaderboardViewSet,
+    basename='leaderboard')
 
 auth_urls = [
     path('auth/signup/', views.RegistrationAPIView.as_view(),
@@ -37,5 +41,7 @@ auth_urls = [
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
-    path('v1/', include(auth_urls))
+    path('v1/', include(auth_urls)),
+    path('v1/cache/stats/', views.CacheStatsView.as_view(),
+         name='cache-stats')
 ]
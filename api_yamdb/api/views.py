@@ -1,24 +1,32 @@
 from random import randint
 
 from django.conf import settings
-from django.core.mail import send_mail
 from django.db import IntegrityError
-from django.db.models import Avg
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import IntegerField
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import (END_RANGE_CONFIRMATION_CODE,
+from reviews.models import (END_RANGE_CONFIRMATION_CODE, LEADERBOARD_ALL,
+                            LEADERBOARD_CATEGORY, LEADERBOARD_GENRE,
                             NOT_PIN_CONFIRMATION_CODE,
-                            START_RANGE_CONFIRMATION_CODE, Category, Genre,
+                            START_RANGE_CONFIRMATION_CODE, Category,
+                            CategoryStats, Genre, GenreStats, LeaderboardEntry,
                             Review, Title, User)
+from reviews.outbox import enqueue_mail
+from reviews.stats import (MAX_TOP_TITLES_LIMIT, TOP_TITLES_LIMIT,
+                           get_top_titles)
 
-from . import paginators, permissions, serializers
+from . import cache, paginators, permissions, serializers, throttling
+from .authentication import get_access_token, get_author, get_db_user
+from .conditional import conditional_response
 from .filters import TitleFilter
+from .mixins import (BulkWriteMixin, ReadQuerysetMixin, SerializerTimingMixin,
+                     StreamingListMixin)
 
 
 def set_confirmation_code(user):
@@ -27,76 +35,162 @@ def set_confirmation_code(user):
     user.save()
 
 
-class BaseGenreCategoryViewSet(mixins.ListModelMixin,
+class BaseGenreCategoryViewSet(BulkWriteMixin,
+                               SerializerTimingMixin,
+                               mixins.ListModelMixin,
                                mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     permission_classes = (permissions.OnlyAdminOrRead,)
     lookup_field = 'slug'
+    bulk_lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=name',)
     pagination_class = paginators.StandardResultsSetPagination
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    @cache.cached_response
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=True, url_path='top')
+    def top(self, request, slug=None):
+        """Статистика группы и произведения с наибольшим рейтингом."""
+        limit = IntegerField(
+            min_value=1, max_value=MAX_TOP_TITLES_LIMIT
+        ).run_validation(request.query_params.get('limit', TOP_TITLES_LIMIT))
+        group = self.get_object()
+        group_stats = (self.stats_model.objects.filter(pk=group.pk).first()
+                       or self.stats_model())
+        serializer = serializers.GroupTopSerializer({
+            'group': group,
+            'stats': group_stats,
+            'titles': get_top_titles(group, limit),
+        })
+        return Response(serializer.data)
+
+
+class ReviewViewSet(StreamingListMixin, ReadQuerysetMixin,
+                    viewsets.ModelViewSet):
     """Endpoint модели Review."""
     serializer_class = serializers.ReviewSerializer
     permission_classes = (
         permissions.OnlyContributionAdminModeratorOrRead,)
-    pagination_class = paginators.StandardResultsSetPagination
+    pagination_class = paginators.PageOrCursorPagination
+    # Как Meta.ordering и составной индекс (родитель, -pub_date, -id).
+    cursor_ordering = ('-pub_date', '-id')
+    read_select_related = ('author',)
 
     def get_title(self):
-        return get_object_or_404(
-            Title,
-            pk=self.kwargs.get('title_id')
-        )
+        # Произведение нужно и для ETag, и для самого ответа.
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title,
+                pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.plan_queryset(self.get_title().reviews.all())
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=get_author(self.request.user),
+                        title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(StreamingListMixin, ReadQuerysetMixin,
+                     viewsets.ModelViewSet):
     """Endpoint модели Comment."""
     serializer_class = serializers.CommentSerializer
     permission_classes = (
         permissions.OnlyContributionAdminModeratorOrRead,)
-    pagination_class = paginators.StandardResultsSetPagination
+    pagination_class = paginators.PageOrCursorPagination
+    # Как Meta.ordering и составной индекс (родитель, -pub_date, -id).
+    cursor_ordering = ('-pub_date', '-id')
+    read_select_related = ('author',)
 
     def get_review(self):
-        return get_object_or_404(Review,
-                                 pk=self.kwargs['review_id'],
-                                 title__pk=self.kwargs['title_id'])
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs['review_id'],
+                title__pk=self.kwargs['title_id']
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.plan_queryset(self.get_review().comments.all())
+
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=get_author(self.request.user),
+                        review=self.get_review())
 
 
 class CategoryViewSet(BaseGenreCategoryViewSet):
     """Endpoint модели Category."""
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    bulk_serializer_class = serializers.BulkCategorySerializer
+    cache_namespace = cache.CATEGORIES
+    stats_model = CategoryStats
 
 
 class GenreViewSet(BaseGenreCategoryViewSet):
     """Endpoint модели Genre."""
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
+    bulk_serializer_class = serializers.BulkGenreSerializer
+    cache_namespace = cache.GENRES
+    stats_model = GenreStats
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(BulkWriteMixin, StreamingListMixin, ReadQuerysetMixin,
+                   viewsets.ModelViewSet):
     """Endpoint модели Title."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.all()
+    bulk_serializer_class = serializers.BulkTitleSerializer
+    read_select_related = ('category',)
+    read_prefetch_related = ('genre',)
     permission_classes = (permissions.OnlyAdminOrRead,)
-    pagination_class = paginators.StandardResultsSetPagination
+    pagination_class = paginators.PageOrCursorPagination
+    cursor_ordering = 'pk'
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
-    ordering_fields = ('-rating', 'category', 'name', 'year')
+    ordering_fields = ('rating', 'category', 'name', 'year')
+    cache_namespace = cache.TITLES
+
+    @cache.cached_response
+    @conditional_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache.cached_response
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=True)
+    @cache.cached_response
+    def stats(self, request, pk=None):
+        """Распределение оценок произведения."""
+        return Response(serializers.TitleStatsSerializer(
+            self.get_object()).data)
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
@@ -104,8 +198,53 @@ class TitleViewSet(viewsets.ModelViewSet):
         return serializers.TitleCreateSerializer
 
 
+class LeaderboardViewSet(SerializerTimingMixin, mixins.ListModelMixin,
+                         viewsets.GenericViewSet):
+    """Рейтинг лучших произведений, пересчитывается refresh_leaderboard.
+
+    Общий, либо категории (?category=slug), либо жанра (?genre=slug).
+    """
+    serializer_class = serializers.LeaderboardEntrySerializer
+    permission_classes = (permissions.OnlyAdminOrRead,)
+    pagination_class = paginators.PositionPagination
+    group_models = {
+        LEADERBOARD_CATEGORY: Category,
+        LEADERBOARD_GENRE: Genre,
+    }
+
+    def get_board(self):
+        """Вид рейтинга и id категории или жанра."""
+        slugs = {
+            scope: self.request.query_params[scope]
+            for scope in self.group_models
+            if self.request.query_params.get(scope)
+        }
+        if len(slugs) > 1:
+            raise ValidationError('Укажите либо category, либо genre.')
+        if not slugs:
+            return LEADERBOARD_ALL, 0
+        scope, slug = slugs.popitem()
+        return scope, get_object_or_404(
+            self.group_models[scope], slug=slug).pk
+
+    def get_queryset(self):
+        scope, group_id = self.get_board()
+        return LeaderboardEntry.objects.filter(
+            scope=scope, group_id=group_id
+        ).select_related('title').order_by('position')
+
+
+class CacheStatsView(APIView):
+    """Счётчики кэша ответов для мониторинга."""
+    permission_classes = (permissions.OnlyAdmin,)
+
+    def get(self, request):
+        return Response(cache.get_stats(), status=status.HTTP_200_OK)
+
+
 class RegistrationAPIView(APIView):
     permission_classes = (AllowAny,)
+    throttle_classes = (throttling.SignupIPThrottle,)
     serializer_class = serializers.RegistrationSerializer
 
     def post(self, request):
@@ -122,7 +261,7 @@ class RegistrationAPIView(APIView):
             return Response('username or email already exists.',
                             status=status.HTTP_400_BAD_REQUEST)
         set_confirmation_code(user)
-        send_mail(
+        enqueue_mail(
             'Регистрация пользователя',
             f'Это ваш confirmation_code: {user.confirmation_code}',
             settings.RECIPIENTS_EMAIL,
@@ -132,6 +271,8 @@ class RegistrationAPIView(APIView):
 
 
 class JWTView(APIView):
+    throttle_classes = (throttling.TokenIPThrottle,
+                        throttling.TokenUsernameThrottle)
 
     def post(self, request):
         serializer = serializers.LoginSerializer(data=request.data)
@@ -144,8 +285,7 @@ class JWTView(APIView):
             user.confirmation_code = NOT_PIN_CONFIRMATION_CODE
             user.save()
             return Response(status=status.HTTP_400_BAD_REQUEST)
-        token = RefreshToken.for_user(user)
-        return Response({'token': str(token.access_token)},
+        return Response({'token': str(get_access_token(user))},
                         status=status.HTTP_200_OK)
 
 
@@ -165,7 +305,7 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def user_info(self, request):
-        user = request.user
+        user = get_db_user(request.user)
         if request.method == 'GET':
             return Response(
                 self.get_serializer(user).data,
@@ -3,14 +3,17 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 has no ASGI handler: the WSGI application runs in thread
+pools behind an event loop, see api/asgi.py.
 """
 
-import os
+from api.asgi import WsgiBridge
+from django.conf import settings
 
-from django.core.asgi import get_asgi_application
+from .wsgi import application as wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
-
-application = get_asgi_application()
+application = WsgiBridge(
+    wsgi_application,
+    threads=settings.ASGI_THREADS,
+    read_threads=settings.ASGI_READ_THREADS
+)
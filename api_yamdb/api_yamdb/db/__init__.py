@@ -0,0 +1,4 @@
+"""PostgreSQL с пулом соединений внутри процесса.
+
+Включается переменной окружения DB_POOL_MAX_CONNECTIONS, см. settings.
+"""
@@ -0,0 +1,120 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import pool as pools
+
+Database = base.Database
+
+POOL_OPTIONS = ('pool_min_size', 'pool_max_size', 'pool_timeout')
+
+
+def is_alive(connection) -> bool:
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        # Проверка не должна оставлять открытую транзакцию.
+        if not connection.autocommit:
+            connection.rollback()
+    except Database.Error:
+        return False
+    return True
+
+
+class BlockingConnectionPool(pools.ThreadedConnectionPool):
+    """Пул, в котором getconn ждёт освободившееся соединение.
+
+    ThreadedConnectionPool сразу бросает PoolError, если все
+    соединения заняты, и потоков больше, чем соединений, хватало бы
+    только до первой нагрузки.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise Database.OperationalError(
+                f'Нет свободного соединения в пуле за {self.timeout} с')
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self.slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Берёт соединения из пула и возвращает их туда вместо закрытия.
+
+    Пул свой у каждого процесса: соединения, открытые до fork,
+    воркеры не используют. Соединение возвращается в пул в конце
+    запроса, поэтому CONN_MAX_AGE должен быть 0.
+    """
+    pools = {}
+    pools_lock = threading.Lock()
+
+    def get_pool(self, conn_params=None):
+        key = (self.alias, os.getpid())
+        with self.pools_lock:
+            if key not in self.pools and conn_params is not None:
+                options = self.settings_dict['OPTIONS']
+                self.pools[key] = BlockingConnectionPool(
+                    options.get('pool_min_size', 1),
+                    options['pool_max_size'],
+                    options.get('pool_timeout', 30),
+                    **conn_params
+                )
+            return self.pools.get(key)
+
+    def close_pool(self) -> None:
+        """Закрывает все соединения пула текущего процесса."""
+        with self.pools_lock:
+            pool = self.pools.pop((self.alias, os.getpid()), None)
+        if pool is not None:
+            pool.closeall()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        for name in POOL_OPTIONS:
+            conn_params.pop(name, None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        # Сервер БД мог закрыть соединения, пока они лежали в пуле:
+        # мёртвые закрываются, пока не найдётся живое или новое.
+        for _ in range(pool.maxconn + 1):
+            connection = pool.getconn()
+            if not settings.DB_HEALTH_CHECKS or is_alive(connection):
+                break
+            pool.putconn(connection, close=True)
+        else:
+            raise Database.OperationalError('Нет рабочих соединений с БД')
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self.get_pool()
+        with self.wrap_database_errors:
+            if pool is None:
+                self.connection.close()
+            else:
+                # Незавершённую транзакцию пул откатывает сам.
+                pool.putconn(self.connection)
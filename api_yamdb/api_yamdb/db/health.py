@@ -0,0 +1,36 @@
+"""Проверка постоянных соединений с БД перед запросом.
+
+Django 2.2 проверяет соединение только после ошибки в нём, и первый
+запрос после перезапуска БД завершался бы ошибкой 500. SELECT 1 перед
+каждым запросом стоил бы лишнего обращения к БД и там, где БД не
+нужна (ответ из кэша), поэтому соединение проверяется не чаще раза в
+DB_HEALTH_CHECK_INTERVAL секунд.
+"""
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    connection.health_checked_at = time.monotonic()
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Закрывает постоянные соединения, которые оборвал сервер БД."""
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    now = time.monotonic()
+    for connection in connections.all():
+        if (connection.connection is None or connection.in_atomic_block
+                or now - getattr(connection, 'health_checked_at', 0.0)
+                < settings.DB_HEALTH_CHECK_INTERVAL):
+            continue
+        connection.health_checked_at = now
+        if not connection.is_usable():
+            connection.close()
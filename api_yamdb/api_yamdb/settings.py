@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -29,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,9 +70,94 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        # Соединение живёт между запросами воркера столько секунд.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
     }
 }
+# Перед запросом постоянное соединение проверяется SELECT 1 (не чаще
+# раза в DB_HEALTH_CHECK_INTERVAL секунд) и переоткрывается, если сервер
+# БД его закрыл, см. api_yamdb/db/health.py.
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', default='1') == '1'
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', default=10))
+# Пул соединений процесса вместо постоянного соединения каждого потока,
+# только для PostgreSQL, см. api_yamdb/db. Если потоков процесса
+# (GUNICORN_THREADS или ASGI_THREADS + ASGI_READ_THREADS) больше, чем
+# соединений, поток ждёт свободное соединение до DB_POOL_TIMEOUT секунд.
+DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', default=0))
+if DB_POOL_MAX_CONNECTIONS:
+    DATABASES['default'].update({
+        'ENGINE': 'api_yamdb.db',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool_min_size': int(os.getenv('DB_POOL_MIN_CONNECTIONS', default=1)),
+            'pool_max_size': DB_POOL_MAX_CONNECTIONS,
+            'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+        },
+    })
+
+# Для нескольких воркеров gunicorn нужен общий бэкенд, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache.
+# С кэшем в памяти процесса роль из токена не используется, и
+# пользователь на каждый запрос читается из БД (api.authentication).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Лимиты запросов "число/период" (период s, m, h или d), пустая строка
+# отключает лимит. Корзины по умолчанию хранятся в памяти процесса; для
+# нескольких воркеров нужен THROTTLE_STORE=api.throttling.CacheBucketStore
+# с общим кэшем THROTTLE_CACHE_ALIAS.
+THROTTLE_RATES = {
+    'signup_ip': os.getenv('THROTTLE_SIGNUP_IP', default='10/h'),
+    'token_ip': os.getenv('THROTTLE_TOKEN_IP', default='30/m'),
+    'token_username': os.getenv('THROTTLE_TOKEN_USERNAME', default='5/m'),
+    'write': os.getenv('THROTTLE_WRITE', default=''),
+}
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', default='api.throttling.LocalBucketStore')
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Потоки одного воркера в режиме ASGI (SERVER_MODE=asgi, см. api/asgi.py):
+# общий пул и отдельный пул для горячих запросов чтения.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', default=8))
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', default=8))
+
+# Страницы списков от API_STREAM_PAGE_SIZE строк отдаются потоком,
+# см. api.mixins.StreamingListMixin; 0 отключает потоковую отдачу.
+API_STREAM_PAGE_SIZE = int(os.getenv('API_STREAM_PAGE_SIZE', default=200))
+# Уровень сжатия brotli от 0 до 11, см. api.compression.
+API_BROTLI_QUALITY = int(os.getenv('API_BROTLI_QUALITY', default=5))
+
+# Доля запросов, для которых собираются Server-Timing и лог метрик.
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('INSTRUMENTATION_SAMPLE_RATE', default=0.01))
+# Server-Timing всем клиентам, а не только администраторам (для отладки).
+INSTRUMENTATION_PUBLIC_TIMING = os.getenv('INSTRUMENTATION_PUBLIC_TIMING', default='0') == '1'
+# Запросы дольше порога пишутся в лог с уровнем WARNING,
+# остальные - INFO (включается INSTRUMENTATION_LOG_LEVEL=INFO).
+INSTRUMENTATION_SLOW_MS = int(os.getenv('INSTRUMENTATION_SLOW_MS', default=500))
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='1') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('INSTRUMENTATION_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -109,8 +197,28 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],
+    # Пользователь берётся из токена; отметки об отзыве токенов хранятся
+    # в кэше API, поэтому с несколькими воркерами он должен быть общим.
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
+    ],
+    # Лимит изменяющих запросов, задаётся THROTTLE_RATES['write'].
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteThrottle',
+    ],
+    # Адрес клиента берётся из X-Forwarded-For, который добавляет nginx.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    # Формат ответа выбирается по Accept, первый - по умолчанию.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.ORJSONParser',
+        'api.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
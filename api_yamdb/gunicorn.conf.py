@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import shutil
+
+CPU_COUNT = multiprocessing.cpu_count()
+ASGI = os.environ.get('SERVER_MODE') == 'asgi'
+
+bind = os.environ.get('GUNICORN_BIND', '0:8000')
+wsgi_app = 'api_yamdb.wsgi:application'
+
+# SERVER_MODE=asgi: воркеры uvicorn и ASGI-приложение, см. api/asgi.py.
+if ASGI:
+    wsgi_app = 'api_yamdb.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+# Синхронному воркеру нужен запас на ожидание БД, воркеру uvicorn -
+# по одному на ядро: ожидание уходит в пул потоков ASGI_THREADS.
+workers = int(os.environ.get(
+    'GUNICORN_WORKERS', CPU_COUNT if ASGI else CPU_COUNT * 2 + 1))
+# Больше одного потока переключает синхронный воркер на gthread.
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+# Приложение загружается до fork, и воркеры делят его память.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# Перезапуск воркера ограничивает рост памяти, разброс не даёт
+# перезапуститься всем воркерам сразу.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER',
+                                         max_requests // 10))
+
+
+def on_starting(server):
+    # Файлы метрик прошлого запуска исказили бы суммы счётчиков.
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def pre_fork(server, worker):
+    # Соединения с БД, открытые мастером при загрузке приложения,
+    # не должны достаться воркерам.
+    if server.cfg.preload_app:
+        from django.db import connections
+        for connection in connections.all():
+            connection.close()
+            close_pool = getattr(connection, 'close_pool', None)
+            if close_pool is not None:
+                close_pool()
+
+
+def post_fork(server, worker):
+    from api.metrics import WORKERS
+    WORKERS.set(1)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutgoingEmail, Review, Title,
+                     User)
 
 
 @admin.register(User)
@@ -24,7 +25,8 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
     """Предоставление категории жанров в админке."""
-    list_display = ('id', 'name', 'year', 'category')
+    list_display = ('id', 'name', 'year', 'category', 'rating')
+    readonly_fields = ('rating_sum', 'rating_count', 'rating')
 
     def get_genres(self, obj):
         return '\n'.join([str(genre) for genre in obj.genre.all()])
@@ -40,3 +42,11 @@ class ReviewAdmin(admin.ModelAdmin):
 class GenreAdmin(admin.ModelAdmin):
     """Предоставление категории жанров в админке."""
     list_display = ('id', 'name', 'slug')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Предоставление очереди исходящих писем в админке."""
+    list_display = ('id', 'subject', 'recipients', 'status', 'attempts',
+                    'send_after', 'sent')
+    list_filter = ('status',)
@@ -16,3 +16,11 @@ class NotSetStaticfilesDirError(Exception):
 
 class NotFoundPathError(Exception):
     pass
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+class SkippedRowsError(Exception):
+    pass
@@ -0,0 +1,121 @@
+"""Предрассчитанный рейтинг лучших произведений.
+
+Вместо сортировки всех произведений по рейтингу на каждый запрос
+команда refresh_leaderboard по расписанию сохраняет в LeaderboardEntry
+первые LEADERBOARD_SIZE мест общего рейтинга и рейтингов каждой
+категории и жанра, а API отдаёт страницу диапазоном мест. Места
+удалённого произведения удаляются каскадом, оставшиеся места его
+рейтингов сразу перенумеровываются.
+
+Взвешивание:
+- bayesian: (сумма оценок + m * C) / (число оценок + m), где C - средняя
+  оценка в рейтинге, m - min_reviews: у произведения с одной оценкой 10
+  рейтинг близок к среднему;
+- minimum: средняя оценка, в рейтинг попадают произведения, у которых
+  не меньше min_reviews оценок;
+- none: средняя оценка без поправок.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Cast
+
+from .models import (LEADERBOARD_ALL, LEADERBOARD_CATEGORY, LEADERBOARD_GENRE,
+                     CategoryStats, GenreStats, LeaderboardEntry, Title)
+
+WEIGHTING_BAYESIAN = 'bayesian'
+WEIGHTING_MINIMUM = 'minimum'
+WEIGHTING_NONE = 'none'
+WEIGHTINGS = (WEIGHTING_BAYESIAN, WEIGHTING_MINIMUM, WEIGHTING_NONE)
+
+LEADERBOARD_SIZE = 100
+MIN_REVIEWS = 5
+
+
+def get_mean(score_sum: Optional[int], count: Optional[int]) -> float:
+    return score_sum / count if count else 0.0
+
+
+def rank_titles(titles, weighting: str, min_reviews: int, mean: float,
+                size: int) -> List[Tuple[int, float]]:
+    """Первые size произведений: (id, взвешенный рейтинг)."""
+    titles = titles.filter(rating_count__gt=0)
+    if weighting == WEIGHTING_BAYESIAN:
+        score = ExpressionWrapper(
+            (Cast('rating_sum', FloatField()) + min_reviews * mean)
+            / (F('rating_count') + min_reviews),
+            output_field=FloatField()
+        )
+    else:
+        score = F('rating')
+        if weighting == WEIGHTING_MINIMUM:
+            titles = titles.filter(rating_count__gte=min_reviews)
+    return list(
+        titles.annotate(score=score)
+        .order_by('-score', '-rating_count', 'pk')
+        .values_list('pk', 'score')[:size]
+    )
+
+
+def get_boards():
+    """Рейтинги: (вид, id группы, произведения, средняя оценка)."""
+    totals = Title.objects.aggregate(
+        count=Sum('rating_count'), score=Sum('rating_sum'))
+    yield (LEADERBOARD_ALL, 0, Title.objects.all(),
+           get_mean(totals['score'], totals['count']))
+    # Средние оценки групп уже посчитаны в статистике, см. reviews.stats.
+    for stats in CategoryStats.objects.filter(reviews_count__gt=0):
+        yield (LEADERBOARD_CATEGORY, stats.pk,
+               Title.objects.filter(category=stats.pk), stats.rating)
+    for stats in GenreStats.objects.filter(reviews_count__gt=0):
+        yield (LEADERBOARD_GENRE, stats.pk,
+               Title.objects.filter(genre=stats.pk), stats.rating)
+
+
+def refresh_leaderboard(weighting: str = WEIGHTING_BAYESIAN,
+                        min_reviews: int = MIN_REVIEWS,
+                        size: int = LEADERBOARD_SIZE) -> Dict[str, int]:
+    """Пересчитывает все рейтинги, возвращает число мест по видам."""
+    entries = []
+    counts = dict.fromkeys(
+        (LEADERBOARD_ALL, LEADERBOARD_CATEGORY, LEADERBOARD_GENRE), 0)
+    for scope, group_id, titles, mean in get_boards():
+        ranked = rank_titles(titles, weighting, min_reviews, mean, size)
+        entries.extend(
+            LeaderboardEntry(scope=scope, group_id=group_id,
+                             position=position, title_id=pk, score=score)
+            for position, (pk, score) in enumerate(ranked, 1)
+        )
+        counts[scope] += len(ranked)
+    # До конца транзакции читатели видят прежний рейтинг.
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries)
+    return counts
+
+
+def get_title_boards(title_id: int) -> Set[Tuple[str, int]]:
+    """Рейтинги, в которые входит произведение: (вид, id группы)."""
+    return set(LeaderboardEntry.objects.filter(
+        title_id=title_id).values_list('scope', 'group_id'))
+
+
+def renumber(boards: Iterable[Tuple[str, int]]) -> None:
+    """Перенумеровывает места рейтингов подряд с 1."""
+    for scope, group_id in boards:
+        entries = LeaderboardEntry.objects.filter(
+            scope=scope, group_id=group_id)
+        rows = list(entries.order_by('position').values_list(
+            'pk', 'position'))
+        if all(position == place
+               for place, (_, position) in enumerate(rows, 1)):
+            continue
+        with transaction.atomic():
+            # Уникальность места проверяется построчно: сначала места
+            # сдвигаются за последнее, затем нумеруются заново.
+            entries.update(position=F('position') + rows[-1][1])
+            LeaderboardEntry.objects.bulk_update([
+                LeaderboardEntry(pk=pk, position=place)
+                for place, (pk, _) in enumerate(rows, 1)
+            ], ['position'])
@@ -0,0 +1,158 @@
+import csv
+import datetime as dt
+import gzip
+import json
+import os
+import time
+from typing import Iterator, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from reviews.management.commands.import_csv import Command as ImportCommand
+
+DEFAULT_CHUNK_SIZE = 2000
+CSV_FORMAT = 'csv'
+JSONL_FORMAT = 'jsonl'
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка данных из БД в файлы формата import_csv.'
+
+    # Колонки совпадают с файлами, которые читает import_csv.
+    _COLUMNS = {
+        'users.csv': ('id', 'username', 'email', 'role', 'bio',
+                      'first_name', 'last_name'),
+        'category.csv': ('id', 'name', 'slug'),
+        'genre.csv': ('id', 'name', 'slug'),
+        'titles.csv': ('id', 'name', 'year', 'category', 'description'),
+        'review.csv': ('id', 'title_id', 'text', 'author', 'score',
+                       'pub_date'),
+        'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+        'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    }
+
+    # Поле, по которому отбираются записи при выгрузке с --since.
+    # У пользователей нет даты изменения, выгружаются новые.
+    _SINCE_FIELDS = {
+        'users.csv': 'date_joined',
+        'category.csv': 'modified',
+        'genre.csv': 'modified',
+        'titles.csv': 'modified',
+        'review.csv': 'modified',
+        'comments.csv': 'modified',
+        # Изменение жанров обновляет дату изменения произведения.
+        'genre_title.csv': 'title__modified',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output',
+            help='Каталог для выгружаемых файлов.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=(CSV_FORMAT, JSONL_FORMAT),
+            default=CSV_FORMAT,
+            help='Формат файлов.'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--since',
+            help='Выгрузить только записи, созданные или изменённые '
+                 'начиная с даты (ISO 8601).'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из БД за один раз.'
+        )
+
+    def parse_since(self, value: Optional[str]) -> Optional[dt.datetime]:
+        if value is None:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            date = parse_date(value)
+            if date is None:
+                raise CommandError(f'Некорректная дата: {value}')
+            since = dt.datetime.combine(date, dt.time.min)
+        if timezone.is_naive(since):
+            return timezone.make_aware(since)
+        return since
+
+    def get_queryset(self, file_name: str, since: Optional[dt.datetime]):
+        model_ = ImportCommand._MODELS_OR_LINKS[file_name]
+        model = model_['through'] if model_['type'] == 'link' else (
+            model_['model'])
+        queryset = model.objects.order_by('pk')
+        since_field = self._SINCE_FIELDS.get(file_name)
+        if since is not None and since_field is not None:
+            queryset = queryset.filter(**{f'{since_field}__gte': since})
+        lookups = [
+            model._meta.get_field(column).attname
+            for column in self._COLUMNS[file_name]
+        ]
+        return queryset.values_list(*lookups)
+
+    def open_file(self, path: str):
+        if self.compress:
+            return gzip.open(f'{path}.gz', 'wt', encoding='utf-8',
+                             newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def write_csv(self, file, columns: tuple, rows: Iterator[tuple]) -> int:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        count = 0
+        for row in rows:
+            writer.writerow(
+                value.isoformat() if isinstance(value, dt.datetime)
+                else value
+                for value in row
+            )
+            count += 1
+        return count
+
+    def write_jsonl(self, file, columns: tuple,
+                    rows: Iterator[tuple]) -> int:
+        count = 0
+        for row in rows:
+            file.write(json.dumps(dict(zip(columns, row)),
+                                  ensure_ascii=False, default=str))
+            file.write('\n')
+            count += 1
+        return count
+
+    def export_file(self, output: str, file_name: str,
+                    since: Optional[dt.datetime]) -> None:
+        started = time.monotonic()
+        name = file_name
+        if self.format == JSONL_FORMAT:
+            name = f'{os.path.splitext(file_name)[0]}.{JSONL_FORMAT}'
+        write = getattr(self, f'write_{self.format}')
+        # На PostgreSQL iterator() читает строки серверным курсором.
+        rows = self.get_queryset(file_name, since).iterator(
+            chunk_size=self.chunk_size)
+        with self.open_file(os.path.join(output, name)) as file:
+            count = write(file, self._COLUMNS[file_name], rows)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{name}: выгружено {count} строк за {elapsed:.2f} с '
+            f'({count / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.format = options['format']
+        self.compress = options['gzip']
+        since = self.parse_since(options['since'])
+        output = options['output']
+        os.makedirs(output, exist_ok=True)
+        for file_name in ImportCommand._MODELS_OR_LINKS:
+            self.export_file(output, file_name, since)
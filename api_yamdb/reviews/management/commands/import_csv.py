@@ -3,117 +3,442 @@ import csv
 import os
 import re
 import sys
-from typing import List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError
-from reviews import models
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from reviews import leaderboard, models, stats
 from reviews.exceptions.import_csv import (DataAlreadyExistError,
+                                           DependencyCycleError,
                                            DoesNotExistFunctionError,
                                            NotFoundPathError,
                                            NotSetStaticfilesDirError,
+                                           SkippedRowsError,
                                            UnexpectedFileError)
+from reviews.metrics import (IMPORT_FILES, IMPORT_ROWS, IMPORT_RUNNING,
+                             finish_import)
+
+DEFAULT_CHUNK_SIZE = 1000
+STAGING_TABLE = 'import_csv_staging'
+TEXT_FIELDS = ('CharField', 'TextField', 'SlugField', 'EmailField')
+
+
+def is_auto_date(field) -> bool:
+    return getattr(field, 'auto_now', False) or getattr(
+        field, 'auto_now_add', False)
+
+
+@contextmanager
+def file_dates(model, objects: list, row: dict):
+    """Сохраняет в новых строках даты полей auto_now и auto_now_add.
+
+    bulk_create заменяет их текущим временем, поэтому даты из файла
+    записываются после вставки, и только в строки, которых до неё не
+    было. Сами поля не меняются: модель в это время сохраняют
+    обработчики сигналов и другие потоки.
+    """
+    names = [field.attname for field in model._meta.concrete_fields
+             if is_auto_date(field) and field.attname in row]
+    if not names or not objects:
+        yield
+        return
+    dates = [[getattr(obj, name) for name in names] for obj in objects]
+    # Ключ из файла - строка, из БД - значение типа поля.
+    pks = [model._meta.pk.to_python(obj.pk) for obj in objects]
+    existing = set(model.objects.filter(
+        pk__in=[pk for pk in pks if pk is not None]
+    ).values_list('pk', flat=True))
+    yield
+    created = []
+    for obj, pk, values in zip(objects, pks, dates):
+        if pk is None or pk in existing:
+            continue
+        for name, value in zip(names, values):
+            setattr(obj, name, value)
+        created.append(obj)
+    model.objects.bulk_update(created, names)
 
 
 class Command(BaseCommand):
     help = 'Импорт данных в БД.'
     data_path = None
 
+    # Порядок файлов задаёт порядок записи при --workers 1.
     _MODELS_OR_LINKS = {
         'users.csv': {
             'model': models.User,
             'type': 'model',
-            'data': []
         },
         'category.csv': {
             'model': models.Category,
             'type': 'model',
-            'data': []
         },
         'genre.csv': {
             'model': models.Genre,
             'type': 'model',
-            'data': []
         },
         'titles.csv': {
             'model': models.Title,
             'type': 'model',
-            'data': []
         },
         'review.csv': {
             'model': models.Review,
             'type': 'model',
-            'data': []
         },
         'comments.csv': {
             'model': models.Comment,
             'type': 'model',
-            'data': []
         },
         'genre_title.csv': {
             'model': 'Genre_Title',
             'type': 'link',
             'parent': models.Title,
-            'data': []
+            'through': models.Title.genre.through,
         }
     }
 
     _INDEX_STATICFILES_DIRS = 0
     _SYS_EXIT_CODE = 1
 
-    def parse_file(self, path: str, file_name: str) -> None:
-        """Формирует из файла массив для записи."""
-        if self._MODELS_OR_LINKS.get(file_name) is None:
-            raise UnexpectedFileError('Непредвиденный файл: ', file_name)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, записываемых одним запросом.'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загрузка через COPY FROM STDIN (только PostgreSQL).'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество файлов, загружаемых параллельно.'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Не загружать файл, в котором есть строки со ссылками '
+                 'на несуществующие объекты.'
+        )
+
+    def read_chunks(self, path: str,
+                    file_name: str) -> Iterator[List[dict]]:
+        """Читает файл порциями по chunk_size строк."""
         with codecs.open(f'{path}/{file_name}', 'r', 'utf_8_sig') as csvfile:
             reader = csv.DictReader(csvfile)
-            for row in reader:
-                self._MODELS_OR_LINKS[file_name]['data'].append(row)
-
-    def _prepare_row(self, value: dict) -> dict:
-        """Подготовка данных к записи."""
-        if value.get('category'):
-            value['category'] = models.Category.objects.get(
-                pk=value['category'])
-        if value.get('author'):
-            value['author'] = models.User.objects.get(pk=value['author'])
+            while True:
+                chunk = list(islice(reader, self.chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+
+    def get_id_map(self, model) -> set:
+        """Первичные ключи модели, загружаемые один раз за импорт."""
+        with self._id_maps_lock:
+            if model not in self._id_maps:
+                self._id_maps[model] = set(
+                    model.objects.values_list('pk', flat=True).iterator())
+            return self._id_maps[model]
+
+    def _resolve(self, field, value) -> Optional[int]:
+        """Проверяет внешний ключ по карте идентификаторов."""
+        if value in ('', None):
+            return None
+        value = field.target_field.to_python(value)
+        if value not in self.get_id_map(field.related_model):
+            return None
         return value
 
-    def _model_base(self, model_: dict) -> None:
-        """Запись данных в БД."""
-        model_['model'].objects.bulk_create(
-            [model_['model'](**self._prepare_row(row)) for row in
-             model_['data']],
-            ignore_conflicts=True)
+    def _parse_date(self, field, value):
+        """Дата из файла: пустая - текущее время, без зоны - UTC.
+
+        Так же дату читает COPY, см. _copy_column.
+        """
+        if value in ('', None):
+            return timezone.now()
+        value = field.to_python(value)
+        if timezone.is_naive(value):
+            return timezone.make_aware(value, timezone.utc)
+        return value
 
-    def model_genre_title(self, model_: dict) -> None:
+    def _prepare_row(self, model, value: dict) -> Optional[dict]:
+        """Подготовка данных к записи.
+
+        Внешние ключи заменяются на *_id. Строка со ссылкой на
+        несуществующий обязательный объект пропускается.
+        """
+        for field in model._meta.concrete_fields:
+            if is_auto_date(field) and field.attname in value:
+                value[field.attname] = self._parse_date(
+                    field, value[field.attname])
+            if not field.is_relation:
+                continue
+            column = field.name if field.name in value else field.attname
+            if column not in value:
+                continue
+            related_id = self._resolve(field, value.pop(column))
+            if related_id is None and not field.null:
+                return None
+            value[field.attname] = related_id
+        return value
+
+    def _model_base(self, model_: dict, chunk: List[dict]) -> int:
+        """Запись порции данных в БД."""
+        model = model_['model']
+        objects = []
+        for row in chunk:
+            row = self._prepare_row(model, row)
+            if row is not None:
+                objects.append(model(**row))
+        with file_dates(model, objects, chunk[0]):
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+        return len(objects)
+
+    def model_genre_title(self, model_: dict, chunk: List[dict]) -> int:
         """Создание связей многие ко многим для моделей Genre и Title."""
-        for raw in model_['data']:
-            title_id = raw['title_id']
-            genre_id = raw['genre_id']
-            title = models.Title.objects.get(pk=title_id)
-            title.genre.add(
-                models.Genre.objects.get(pk=genre_id)
+        through = model_['through']
+        links = []
+        for row in chunk:
+            row = self._prepare_row(through, row)
+            if row is not None:
+                links.append(through(**row))
+        through.objects.bulk_create(links, ignore_conflicts=True)
+        return len(links)
+
+    def get_write_func(self, model_: dict):
+        # В зависимости от модели запускается определенная функция.
+        func_name = '_model_base'
+        if model_['type'] == 'custom_model':
+            func_name = f'model_{model_["model"].__name__.lower()}'
+        if model_['type'] == 'link':
+            func_name = f'model_{model_["model"].lower()}'
+        try:
+            return getattr(self, func_name)
+        except AttributeError:
+            raise DoesNotExistFunctionError(func_name, 'не определена.')
+
+    def get_table_model(self, model_: dict):
+        if model_['type'] == 'link':
+            return model_['through']
+        return model_['model']
+
+    def _copy_column(self, field, headers: List[str]) -> tuple:
+        """SQL-выражение и параметры для колонки целевой таблицы.
+
+        Значения берутся из промежуточной таблицы с приведением типа,
+        отсутствующие в файле колонки заполняются значением по умолчанию.
+        """
+        qn = connection.ops.quote_name
+        column = next(
+            (name for name in (field.name, field.attname) if name in headers),
+            None
+        )
+        if column is None:
+            if is_auto_date(field):
+                return 'now()', []
+            return '%s', [field.get_db_prep_save(
+                field.get_default(), connection)]
+        if field.get_internal_type() in TEXT_FIELDS:
+            # COPY читает пустое поле как NULL, ORM-режим записывает ''.
+            return f"COALESCE(s.{qn(column)}, '')", []
+        target = field.target_field if field.is_relation else field
+        db_type = target.rel_db_type(connection)
+        value = f"CAST(NULLIF(s.{qn(column)}, '') AS {db_type})"
+        if is_auto_date(field):
+            # Соединение работает в UTC: дата без зоны читается в UTC.
+            return f'COALESCE({value}, now())', []
+        if not field.is_relation:
+            return value, []
+        # Ссылка на несуществующий объект обнуляется, как в ORM-режиме.
+        related = field.related_model._meta
+        return (f'(SELECT p.{qn(related.pk.column)} '
+                f'FROM {qn(related.db_table)} p '
+                f'WHERE p.{qn(related.pk.column)} = {value})'), []
+
+    def read_headers(self, path: str, file_name: str) -> List[str]:
+        with codecs.open(f'{path}/{file_name}', 'r', 'utf_8_sig') as csvfile:
+            return next(csv.reader(csvfile))
+
+    def copy_file(self, model_: dict, path: str, file_name: str) -> tuple:
+        """Загрузка файла через COPY в промежуточную таблицу.
+
+        Из промежуточной таблицы строки переносятся INSERT ... ON CONFLICT
+        DO NOTHING, что повторяет ignore_conflicts ORM-режима.
+        """
+        qn = connection.ops.quote_name
+        model = self.get_table_model(model_)
+        headers = self.read_headers(path, file_name)
+        columns, values, params, required = [], [], [], []
+        for field in model._meta.concrete_fields:
+            value, value_params = self._copy_column(field, headers)
+            columns.append(qn(field.column))
+            values.append(value)
+            params.extend(value_params)
+            if field.is_relation and not field.null:
+                required.append(f'{value} IS NOT NULL')
+        where = f'WHERE {" AND ".join(required)}' if required else ''
+        staging = qn(STAGING_TABLE)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {staging} '
+                f'({", ".join(f"{qn(header)} text" for header in headers)}) '
+                'ON COMMIT DROP'
             )
+            with codecs.open(
+                    f'{path}/{file_name}', 'r', 'utf_8_sig') as csvfile:
+                cursor.copy_expert(
+                    f'COPY {staging} '
+                    f'({", ".join(qn(header) for header in headers)}) '
+                    'FROM STDIN WITH (FORMAT csv, HEADER true)',
+                    csvfile
+                )
+            cursor.execute(f'SELECT count(*) FROM {staging}')
+            rows = cursor.fetchone()[0]
+            skipped = 0
+            if required:
+                cursor.execute(
+                    f'SELECT count(*) FROM {staging} s '
+                    f'WHERE NOT ({" AND ".join(required)})')
+                skipped = cursor.fetchone()[0]
+            self.check_skipped(file_name, skipped)
+            cursor.execute(
+                f'INSERT INTO {qn(model._meta.db_table)} '
+                f'({", ".join(columns)}) '
+                f'SELECT {", ".join(values)} FROM {staging} s {where} '
+                'ON CONFLICT DO NOTHING',
+                params
+            )
+            written = cursor.rowcount
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model]):
+                cursor.execute(sql)
+            cursor.execute(f'DROP TABLE {staging}')
+        return rows, written, skipped
+
+    def stream_file(self, model_: dict, path: str, file_name: str) -> tuple:
+        """Потоковая запись файла порциями через ORM."""
+        func = self.get_write_func(model_)
+        rows = written = skipped = 0
+        for chunk in self.read_chunks(path, file_name):
+            rows += len(chunk)
+            chunk_written = func(model_, chunk)
+            written += chunk_written
+            skipped += len(chunk) - chunk_written
+            self.check_skipped(file_name, skipped)
+            IMPORT_ROWS.labels(file_name).inc(len(chunk))
+        return rows, written, skipped
+
+    def check_skipped(self, file_name: str, skipped: int) -> None:
+        if skipped and self.strict:
+            raise SkippedRowsError(
+                f'{file_name}: строк со ссылками на несуществующие '
+                f'объекты: {skipped}, файл не загружен.')
+
+    def write_file(self, path: str, file_name: str) -> None:
+        """Запись файла в одной транзакции."""
+        model_ = self._MODELS_OR_LINKS[file_name]
+        write = self.copy_file if self.use_copy else self.stream_file
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                rows, written, skipped = write(model_, path, file_name)
+        except IntegrityError:
+            IMPORT_FILES.labels(file_name, 'error').inc()
+            raise DataAlreadyExistError(model_['model'],
+                                        'данные уже существуют в бд')
+        if self.use_copy:
+            IMPORT_ROWS.labels(file_name).inc(rows)
+        IMPORT_FILES.labels(file_name, 'done').inc()
+        # Новые записи могут быть родителями для следующих файлов.
+        with self._id_maps_lock:
+            self._id_maps.pop(model_['model'], None)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{file_name}: записано {written} из {rows} строк '
+            f'за {elapsed:.2f} с ({rows / max(elapsed, 1e-6):.0f} строк/с)'
+        )
+        if skipped:
+            self.stderr.write(
+                f'{file_name}: пропущено {skipped} строк со ссылками '
+                f'на несуществующие объекты.')
+
+    def build_graph(self, files: List[str]) -> Dict[str, Set[str]]:
+        """Зависимости файлов по внешним ключам их моделей."""
+        file_by_model = {
+            self.get_table_model(model_): file_name
+            for file_name, model_ in self._MODELS_OR_LINKS.items()
+            if file_name in files
+        }
+        return {
+            file_name: {
+                file_by_model[field.related_model]
+                for field in model._meta.concrete_fields
+                if field.is_relation
+                and field.related_model is not model
+                and field.related_model in file_by_model
+            }
+            for model, file_name in file_by_model.items()
+        }
+
+    def write_stage(self, path: str, file_name: str) -> None:
+        """Запись файла в потоке пула с отдельным соединением к БД."""
+        try:
+            self.write_file(path, file_name)
+        finally:
+            connection.close()
 
-    def write_db(self) -> None:
+    def write_parallel(self, path: str, graph: Dict[str, Set[str]]) -> None:
+        """Запускает файл, как только загружены все его родители."""
+        pending = dict(graph)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for file_name, parents in list(pending.items()):
+                    if parents <= done:
+                        del pending[file_name]
+                        running[executor.submit(
+                            self.write_stage, path, file_name)] = file_name
+                if not running:
+                    raise DependencyCycleError(
+                        'Циклическая зависимость файлов: ', list(pending))
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    done.add(running.pop(future))
+
+    def write_db(self, path: str, files: List[str]) -> None:
         """Вызов функций записи в БД."""
-        for model_ in self._MODELS_OR_LINKS.values():
-            # В зависимости от модели запускается определенная функция.
-            func_name = '_model_base'
-            if model_['type'] == 'custom_model':
-                func_name = f'model_{model_["model"].__name__.lower()}'
-            if model_['type'] == 'link':
-                func_name = f'model_{model_["model"].lower()}'
-            try:
-                func = getattr(self, func_name)
-                func(model_)
-            except AttributeError:
-                raise DoesNotExistFunctionError(func_name, 'не определена.')
-            except IntegrityError:
-                raise DataAlreadyExistError(model_['model'],
-                                            'данные уже существуют в бд')
+        for file_name in files:
+            if self._MODELS_OR_LINKS.get(file_name) is None:
+                raise UnexpectedFileError('Непредвиденный файл: ', file_name)
+        started = time.monotonic()
+        graph = self.build_graph(files)
+        if self.workers > 1:
+            self.write_parallel(path, graph)
+        else:
+            for file_name in graph:
+                self.write_file(path, file_name)
+        # bulk_create не отправляет сигналы, рейтинг и статистика
+        # пересчитываются целиком.
+        models.Title.objects.all().rebuild_rating()
+        stats.rebuild_scores()
+        stats.rebuild_groups()
+        leaderboard.refresh_leaderboard()
+        self.stdout.write(
+            f'Импорт завершён за {time.monotonic() - started:.2f} с')
 
     def get_data_path(self) -> str:
         """Формирует путь к каталогу с csv файлами."""
@@ -140,18 +465,44 @@ class Command(BaseCommand):
                 csv_files.append(csv_file[0])
         return csv_files
 
+    def configure(self, options: dict) -> None:
+        """Параметры запуска с учётом возможностей СУБД."""
+        self.chunk_size = options['chunk_size']
+        self.use_copy = options['copy']
+        self.workers = max(options['workers'], 1)
+        self.strict = options['strict']
+        if connection.vendor != 'postgresql':
+            if self.use_copy:
+                self.stderr.write(
+                    'COPY доступен только для PostgreSQL, используется ORM.')
+                self.use_copy = False
+            if self.workers > 1:
+                self.stderr.write(
+                    'Параллельная запись доступна только для PostgreSQL.')
+                self.workers = 1
+        self._id_maps = {}
+        self._id_maps_lock = threading.Lock()
+
     def handle(self, *args, **options):
+        self.configure(options)
+        IMPORT_RUNNING.set(1)
+        try:
+            self.run_import()
+        finally:
+            finish_import()
+
+    def run_import(self) -> None:
         try:
             path = self.get_data_path()
             self.validate_dir(path)
             files = self.get_csv_files(path)
-            for file in files:
-                self.parse_file(path, file)
-            self.write_db()
+            self.write_db(path, files)
         except UnexpectedFileError as error:
             print(error)
         except DoesNotExistFunctionError as error:
             print(error)
+        except DependencyCycleError as error:
+            print(error)
         except DataAlreadyExistError as error:
             print(error)
         except NotSetStaticfilesDirError as error:
@@ -160,3 +511,6 @@ class Command(BaseCommand):
         except NotFoundPathError as error:
             print(error)
             sys.exit(self._SYS_EXIT_CODE)
+        except SkippedRowsError as error:
+            print(error)
+            sys.exit(self._SYS_EXIT_CODE)
@@ -0,0 +1,114 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from reviews.models import Comment, Review, Title
+from reviews.seed import seed_dataset
+
+PAGE_SIZE = 10
+
+# Схема до появления составных индексов: одиночные индексы внешних ключей.
+BEFORE_INDEXES = (
+    (Review, models.Index(fields=['title'], name='plan_review_title_idx')),
+    (Comment, models.Index(fields=['review'],
+                           name='plan_comment_review_idx')),
+    (Title, models.Index(fields=['category'],
+                         name='plan_title_category_idx')),
+)
+
+
+class Command(BaseCommand):
+    help = ('Планы и время горячих запросов до и после индексов '
+            'на синтетических данных. Данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=5000)
+        parser.add_argument('--reviews-per-title', type=int, default=20)
+        parser.add_argument('--comments-per-review', type=int, default=3)
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз выполнять запрос для замера времени.'
+        )
+
+    def get_queries(self, before: bool) -> dict:
+        """Запросы, которые выполняют списки API."""
+        title = Title.objects.order_by('-rating_count').first()
+        review = Review.objects.filter(title=title).first()
+        # Раньше отзывы и комментарии сортировались по тексту.
+        ordering = ('text',) if before else Review._meta.ordering
+        return {
+            'titles': Title.objects.select_related('category'),
+            'titles_category_year': Title.objects.filter(
+                category__slug=title.category.slug, year=title.year),
+            'titles_genre': Title.objects.filter(
+                genre__slug=title.genre.first().slug),
+            'reviews': Review.objects.filter(
+                title=title).order_by(*ordering),
+            'comments': Comment.objects.filter(
+                review=review).order_by(*ordering),
+        }
+
+    def analyze(self) -> None:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def restore_old_indexes(self) -> None:
+        """Заменяет индексы моделей прежними (откатится с транзакцией)."""
+        # Без контекстного менеджера: SQLite не разрешает входить в
+        # редактор схемы внутри транзакции, а CREATE/DROP INDEX ему хватает.
+        editor = connection.schema_editor()
+        if connection.vendor == 'postgresql':
+            # Отложенные проверки внешних ключей мешают менять индексы.
+            editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        for model in (Title, Review, Comment):
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+        for model, index in BEFORE_INDEXES:
+            editor.add_index(model, index)
+        self.analyze()
+
+    def explain(self, queryset) -> str:
+        if connection.vendor == 'postgresql':
+            return queryset.explain(analyze=True)
+        return queryset.explain()
+
+    def measure(self, queryset, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all()[:PAGE_SIZE])
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    def report(self, state: str, repeat: int) -> dict:
+        results = {}
+        for name, queryset in self.get_queries(state == 'before').items():
+            page = queryset[:PAGE_SIZE]
+            results[name] = self.measure(queryset, repeat)
+            self.stdout.write(
+                f'--- {name} [{state}]: {results[name]:.2f} мс\n'
+                f'{page.query}\n{self.explain(page)}\n'
+            )
+        return results
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = seed_dataset(
+                users=max(options['reviews_per_title'], 100),
+                titles=options['titles'],
+                reviews_per_title=options['reviews_per_title'],
+                comments_per_review=options['comments_per_review']
+            )
+            self.stdout.write(f'Данные: {counts}')
+            self.analyze()
+            after = self.report('after', options['repeat'])
+            self.restore_old_indexes()
+            before = self.report('before', options['repeat'])
+            for name in after:
+                self.stdout.write(
+                    f'{name}: {before[name]:.2f} мс -> {after[name]:.2f} мс')
+            transaction.set_rollback(True)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from reviews import models
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт сохранённого рейтинга произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить рейтинг, не изменяя данные.'
+        )
+
+    def get_mismatches(self) -> list:
+        """Произведения, у которых рейтинг расходится с отзывами."""
+        actual = models.Title.objects.annotate(
+            actual_sum=Sum('reviews__score'),
+            actual_count=Count('reviews')
+        ).values_list('pk', 'rating_sum', 'rating_count',
+                      'actual_sum', 'actual_count')
+        return [
+            pk for pk, rating_sum, rating_count, actual_sum, actual_count
+            in actual.iterator()
+            if (rating_sum, rating_count) != (actual_sum or 0, actual_count)
+        ]
+
+    def handle(self, *args, **options):
+        mismatches = self.get_mismatches()
+        if options['check']:
+            for pk in mismatches:
+                self.stdout.write(f'Рейтинг устарел: title_id={pk}')
+            self.stdout.write(f'Расхождений: {len(mismatches)}')
+            return
+        updated = models.Title.objects.all().rebuild_rating()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {updated}, '
+            f'исправлено расхождений: {len(mismatches)}'
+        ))
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from reviews import models, stats
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт распределений оценок произведений и статистики '
+            'категорий и жанров.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить статистику, не изменяя данные.'
+        )
+
+    def get_score_mismatches(self) -> set:
+        """Произведения, у которых распределение расходится с отзывами."""
+        actual = {
+            (title, score): count for title, score, count in
+            models.TitleScore.objects.filter(count__gt=0).values_list(
+                'title', 'score', 'count').iterator()
+        }
+        expected = {
+            (title, score): count for title, score, count in
+            models.Review.objects.order_by().values_list(
+                'title', 'score').annotate(Count('pk')).iterator()
+        }
+        return {
+            title for title, _ in actual.keys() ^ expected.keys()
+        } | {
+            title for (title, score), count in expected.items()
+            if actual.get((title, score)) != count
+        }
+
+    def get_group_mismatches(self, stats_model, key: str, totals) -> set:
+        actual = {
+            pk: (count, score) for pk, count, score in
+            stats_model.objects.exclude(reviews_count=0, score_sum=0)
+            .values_list(key, 'reviews_count', 'score_sum')
+        }
+        expected = {
+            row[key]: (row['count'], row['score']) for row in totals
+            if row['count'] or row['score']
+        }
+        return {
+            pk for pk in actual.keys() | expected.keys()
+            if actual.get(pk) != expected.get(pk)
+        }
+
+    def check(self) -> None:
+        mismatches = {
+            'title_id': self.get_score_mismatches(),
+            'category_id': self.get_group_mismatches(
+                models.CategoryStats, 'category',
+                stats.get_category_totals()),
+            'genre_id': self.get_group_mismatches(
+                models.GenreStats, 'genre', stats.get_genre_totals()),
+        }
+        for key, pks in mismatches.items():
+            for pk in sorted(pks):
+                self.stdout.write(f'Статистика устарела: {key}={pk}')
+        self.stdout.write(
+            f'Расхождений: {sum(map(len, mismatches.values()))}')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self.check()
+            return
+        # Статистика групп складывается из рейтинга произведений.
+        models.Title.objects.all().rebuild_rating()
+        rows = stats.rebuild_scores()
+        stats.rebuild_groups()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано распределений: {rows}, статистика категорий '
+            f'и жанров обновлена'
+        ))
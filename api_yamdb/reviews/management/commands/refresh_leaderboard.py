@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from reviews.leaderboard import (LEADERBOARD_SIZE, MIN_REVIEWS,
+                                 WEIGHTING_BAYESIAN, WEIGHTINGS,
+                                 refresh_leaderboard)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг лучших произведений: общий, '
+            'по категориям и по жанрам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--weighting',
+            choices=WEIGHTINGS,
+            default=WEIGHTING_BAYESIAN,
+            help='Поправка для произведений с малым числом оценок.'
+        )
+        parser.add_argument(
+            '--min-reviews',
+            type=int,
+            default=MIN_REVIEWS,
+            help='Вес среднего (bayesian) или минимум оценок (minimum).'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=LEADERBOARD_SIZE,
+            help='Число мест в каждом рейтинге.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300,
+            help='Пауза в секундах между пересчётами.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Пересчитать один раз и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            counts = refresh_leaderboard(
+                options['weighting'], options['min_reviews'],
+                options['size'])
+            self.stdout.write(
+                f'Рейтинг обновлён за {time.monotonic() - started:.2f} с: '
+                f'{counts}')
+            if options['once']:
+                break
+            # Между пересчётами соединение с БД не держим.
+            connection.close()
+            time.sleep(options['interval'])
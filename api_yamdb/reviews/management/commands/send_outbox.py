@@ -0,0 +1,47 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from reviews.outbox import MAX_ATTEMPTS, send_batch
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди порциями через одно '
+            'соединение с почтовым сервером.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=MAX_ATTEMPTS,
+            help='После стольких ошибок письмо помечается неотправленным.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                result = send_batch(connection, options['batch_size'],
+                                    options['max_attempts'])
+                if any(result.values()):
+                    self.stdout.write(f'Отправка писем: {result}')
+                    continue
+                if options['once']:
+                    break
+                # Пока очередь пуста, соединение не держим.
+                connection.close()
+                time.sleep(options['interval'])
+        finally:
+            connection.close()
@@ -0,0 +1,31 @@
+"""Метрики Prometheus для команды import_csv.
+
+Команда пишет их в общий каталог PROMETHEUS_MULTIPROC_DIR, откуда
+их отдаёт /metrics веб-приложения.
+"""
+import os
+
+from prometheus_client import Counter, Gauge, multiprocess
+
+IMPORT_ROWS = Counter(
+    'yamdb_import_rows',
+    'Строки CSV, прочитанные import_csv.',
+    ('file',)
+)
+IMPORT_FILES = Counter(
+    'yamdb_import_files',
+    'Файлы, обработанные import_csv.',
+    ('file', 'status')
+)
+IMPORT_RUNNING = Gauge(
+    'yamdb_import_running',
+    'Число выполняющихся запусков import_csv.',
+    multiprocess_mode='livesum'
+)
+
+
+def finish_import() -> None:
+    """Снимает признак выполнения импорта этим процессом."""
+    IMPORT_RUNNING.set(0)
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
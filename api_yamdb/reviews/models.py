@@ -1,6 +1,14 @@
+import threading
+from contextlib import contextmanager
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import (Case, Count, F, FloatField, OuterRef, Q,
+                              Subquery, Sum, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 from . import validators
 
@@ -19,6 +27,9 @@ END_RANGE_CONFIRMATION_CODE = 1000000
 
 NOT_PIN_CONFIRMATION_CODE = '0'
 
+# Произведения, удаляемые в текущем потоке, см. deleting_titles.
+_deleting = threading.local()
+
 MAX_LENGTH_USERNAME = 150
 MAX_LENGTH_CONFIRMATION_CODE = len(str(END_RANGE_CONFIRMATION_CODE)) - 1
 MAX_LENGTH_EMAIL = 254
@@ -26,6 +37,9 @@ MAX_LENGTH_EMAIL = 254
 MINIMAL_SCORE = 1
 MAXIMUM_SCORE = 10
 
+# Поля пользователя, от которых зависят выданные access-токены.
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_active')
+
 
 class User(AbstractUser):
     username = models.CharField(
@@ -59,6 +73,19 @@ class User(AbstractUser):
     def is_moderator(self):
         return self.role == MODERATOR_ROLE
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения, попадающие в токен, для отзыва устаревших токенов.
+        instance._loaded_claims = instance.get_token_claims()
+        # Имя входит в представление отзывов и комментариев автора.
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
+    def get_token_claims(self) -> dict:
+        return {field: self.__dict__.get(field)
+                for field in TOKEN_CLAIM_FIELDS}
+
     class Meta:
         ordering = ['username']
 
@@ -74,6 +101,17 @@ class PubDateModel(models.Model):
         abstract = True
 
 
+class ModifiedDateModel(models.Model):
+    """Абстрактная модель. Добавляет дату последнего изменения."""
+    modified = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+
+    class Meta:
+        abstract = True
+
+
 class BaseReviewComment(models.Model):
     text = models.TextField()
     author = models.ForeignKey(
@@ -83,10 +121,12 @@ class BaseReviewComment(models.Model):
 
     class Meta:
         abstract = True
-        ordering = ['text']
+        # Новые записи первыми; порядок совпадает с индексами
+        # (title, -pub_date, -id) и (review, -pub_date, -id).
+        ordering = ['-pub_date', '-id']
 
 
-class Review(BaseReviewComment, PubDateModel):
+class Review(BaseReviewComment, PubDateModel, ModifiedDateModel):
     score = models.IntegerField(validators=[
         MaxValueValidator(
             limit_value=MAXIMUM_SCORE,
@@ -96,15 +136,23 @@ class Review(BaseReviewComment, PubDateModel):
             message=f'Оценка не может быть меньше {MINIMAL_SCORE}'
         )
     ])
+    # Отдельный индекс не нужен: title_id ведёт составной индекс.
     title = models.ForeignKey(
         'Title',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta(BaseReviewComment.Meta):
         default_related_name = 'reviews'
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -112,20 +160,35 @@ class Review(BaseReviewComment, PubDateModel):
             )
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка на момент загрузки нужна для пересчёта рейтинга;
+        # отложенное поле не загружается.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
-class Comment(BaseReviewComment, PubDateModel):
+class Comment(BaseReviewComment, PubDateModel, ModifiedDateModel):
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
+        db_index=False
     )
 
     class Meta(BaseReviewComment.Meta):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Коментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            )
+        ]
 
 
-class BaseGenreCategory(models.Model):
+class BaseGenreCategory(ModifiedDateModel):
     slug = models.SlugField('Слаг', unique=True, max_length=50)
     name = models.CharField('Название', max_length=256)
 
@@ -149,7 +212,68 @@ class Genre(BaseGenreCategory):
         verbose_name_plural = 'Жанры'
 
 
-class Title(models.Model):
+@contextmanager
+def deleting_titles(pks):
+    """Отмечает произведения, удаляемые вместе с отзывами.
+
+    Отзывы таких произведений не сдвигают статистику по одному:
+    итоги произведения вычитаются одним проходом, см. reviews.signals.
+    """
+    previous = getattr(_deleting, 'titles', frozenset())
+    _deleting.titles = previous | frozenset(pks)
+    try:
+        yield
+    finally:
+        _deleting.titles = previous
+
+
+def is_title_deleting(pk) -> bool:
+    return pk in getattr(_deleting, 'titles', ())
+
+
+class TitleQuerySet(models.QuerySet):
+    def delete(self):
+        with deleting_titles(self.values_list('pk', flat=True)):
+            return super().delete()
+
+    def update_rating(self, score_delta: int, count_delta: int = 0) -> int:
+        """Атомарно сдвигает сумму и количество оценок."""
+        self.update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta
+        )
+        return self.set_rating()
+
+    def set_rating(self) -> int:
+        """Пересчитывает средний рейтинг из суммы и количества оценок."""
+        return self.update(
+            rating=Case(
+                When(rating_count=0, then=None),
+                default=Cast('rating_sum', FloatField()) / F('rating_count'),
+                output_field=FloatField()
+            ),
+            modified=timezone.now()
+        )
+
+    def touch(self) -> int:
+        """Обновляет дату изменения, не загружая произведения."""
+        return self.update(modified=timezone.now())
+
+    def rebuild_rating(self) -> int:
+        """Полный пересчёт рейтинга по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        self.update(
+            rating_sum=Coalesce(Subquery(
+                reviews.annotate(total=Sum('score')).values('total')), 0),
+            rating_count=Coalesce(Subquery(
+                reviews.annotate(total=Count('pk')).values('total')), 0)
+        )
+        return self.set_rating()
+
+
+class Title(ModifiedDateModel):
     name = models.CharField('Название', max_length=200)
     year = models.IntegerField(
         validators=[validators.validate_year_title],
@@ -162,8 +286,22 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         related_name='titles',
         blank=True,
-        null=True
+        null=True,
+        db_index=False
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0
+    )
+    rating = models.FloatField('Рейтинг', null=True, blank=True)
+    # Заполняется триггером PostgreSQL, см. reviews.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Изменение названия или описания: версия индекса поиска без
+    # PostgreSQL, изменение рейтинга её не сдвигает.
+    text_modified = models.DateTimeField(null=True, editable=False)
+
+    objects = TitleQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -172,3 +310,195 @@ class Title(models.Model):
         ordering = ('name',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['year'], name='title_year_idx'),
+            # Заменяет индекс category_id: фильтр по категории и году,
+            # обнуление category_id при удалении категории.
+            models.Index(
+                fields=['category', 'year'],
+                name='title_category_year_idx',
+                condition=Q(category__isnull=False)
+            ),
+            # Лучшие произведения категории, см. reviews.stats.
+            models.Index(
+                fields=['category', '-rating'],
+                name='title_category_rating_idx',
+                condition=Q(category__isnull=False, rating__isnull=False)
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Прежняя категория нужна для переноса статистики.
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        instance._loaded_text = instance.get_text()
+        return instance
+
+    def get_text(self) -> tuple:
+        return self.__dict__.get('name'), self.__dict__.get('description')
+
+    def delete(self, *args, **kwargs):
+        with deleting_titles([self.pk]):
+            return super().delete(*args, **kwargs)
+
+
+class TitleScore(models.Model):
+    """Число оценок произведения с одним значением."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        db_index=False
+    )
+    score = models.PositiveSmallIntegerField('Оценка')
+    # Без проверки >= 0: CHECK применяется к вставляемой строке раньше
+    # ON CONFLICT, а вычитание передаёт отрицательное значение.
+    count = models.IntegerField('Количество оценок', default=0)
+
+    class Meta:
+        ordering = ('title', 'score')
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+        constraints = [
+            # Нужен для INSERT ... ON CONFLICT, см. reviews.stats.
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            )
+        ]
+
+
+class BaseGroupStats(models.Model):
+    """Сумма оценок и число отзывов произведений группы."""
+    # Без проверки >= 0, как и TitleScore.count.
+    reviews_count = models.IntegerField('Количество отзывов', default=0)
+    score_sum = models.IntegerField('Сумма оценок', default=0)
+
+    @property
+    def rating(self):
+        if self.reviews_count <= 0:
+            return None
+        return self.score_sum / self.reviews_count
+
+    class Meta:
+        abstract = True
+
+
+class CategoryStats(BaseGroupStats):
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+
+    class Meta(BaseGroupStats.Meta):
+        verbose_name = 'Статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+
+class GenreStats(BaseGroupStats):
+    genre = models.OneToOneField(
+        Genre,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+
+    class Meta(BaseGroupStats.Meta):
+        verbose_name = 'Статистика жанра'
+        verbose_name_plural = 'Статистика жанров'
+
+
+LEADERBOARD_ALL = 'all'
+LEADERBOARD_CATEGORY = 'category'
+LEADERBOARD_GENRE = 'genre'
+
+LEADERBOARD_SCOPE_CHOICES = (
+    (LEADERBOARD_ALL, 'Все произведения'),
+    (LEADERBOARD_CATEGORY, 'Категория'),
+    (LEADERBOARD_GENRE, 'Жанр')
+)
+
+
+class LeaderboardEntry(models.Model):
+    """Место произведения в рейтинге, см. reviews.leaderboard."""
+    scope = models.CharField(
+        'Рейтинг',
+        max_length=max(len(scope) for scope, _ in LEADERBOARD_SCOPE_CHOICES),
+        choices=LEADERBOARD_SCOPE_CHOICES
+    )
+    # id категории или жанра, 0 в общем рейтинге.
+    group_id = models.PositiveIntegerField('Категория или жанр', default=0)
+    position = models.PositiveIntegerField('Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField('Взвешенный рейтинг')
+
+    def __str__(self):
+        return f'{self.scope}:{self.group_id} #{self.position}'
+
+    class Meta:
+        ordering = ('scope', 'group_id', 'position')
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        constraints = [
+            # Страница рейтинга - диапазон мест по этому индексу.
+            models.UniqueConstraint(
+                fields=['scope', 'group_id', 'position'],
+                name='unique_leaderboard_position'
+            )
+        ]
+
+
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+
+OUTBOX_STATUS_CHOICES = (
+    (OUTBOX_PENDING, 'Ожидает отправки'),
+    (OUTBOX_SENT, 'Отправлено'),
+    (OUTBOX_FAILED, 'Не отправлено')
+)
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой send_outbox."""
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=MAX_LENGTH_EMAIL)
+    # Адреса получателей, по одному на строку.
+    recipients = models.TextField('Получатели')
+    status = models.CharField(
+        'Статус',
+        max_length=max(len(status) for status, _ in OUTBOX_STATUS_CHOICES),
+        choices=OUTBOX_STATUS_CHOICES,
+        default=OUTBOX_PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после', default=timezone.now)
+    sent = models.DateTimeField('Дата отправки', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
+
+    class Meta:
+        ordering = ('send_after', 'id')
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            # Очередь выбирает только ожидающие письма.
+            models.Index(
+                fields=['send_after', 'id'],
+                name='outbox_pending_idx',
+                condition=Q(status=OUTBOX_PENDING)
+            ),
+        ]
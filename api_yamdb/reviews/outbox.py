@@ -0,0 +1,104 @@
+"""Очередь исходящих писем.
+
+Письма сохраняются в таблицу OutgoingEmail в транзакции запроса и
+отправляются командой send_outbox через одно SMTP-соединение. Воркер
+коротко блокирует порцию писем, переносит их send_after на CLAIM_TIMEOUT
+вперёд и отправляет уже вне транзакции: письма, которые воркер не успел
+отправить, после этого срока забирает следующий.
+"""
+import datetime as dt
+import smtplib
+from typing import List
+
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT, OutgoingEmail
+
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = dt.timedelta(minutes=5)
+RETRY_DELAY = dt.timedelta(seconds=30)
+MAX_RETRY_DELAY = dt.timedelta(hours=1)
+
+
+def enqueue_mail(subject: str, message: str, from_email: str,
+                 recipient_list: List[str]) -> OutgoingEmail:
+    """Ставит письмо в очередь; аргументы как у send_mail."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients='\n'.join(recipient_list)
+    )
+
+
+def get_retry_delay(attempts: int) -> dt.timedelta:
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def send_one(email: OutgoingEmail, connection) -> None:
+    # Открытое заранее соединение бэкенд не закрывает после отправки.
+    connection.open()
+    EmailMessage(
+        email.subject, email.body, email.from_email,
+        email.recipients.splitlines(), connection=connection
+    ).send()
+
+
+def mark_failed(email: OutgoingEmail, error: Exception, now,
+                max_attempts: int) -> None:
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= max_attempts:
+        email.status = OUTBOX_FAILED
+    else:
+        email.send_after = now + get_retry_delay(email.attempts)
+
+
+def claim_batch(batch_size: int, max_attempts: int) -> List[OutgoingEmail]:
+    """Забирает порцию писем и засчитывает им попытку.
+
+    Строки блокируются с SKIP LOCKED только до конца транзакции, поэтому
+    несколько воркеров не получат одни и те же письма. Письма, попытки
+    которых исчерпаны без ответа (воркер остановился посреди отправки),
+    помечаются неотправленными.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(OutgoingEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=OUTBOX_PENDING, send_after__lte=now
+        ).values_list('pk', flat=True)[:batch_size])
+        claimed = OutgoingEmail.objects.filter(pk__in=pks)
+        claimed.filter(attempts__gte=max_attempts).update(
+            status=OUTBOX_FAILED, last_error='Отправка прервана')
+        claimed.filter(attempts__lt=max_attempts).update(
+            attempts=F('attempts') + 1, send_after=now + CLAIM_TIMEOUT)
+        return list(claimed.filter(status=OUTBOX_PENDING))
+
+
+def send_batch(connection, batch_size: int,
+               max_attempts: int = MAX_ATTEMPTS) -> dict:
+    """Отправляет очередную порцию писем.
+
+    SMTP-запросы идут вне транзакции, результат каждого письма
+    сохраняется сразу после его отправки.
+    """
+    result = {OUTBOX_SENT: 0, OUTBOX_PENDING: 0, OUTBOX_FAILED: 0}
+    for email in claim_batch(batch_size, max_attempts):
+        try:
+            send_one(email, connection)
+        except (smtplib.SMTPException, OSError) as error:
+            mark_failed(email, error, timezone.now(), max_attempts)
+            # Соединение могло оборваться, следующее письмо откроет новое.
+            connection.close()
+        else:
+            email.status = OUTBOX_SENT
+            email.sent = timezone.now()
+        email.save(update_fields=(
+            'status', 'last_error', 'send_after', 'sent'))
+        result[email.status] += 1
+    return result
@@ -0,0 +1,194 @@
+"""Полнотекстовый поиск произведений.
+
+На PostgreSQL поиск идёт по колонке search_vector (tsvector), которую
+заполняет триггер, с GIN-индексом; нечёткий поиск использует pg_trgm.
+На остальных СУБД используется инвертированный индекс в памяти процесса.
+В обоих случаях должны совпасть все слова запроса, каждое - как начало
+слова текста; PostgreSQL дополнительно приводит слова к основе.
+"""
+import logging
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Case, Count, F, IntegerField, Max, When
+
+SEARCH_CONFIG = 'russian'
+NAME_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+MAX_FALLBACK_RESULTS = 1000
+
+logger = logging.getLogger(__name__)
+_trigram = {}
+
+INSTALL_SQL = (
+    f"""
+    CREATE OR REPLACE FUNCTION reviews_title_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector ON reviews_title',
+    """
+    CREATE TRIGGER reviews_title_search_vector
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update()
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS reviews_title_search_vector_gin
+    ON reviews_title USING gin (search_vector)
+    """,
+    # Заполняет колонку для строк, записанных до установки триггера.
+    """
+    UPDATE reviews_title SET name = name WHERE search_vector IS NULL
+    """,
+)
+
+# Индекс ускоряет и нечёткий поиск, и фильтр name__contains.
+TRIGRAM_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    CREATE INDEX IF NOT EXISTS reviews_title_name_trgm
+    ON reviews_title USING gin (name gin_trgm_ops)
+    """,
+)
+
+
+def install_search(using='default', **kwargs):
+    """Создаёт триггер и индексы поиска (обработчик post_migrate)."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for sql in INSTALL_SQL:
+            cursor.execute(sql)
+        try:
+            with transaction.atomic(using=using):
+                for sql in TRIGRAM_SQL:
+                    cursor.execute(sql)
+        except DatabaseError as error:
+            logger.warning('Расширение pg_trgm недоступно: %s', error)
+
+
+def has_trigram(connection) -> bool:
+    """Установлено ли расширение pg_trgm (проверяется один раз)."""
+    if connection.alias not in _trigram:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram[connection.alias] = cursor.fetchone() is not None
+    return _trigram[connection.alias]
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'\w+', (text or '').lower())
+
+
+class InvertedIndex:
+    """Инвертированный индекс названий и описаний произведений.
+
+    Слова запроса ищутся по префиксу, должны совпасть все слова,
+    результаты ранжируются по сумме tf-idf с весами полей.
+    """
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for pk, name, description in rows:
+            self.size += 1
+            for text, weight in ((name, NAME_WEIGHT),
+                                 (description, DESCRIPTION_WEIGHT)):
+                for token in tokenize(text):
+                    postings = self.postings[token]
+                    postings[pk] = postings.get(pk, 0) + weight
+        self.tokens = sorted(self.postings)
+
+    def match(self, prefix: str) -> Dict[int, float]:
+        scores = defaultdict(float)
+        position = bisect_left(self.tokens, prefix)
+        while (position < len(self.tokens)
+               and self.tokens[position].startswith(prefix)):
+            postings = self.postings[self.tokens[position]]
+            idf = math.log(1 + self.size / len(postings))
+            for pk, frequency in postings.items():
+                scores[pk] += frequency * idf
+            position += 1
+        return scores
+
+    def search(self, query: str) -> List[int]:
+        scores = None
+        for token in tokenize(query):
+            matches = self.match(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    pk: score + matches[pk]
+                    for pk, score in scores.items() if pk in matches
+                }
+        if not scores:
+            return []
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+_fallback_lock = threading.Lock()
+_fallback = {'version': None, 'index': None}
+
+
+def get_fallback_index(model) -> InvertedIndex:
+    """Индекс процесса, перестраиваемый при изменении произведений.
+
+    Перестраивается при добавлении и удалении произведений и изменении
+    названия или описания, но не рейтинга.
+    """
+    version = model.objects.aggregate(
+        count=Count('pk'), last=Max('pk'), modified=Max('text_modified'))
+    with _fallback_lock:
+        if _fallback['version'] != version:
+            _fallback['index'] = InvertedIndex(model.objects.values_list(
+                'pk', 'name', 'description').iterator())
+            _fallback['version'] = version
+        return _fallback['index']
+
+
+def get_prefix_query(query: str) -> str:
+    """Запрос to_tsquery: все слова запроса как префиксы."""
+    return ' & '.join(f"'{token}':*" for token in tokenize(query))
+
+
+def search_titles(queryset, query: str, fuzzy: bool = False):
+    """Фильтрует произведения по запросу и сортирует по релевантности."""
+    connection = connections[queryset.db]
+    if not tokenize(query):
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        if fuzzy and has_trigram(connection):
+            return queryset.filter(name__trigram_similar=query).annotate(
+                search_rank=TrigramSimilarity('name', query)
+            ).order_by('-search_rank', 'pk')
+        search_query = SearchQuery(get_prefix_query(query),
+                                   config=SEARCH_CONFIG, search_type='raw')
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', 'pk')
+    ranked = get_fallback_index(queryset.model).search(query)
+    ranked = ranked[:MAX_FALLBACK_RESULTS]
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(pk__in=ranked).annotate(search_rank=Case(
+        *(When(pk=pk, then=position) for position, pk in enumerate(ranked)),
+        output_field=IntegerField()
+    )).order_by('search_rank')
@@ -0,0 +1,112 @@
+"""Синтетический набор данных для бенчмарков и проверки планов запросов."""
+import random
+from typing import Dict, List
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+
+from . import models, stats
+
+BATCH_SIZE = 1000
+YEARS = (1950, 2020)
+
+
+def next_pk(model, using: str) -> int:
+    return (model.objects.using(using).aggregate(
+        last=Max('pk'))['last'] or 0) + 1
+
+
+def batch_size(model, objects: list, using: str) -> int:
+    # SQLite ограничивает число строк и параметров в одном INSERT.
+    return max(min(BATCH_SIZE, connections[using].ops.bulk_batch_size(
+        model._meta.concrete_fields, objects)), 1)
+
+
+def bulk_insert(model, objects: list, using: str) -> List[int]:
+    """Вставляет объекты с заранее назначенными pk и возвращает их."""
+    first = next_pk(model, using)
+    for pk, obj in enumerate(objects, first):
+        obj.pk = pk
+    model.objects.using(using).bulk_create(
+        objects, batch_size=batch_size(model, objects, using))
+    return list(range(first, first + len(objects)))
+
+
+def seed_dataset(users: int = 100, categories: int = 5, genres: int = 20,
+                 titles: int = 1000, reviews_per_title: int = 10,
+                 comments_per_review: int = 2, seed: int = 0,
+                 using: str = 'default') -> Dict[str, int]:
+    """Создаёт связанный набор данных заданного размера.
+
+    Записи вставляются пачками в обход сигналов, рейтинг произведений
+    пересчитывается в конце. Возвращает количество созданных записей.
+    """
+    rng = random.Random(seed)
+    reviews_per_title = min(reviews_per_title, users)
+    with transaction.atomic(using=using):
+        start = next_pk(models.User, using)
+        user_ids = bulk_insert(models.User, [
+            models.User(username=f'bench_{start + i}',
+                        email=f'bench_{start + i}@yamdb.fake')
+            for i in range(users)
+        ], using)
+        category_ids = bulk_insert(models.Category, [
+            models.Category(name=f'Категория {i}',
+                            slug=f'bench-category-{start}-{i}')
+            for i in range(categories)
+        ], using)
+        genre_ids = bulk_insert(models.Genre, [
+            models.Genre(name=f'Жанр {i}', slug=f'bench-genre-{start}-{i}')
+            for i in range(genres)
+        ], using)
+        title_ids = bulk_insert(models.Title, [
+            models.Title(name=f'Произведение {rng.randrange(10 ** 6)}',
+                         year=rng.randint(*YEARS),
+                         description=f'Описание {i}',
+                         category_id=rng.choice(category_ids))
+            for i in range(titles)
+        ], using)
+        through = models.Title.genre.through
+        links = [
+            through(title_id=title_id, genre_id=genre_id)
+            for title_id in title_ids
+            for genre_id in rng.sample(genre_ids, min(2, genres))
+        ]
+        through.objects.using(using).bulk_create(
+            links, batch_size=batch_size(through, links, using))
+        review_ids = bulk_insert(models.Review, [
+            models.Review(title_id=title_id, author_id=author_id,
+                          text=f'Отзыв {rng.randrange(10 ** 6)}',
+                          score=rng.randint(models.MINIMAL_SCORE,
+                                            models.MAXIMUM_SCORE))
+            for title_id in title_ids
+            for author_id in rng.sample(user_ids, reviews_per_title)
+        ], using)
+        comment_ids = bulk_insert(models.Comment, [
+            models.Comment(review_id=review_id,
+                           author_id=rng.choice(user_ids),
+                           text=f'Комментарий {rng.randrange(10 ** 6)}')
+            for review_id in review_ids
+            for _ in range(comments_per_review)
+        ], using)
+        titles = models.Title.objects.using(using).filter(
+            pk__gte=title_ids[0] if title_ids else 0)
+        titles.rebuild_rating()
+        stats.rebuild_scores(titles)
+        stats.rebuild_groups()
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [
+                models.User, models.Category, models.Genre, models.Title,
+                models.Review, models.Comment
+            ]):
+                cursor.execute(sql)
+    return {
+        'users': len(user_ids),
+        'categories': len(category_ids),
+        'genres': len(genre_ids),
+        'titles': len(title_ids),
+        'reviews': len(review_ids),
+        'comments': len(comment_ids),
+    }
@@ -0,0 +1,163 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import leaderboard, stats
+from .models import (Category, CategoryStats, Comment, Genre, GenreStats,
+                     Review, Title, User, is_title_deleting)
+
+
+def score_changed(update_fields) -> bool:
+    return update_fields is None or 'score' in update_fields
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, update_fields, **kwargs):
+    """Читает прежнюю оценку, если отзыв загружен без неё."""
+    if (instance._state.adding or not score_changed(update_fields)
+            or getattr(instance, '_loaded_score', None) is not None):
+        return
+    instance._loaded_score = Review.objects.filter(
+        pk=instance.pk).values_list('score', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, update_fields, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    if not score_changed(update_fields):
+        return
+    titles = Title.objects.filter(pk=instance.title_id)
+    old_score = getattr(instance, '_loaded_score', None)
+    if created:
+        titles.update_rating(instance.score, 1)
+        stats.shift_scores(instance.title_id, {instance.score: 1})
+        stats.shift_title_groups(instance.title_id, 1, instance.score)
+    elif old_score is not None and old_score != instance.score:
+        titles.update_rating(instance.score - old_score)
+        stats.shift_scores(instance.title_id,
+                           {old_score: -1, instance.score: 1})
+        stats.shift_title_groups(
+            instance.title_id, 0, instance.score - old_score)
+    instance._loaded_score = instance.score
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, **kwargs):
+    """Исключает оценку из статистики.
+
+    До удаления: при удалении произведения его связи с жанрами могут
+    удалиться раньше отзывов.
+    """
+    if is_title_deleting(instance.title_id):
+        return
+    stats.shift_scores(instance.title_id, {instance.score: -1})
+    stats.shift_title_groups(instance.title_id, -1, -instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга."""
+    if is_title_deleting(instance.title_id):
+        return
+    Title.objects.filter(pk=instance.title_id).update_rating(
+        -instance.score, -1
+    )
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    """Вычитает итоги удаляемого произведения одним проходом.
+
+    Отзывы произведения удаляются без пересчёта, распределение оценок
+    и места в рейтингах удаляются каскадом.
+    """
+    if is_title_deleting(instance.pk):
+        stats.remove_title_groups(instance.pk)
+    instance._leaderboards = leaderboard.get_title_boards(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Закрывает пропуски мест в рейтингах удалённого произведения."""
+    leaderboard.renumber(getattr(instance, '_leaderboards', ()))
+
+
+@receiver(pre_save, sender=Title)
+def title_saving(sender, instance, **kwargs):
+    """Отмечает изменение текста, по которому ищутся произведения."""
+    loaded = getattr(instance, '_loaded_text', None)
+    if not instance._state.adding and loaded != instance.get_text():
+        instance.text_modified = timezone.now()
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, **kwargs):
+    """Переносит итоги произведения в статистику новой категории."""
+    old_category_id = getattr(instance, '_loaded_category_id', None)
+    if not created and old_category_id != instance.category_id:
+        totals = stats.get_totals([instance.pk])
+        stats.shift_groups(CategoryStats, 'category',
+                           {old_category_id: totals}, -1)
+        stats.shift_groups(CategoryStats, 'category',
+                           {instance.category_id: totals})
+    instance._loaded_category_id = instance.category_id
+    instance._loaded_text = instance.get_text()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """Название категории входит в представление произведения."""
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    """Название жанра входит в представление произведения."""
+    Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Имя автора входит в представление отзывов и комментариев."""
+    old_username = getattr(instance, '_loaded_username', None)
+    if not created and old_username != instance.username:
+        now = timezone.now()
+        Review.objects.filter(author=instance).update(modified=now)
+        Comment.objects.filter(author=instance).update(modified=now)
+    instance._loaded_username = instance.username
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genre_changed(sender, instance, action, reverse, pk_set,
+                        **kwargs):
+    if not reverse and action.startswith('post_'):
+        titles = Title.objects.filter(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        titles = Title.objects.filter(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        titles = Title.objects.filter(genre=instance)
+    else:
+        return
+    titles.touch()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genre_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """Переносит итоги произведений в статистику жанров."""
+    sign = {'post_add': 1, 'post_remove': -1, 'pre_clear': -1}.get(action)
+    if sign is None:
+        return
+    if action == 'pre_clear':
+        links = sender.objects.filter(
+            **{'genre' if reverse else 'title': instance})
+        pk_set = set(links.values_list(
+            'title_id' if reverse else 'genre_id', flat=True))
+    if reverse:
+        totals = {instance.pk: stats.get_totals(pk_set)}
+    else:
+        title_totals = stats.get_totals([instance.pk])
+        totals = dict.fromkeys(pk_set, title_totals)
+    stats.shift_groups(GenreStats, 'genre', totals, sign)
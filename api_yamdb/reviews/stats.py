@@ -0,0 +1,189 @@
+"""Предрассчитанная статистика оценок.
+
+TitleScore хранит распределение оценок произведения, CategoryStats и
+GenreStats - число отзывов и сумму оценок произведений группы.
+Сигналы отзывов сдвигают счётчики одним запросом
+INSERT ... ON CONFLICT DO UPDATE на таблицу (PostgreSQL и SQLite 3.24+),
+поэтому строки статистики не нужно создавать заранее. Полный пересчёт
+выполняет rebuild_stats.
+"""
+from typing import Dict, Iterable, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .models import (MAXIMUM_SCORE, MINIMAL_SCORE, Category, CategoryStats,
+                     Genre, GenreStats, Review, Title, TitleScore)
+
+TOP_TITLES_LIMIT = 10
+MAX_TOP_TITLES_LIMIT = 50
+
+GENRE_LINKS = Title.genre.through
+
+
+def _table(model) -> str:
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, field: str) -> str:
+    return connection.ops.quote_name(model._meta.get_field(field).column)
+
+
+def _upsert_groups(model, key: str, select_sql: str, params) -> None:
+    """Прибавляет к счётчикам групп строки (группа, отзывы, сумма)."""
+    table = _table(model)
+    key = _column(model, key)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({key}, reviews_count, score_sum) '
+            f'{select_sql} ON CONFLICT ({key}) DO UPDATE SET '
+            f'reviews_count = {table}.reviews_count '
+            f'+ EXCLUDED.reviews_count, '
+            f'score_sum = {table}.score_sum + EXCLUDED.score_sum',
+            params
+        )
+
+
+def _values(rows: list) -> str:
+    return 'VALUES ' + ', '.join(['(%s, %s, %s)'] * len(rows))
+
+
+def shift_scores(title_id: int, changes: Dict[int, int]) -> None:
+    """Сдвигает число оценок произведения: {оценка: изменение}."""
+    rows = [(title_id, score, delta)
+            for score, delta in changes.items() if delta]
+    if not rows:
+        return
+    table = _table(TitleScore)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (title_id, score, count) {_values(rows)} '
+            f'ON CONFLICT (title_id, score) DO UPDATE SET '
+            f'count = {table}.count + EXCLUDED.count',
+            [value for row in rows for value in row]
+        )
+
+
+def shift_title_groups(title_id: int, count_delta: int,
+                       score_delta: int) -> None:
+    """Сдвигает статистику категории и жанров произведения."""
+    if not count_delta and not score_delta:
+        return
+    _upsert_groups(
+        CategoryStats, 'category',
+        f'SELECT category_id, %s, %s FROM {_table(Title)} '
+        f'WHERE id = %s AND category_id IS NOT NULL',
+        (count_delta, score_delta, title_id)
+    )
+    _upsert_groups(
+        GenreStats, 'genre',
+        f'SELECT genre_id, %s, %s FROM {_table(GENRE_LINKS)} '
+        f'WHERE title_id = %s',
+        (count_delta, score_delta, title_id)
+    )
+
+
+def remove_title_groups(title_id: int) -> None:
+    """Вычитает итоги произведения из статистики его категории и жанров."""
+    title = _table(Title)
+    _upsert_groups(
+        CategoryStats, 'category',
+        f'SELECT category_id, -rating_count, -rating_sum FROM {title} '
+        f'WHERE id = %s AND category_id IS NOT NULL',
+        (title_id,)
+    )
+    _upsert_groups(
+        GenreStats, 'genre',
+        f'SELECT link.genre_id, -title.rating_count, -title.rating_sum '
+        f'FROM {_table(GENRE_LINKS)} link '
+        f'JOIN {title} title ON title.id = link.title_id '
+        f'WHERE link.title_id = %s',
+        (title_id,)
+    )
+
+
+def shift_groups(model, key: str, totals: Dict[int, Tuple[int, int]],
+                 sign: int = 1) -> None:
+    """Прибавляет (или вычитает) итоги произведений к группам."""
+    rows = [(group_id, sign * count, sign * score)
+            for group_id, (count, score) in totals.items()
+            if group_id is not None and (count or score)]
+    if rows:
+        _upsert_groups(model, key, _values(rows),
+                       [value for row in rows for value in row])
+
+
+def get_totals(title_ids: Iterable[int]) -> Tuple[int, int]:
+    """Суммарные число отзывов и сумма оценок произведений."""
+    totals = Title.objects.filter(pk__in=title_ids).aggregate(
+        count=Sum('rating_count'), score=Sum('rating_sum'))
+    return totals['count'] or 0, totals['score'] or 0
+
+
+def rebuild_scores(titles=None) -> int:
+    """Пересчёт распределений оценок по таблице отзывов."""
+    titles = Title.objects.all() if titles is None else titles
+    with transaction.atomic():
+        TitleScore.objects.filter(title__in=titles).delete()
+        counts = Review.objects.filter(title__in=titles).order_by().values(
+            'title', 'score').annotate(total=Count('pk'))
+        rows = TitleScore.objects.bulk_create([
+            TitleScore(title_id=row['title'], score=row['score'],
+                       count=row['total'])
+            for row in counts.iterator()
+        ])
+    return len(rows)
+
+
+def _rebuild_groups(stats_model, group_model, key: str, totals) -> None:
+    totals = {
+        row[key]: (row['count'] or 0, row['score'] or 0)
+        for row in totals.iterator()
+    }
+    with transaction.atomic():
+        stats_model.objects.all().delete()
+        stats_model.objects.bulk_create(
+            stats_model(**{f'{key}_id': pk},
+                        reviews_count=totals.get(pk, (0, 0))[0],
+                        score_sum=totals.get(pk, (0, 0))[1])
+            for pk in group_model.objects.values_list('pk', flat=True)
+        )
+
+
+def get_category_totals():
+    """Итоги произведений по категориям из их рейтинга."""
+    return Title.objects.filter(category__isnull=False).order_by().values(
+        'category').annotate(count=Sum('rating_count'),
+                             score=Sum('rating_sum'))
+
+
+def get_genre_totals():
+    """Итоги произведений по жанрам из их рейтинга."""
+    return GENRE_LINKS.objects.order_by().values('genre').annotate(
+        count=Sum('title__rating_count'), score=Sum('title__rating_sum'))
+
+
+def rebuild_groups() -> None:
+    """Пересчёт статистики категорий и жанров по рейтингу произведений."""
+    _rebuild_groups(CategoryStats, Category, 'category',
+                    get_category_totals())
+    _rebuild_groups(GenreStats, Genre, 'genre', get_genre_totals())
+
+
+def get_title_scores(title: Title) -> Dict[str, int]:
+    """Распределение оценок со всеми значениями шкалы."""
+    scores = dict.fromkeys(map(str, range(MINIMAL_SCORE, MAXIMUM_SCORE + 1)),
+                           0)
+    scores.update(
+        (str(score), count) for score, count in
+        title.score_counts.filter(count__gt=0).values_list('score', 'count')
+    )
+    return scores
+
+
+def get_top_titles(group, limit: int = TOP_TITLES_LIMIT):
+    """Произведения категории или жанра с наибольшим рейтингом."""
+    lookup = 'category' if isinstance(group, Category) else 'genre'
+    return Title.objects.filter(
+        **{lookup: group}, rating__isnull=False
+    ).order_by('-rating', '-rating_count', 'pk')[:limit]
@@ -0,0 +1,53 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from reviews.models import Genre, Review, Title
+
+
+class ExportDataTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('import_csv', stdout=StringIO())
+
+    def setUp(self):
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output.cleanup)
+
+    def test_csv_mirrors_import_layout(self):
+        call_command('export_data', self.output.name, stdout=StringIO())
+        with open(os.path.join(self.output.name, 'review.csv')) as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), Review.objects.count())
+        self.assertEqual(
+            list(rows[0]),
+            ['id', 'title_id', 'text', 'author', 'score', 'pub_date'])
+        self.assertEqual(len(os.listdir(self.output.name)), 7)
+
+    def read_jsonl(self, name):
+        path = os.path.join(self.output.name, f'{name}.jsonl.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_gzip_jsonl_since(self):
+        Review.objects.update(modified='2000-01-01T00:00Z')
+        Title.objects.update(modified='2000-01-01T00:00Z')
+        # Старый отзыв, изменённый после даты выгрузки.
+        Review.objects.filter(pk=1).update(
+            pub_date='2000-01-01T00:00Z', modified='2002-01-01T00:00Z')
+        title = Title.objects.get(pk=1)
+        title.genre.add(Genre.objects.exclude(
+            pk__in=title.genre.all()).first())
+        call_command('export_data', self.output.name, format='jsonl',
+                     gzip=True, since='2001-01-01', stdout=StringIO())
+        self.assertEqual(
+            [row['id'] for row in self.read_jsonl('review')], [1])
+        self.assertEqual(
+            {row['title_id'] for row in self.read_jsonl('genre_title')},
+            {1})
@@ -0,0 +1,130 @@
+import datetime as dt
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from reviews.management.commands.import_csv import Command
+from reviews.models import Comment, Review, Title, User
+
+
+class ImportCsvTest(TestCase):
+
+    def test_import_in_chunks(self):
+        out = StringIO()
+        call_command('import_csv', chunk_size=7, stdout=out)
+        self.assertIn('строк/с', out.getvalue())
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Title.objects.count(), 32)
+        self.assertEqual(Review.objects.count(), 72)
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertEqual(Title.genre.through.objects.count(), 42)
+        self.assertFalse(
+            Title.objects.filter(reviews__isnull=False, rating=None).exists())
+
+    def test_repeated_import_ignores_existing_rows(self):
+        call_command('import_csv', stdout=StringIO())
+        call_command('import_csv', stdout=StringIO())
+        self.assertEqual(Review.objects.count(), 72)
+
+    def test_copy_falls_back_to_orm(self):
+        err = StringIO()
+        call_command('import_csv', copy=True, stdout=StringIO(), stderr=err)
+        self.assertIn('COPY', err.getvalue())
+        self.assertEqual(Review.objects.count(), 72)
+
+    def test_dependency_graph(self):
+        command = Command()
+        graph = command.build_graph(list(command._MODELS_OR_LINKS))
+        self.assertEqual(graph['users.csv'], set())
+        self.assertEqual(graph['titles.csv'], {'category.csv'})
+        self.assertEqual(graph['comments.csv'], {'users.csv', 'review.csv'})
+        self.assertEqual(
+            graph['genre_title.csv'], {'titles.csv', 'genre.csv'})
+
+
+class SkippedRowsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Title.objects.create(name='Произведение', year=2000)
+        cls.user = User.objects.create(username='user', email='u@ya.ru')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'review.csv')
+        self.write_reviews(
+            'id,title_id,text,author,score,pub_date\n'
+            f'1,{self.title.pk},Текст,{self.user.pk},7,2019-09-24T21:08:21\n'
+            f'2,999,Текст,{self.user.pk},7,2019-09-24T21:08:21Z\n'
+        )
+        patcher = mock.patch.object(Command, 'data_path',
+                                    directory.name + '/')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_reviews(self, data: str) -> None:
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(data)
+
+    def test_skipped_rows_reported(self):
+        for copy in (False, True):
+            with self.subTest(copy=copy):
+                err = StringIO()
+                call_command('import_csv', copy=copy, stdout=StringIO(),
+                             stderr=err)
+                self.assertIn('пропущено 1 строк', err.getvalue())
+                # Дата без зоны читается в UTC в обоих режимах.
+                self.assertEqual(Review.objects.get().pub_date, dt.datetime(
+                    2019, 9, 24, 21, 8, 21, tzinfo=timezone.utc))
+                Review.objects.all().delete()
+
+    def test_date_fields_not_changed(self):
+        field = Review._meta.get_field('pub_date')
+        bulk_create = QuerySet.bulk_create
+        flags = []
+
+        def check_flags(queryset, *args, **kwargs):
+            flags.append(field.auto_now_add)
+            return bulk_create(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', check_flags):
+            call_command('import_csv', stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(flags)
+        self.assertTrue(all(flags))
+        self.assertEqual(Review.objects.get().pub_date.year, 2019)
+
+    def test_existing_row_keeps_date(self):
+        review = Review.objects.create(
+            id=1, title=self.title, author=self.user, text='Текст', score=7)
+        call_command('import_csv', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(
+            Review.objects.get().pub_date, review.pub_date)
+
+    def test_missing_column_gets_default(self):
+        self.write_reviews(
+            'id,title_id,author,score,pub_date\n'
+            f'1,{self.title.pk},{self.user.pk},7,2019-09-24T21:08:21Z\n'
+            f'2,999,{self.user.pk},7,2019-09-24T21:08:21Z\n'
+        )
+        for copy in (False, True):
+            with self.subTest(copy=copy):
+                err = StringIO()
+                call_command('import_csv', copy=copy, stdout=StringIO(),
+                             stderr=err)
+                self.assertIn('пропущено 1 строк', err.getvalue())
+                self.assertEqual(Review.objects.get().text, '')
+                Review.objects.all().delete()
+
+    def test_strict_rejects_file(self):
+        for copy in (False, True):
+            with self.subTest(copy=copy):
+                with self.assertRaises(SystemExit):
+                    call_command('import_csv', copy=copy, strict=True,
+                                 stdout=StringIO(), stderr=StringIO())
+                self.assertFalse(Review.objects.exists())
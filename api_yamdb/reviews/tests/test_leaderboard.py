@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from reviews.leaderboard import (WEIGHTING_BAYESIAN, WEIGHTING_MINIMUM,
+                                 WEIGHTING_NONE, refresh_leaderboard)
+from reviews.models import (LEADERBOARD_ALL, LEADERBOARD_CATEGORY,
+                            LEADERBOARD_GENRE, Category, Genre,
+                            LeaderboardEntry, Review, Title, User)
+
+
+class LeaderboardTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movie = Category.objects.create(name='Фильм', slug='movie')
+        cls.book = Category.objects.create(name='Книга', slug='book')
+        cls.drama = Genre.objects.create(name='Драма', slug='drama')
+        users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(5)
+        ]
+        cls.single, cls.popular, cls.average, cls.unrated = (
+            Title.objects.create(name=name, year=2000, category=category)
+            for name, category in (('Одна оценка', cls.movie),
+                                   ('Много оценок', cls.movie),
+                                   ('Средний', cls.book),
+                                   ('Без оценок', cls.book))
+        )
+        cls.single.genre.set([cls.drama])
+        cls.average.genre.set([cls.drama])
+        for title, scores in ((cls.single, (10,)),
+                              (cls.popular, (9,) * 5),
+                              (cls.average, (6, 6))):
+            for user, score in zip(users, scores):
+                Review.objects.create(title=title, author=user,
+                                      text='Текст', score=score)
+
+    def get_board(self, scope=LEADERBOARD_ALL, group_id=0):
+        return list(LeaderboardEntry.objects.filter(
+            scope=scope, group_id=group_id
+        ).order_by('position').values_list('position', 'title', 'score'))
+
+    def get_titles(self, scope=LEADERBOARD_ALL, group_id=0):
+        return [title for _, title, _ in self.get_board(scope, group_id)]
+
+    def test_plain_rating(self):
+        counts = refresh_leaderboard(WEIGHTING_NONE)
+        self.assertEqual(self.get_board(), [
+            (1, self.single.pk, 10), (2, self.popular.pk, 9),
+            (3, self.average.pk, 6)])
+        self.assertEqual(counts, {LEADERBOARD_ALL: 3,
+                                  LEADERBOARD_CATEGORY: 3,
+                                  LEADERBOARD_GENRE: 2})
+
+    def test_bayesian(self):
+        refresh_leaderboard(WEIGHTING_BAYESIAN, min_reviews=10)
+        self.assertEqual(self.get_titles(), [
+            self.popular.pk, self.single.pk, self.average.pk])
+        mean = (10 + 9 * 5 + 6 * 2) / 8
+        self.assertAlmostEqual(self.get_board()[1][2],
+                               (10 + 10 * mean) / 11)
+
+    def test_minimum_reviews(self):
+        refresh_leaderboard(WEIGHTING_MINIMUM, min_reviews=2)
+        self.assertEqual(self.get_titles(), [
+            self.popular.pk, self.average.pk])
+
+    def test_groups(self):
+        refresh_leaderboard(WEIGHTING_NONE)
+        self.assertEqual(
+            self.get_titles(LEADERBOARD_CATEGORY, self.movie.pk),
+            [self.single.pk, self.popular.pk])
+        self.assertEqual(
+            self.get_titles(LEADERBOARD_CATEGORY, self.book.pk),
+            [self.average.pk])
+        self.assertEqual(
+            self.get_titles(LEADERBOARD_GENRE, self.drama.pk),
+            [self.single.pk, self.average.pk])
+
+    def test_refresh_replaces_board(self):
+        refresh_leaderboard(WEIGHTING_NONE)
+        Review.objects.filter(title=self.single).delete()
+        call_command('refresh_leaderboard', once=True, size=1,
+                     weighting=WEIGHTING_NONE, stdout=StringIO())
+        self.assertEqual(self.get_titles(), [self.popular.pk])
+        self.assertEqual(LeaderboardEntry.objects.count(), 4)
@@ -0,0 +1,83 @@
+import smtplib
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from reviews.models import (OUTBOX_FAILED, OUTBOX_PENDING, OUTBOX_SENT,
+                            OutgoingEmail)
+from reviews.outbox import enqueue_mail
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class SendOutboxTest(TestCase):
+
+    def send(self, **options):
+        call_command('send_outbox', once=True, stdout=StringIO(), **options)
+
+    def test_signup_enqueues_code(self):
+        response = self.client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@ya.ru'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, 'newbie@ya.ru')
+        self.send()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['newbie@ya.ru'])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OUTBOX_SENT)
+
+    def test_retry_with_backoff(self):
+        email = enqueue_mail('Тема', 'Текст', 'from@ya.ru', ['a@ya.ru'])
+        with mock.patch(
+                'django.core.mail.backends.locmem.EmailBackend.send_messages',
+                side_effect=smtplib.SMTPServerDisconnected('down')):
+            self.send(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OUTBOX_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('down', email.last_error)
+        self.assertGreater(email.send_after, timezone.now())
+        # Время повтора не наступило.
+        self.send()
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        with mock.patch(
+                'django.core.mail.backends.locmem.EmailBackend.send_messages',
+                side_effect=smtplib.SMTPServerDisconnected('down')):
+            self.send(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OUTBOX_FAILED)
+
+    def test_sent_outside_transaction(self):
+        enqueue_mail('Тема', 'Текст', 'from@ya.ru', ['a@ya.ru'])
+        # Транзакции самого теста.
+        depth = len(connection.savepoint_ids)
+
+        def send_messages(backend, messages):
+            self.assertEqual(len(connection.savepoint_ids), depth)
+            email = OutgoingEmail.objects.get()
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.send_after, timezone.now())
+            return len(messages)
+
+        with mock.patch(
+                'django.core.mail.backends.locmem.EmailBackend.send_messages',
+                send_messages):
+            self.send()
+        self.assertEqual(OutgoingEmail.objects.get().status, OUTBOX_SENT)
+
+    def test_interrupted_claims_fail_after_max_attempts(self):
+        email = enqueue_mail('Тема', 'Текст', 'from@ya.ru', ['a@ya.ru'])
+        # Воркер забрал письмо и остановился, не записав результат.
+        OutgoingEmail.objects.update(attempts=2, send_after=timezone.now())
+        self.send(max_attempts=2)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OUTBOX_FAILED)
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,42 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, Sum
+from django.test import TestCase
+from reviews.models import Review, Title
+from reviews.seed import seed_dataset
+
+
+class SeedDatasetTest(TestCase):
+
+    def test_counts_and_rating(self):
+        counts = seed_dataset(users=5, titles=4, reviews_per_title=3,
+                              comments_per_review=2)
+        self.assertEqual(counts['reviews'], 12)
+        self.assertEqual(counts['comments'], 24)
+        for title in Title.objects.annotate(
+                actual_sum=Sum('reviews__score'),
+                actual_count=Count('reviews')):
+            self.assertEqual(
+                (title.rating_sum, title.rating_count),
+                (title.actual_sum, title.actual_count)
+            )
+        # Счётчики pk сдвинуты за вставленные записи.
+        self.assertEqual(seed_dataset(titles=1)['titles'], 1)
+
+    def test_reviews_newest_first(self):
+        seed_dataset(users=5, titles=1, reviews_per_title=5)
+        pks = list(Review.objects.values_list('pk', flat=True))
+        self.assertEqual(pks, sorted(pks, reverse=True))
+
+
+class QueryPlansCommandTest(TestCase):
+
+    def test_reports_and_rolls_back(self):
+        out = StringIO()
+        call_command('query_plans', titles=3, reviews_per_title=2,
+                     comments_per_review=1, repeat=1, stdout=out)
+        output = out.getvalue()
+        self.assertIn('review_title_pub_date_idx', output)
+        self.assertIn('reviews: ', output)
+        self.assertFalse(Title.objects.exists())
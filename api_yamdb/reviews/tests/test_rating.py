@@ -0,0 +1,55 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from reviews.models import Category, Review, Title, User
+
+
+class TitleRatingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Фильм', slug='movie')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=cls.category)
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(3)
+        ]
+
+    def add_review(self, user, score):
+        return Review.objects.create(
+            title=self.title, author=user, text='Текст', score=score)
+
+    def test_rating_follows_review_writes(self):
+        self.assertIsNone(self.title.rating)
+        first = self.add_review(self.users[0], 10)
+        self.add_review(self.users[1], 5)
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.rating_sum, self.title.rating_count), (15, 2))
+        self.assertEqual(self.title.rating, 7.5)
+
+        first = Review.objects.get(pk=first.pk)
+        first.score = 1
+        first.save()
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating, 3)
+
+        first.delete()
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.rating_sum, self.title.rating_count), (5, 1))
+
+    def test_rebuild_after_bulk_create(self):
+        Review.objects.bulk_create([
+            Review(title=self.title, author=user, text='Текст', score=4)
+            for user in self.users
+        ])
+        self.title.refresh_from_db()
+        self.assertIsNone(self.title.rating)
+        call_command('rebuild_rating', stdout=StringIO())
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.rating_sum, self.title.rating_count), (12, 3))
+        self.assertEqual(self.title.rating, 4)
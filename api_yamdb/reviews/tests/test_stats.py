@@ -0,0 +1,130 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from reviews.models import (Category, CategoryStats, Genre, GenreStats, Review,
+                            Title, TitleScore, User)
+
+
+class IncrementalStatsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movie = Category.objects.create(name='Фильм', slug='movie')
+        cls.book = Category.objects.create(name='Книга', slug='book')
+        cls.drama = Genre.objects.create(name='Драма', slug='drama')
+        cls.comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        cls.title = Title.objects.create(
+            name='Произведение', year=2000, category=cls.movie)
+        cls.title.genre.set([cls.drama])
+        cls.users = [
+            User.objects.create(username=f'user{i}', email=f'u{i}@ya.ru')
+            for i in range(3)
+        ]
+
+    def add_review(self, user, score, title=None):
+        return Review.objects.create(title=title or self.title, author=user,
+                                     text='Текст', score=score)
+
+    def assert_consistent(self):
+        out = StringIO()
+        call_command('rebuild_stats', check=True, stdout=out)
+        self.assertIn('Расхождений: 0', out.getvalue())
+
+    def get_scores(self, title=None):
+        return dict(TitleScore.objects.filter(
+            title=title or self.title, count__gt=0
+        ).values_list('score', 'count'))
+
+    def get_group(self, model, group):
+        row = model.objects.get(pk=group.pk)
+        return row.reviews_count, row.score_sum
+
+    def test_review_writes(self):
+        first = self.add_review(self.users[0], 10)
+        self.add_review(self.users[1], 4)
+        self.assertEqual(self.get_scores(), {10: 1, 4: 1})
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (2, 14))
+        self.assertEqual(self.get_group(GenreStats, self.drama), (2, 14))
+
+        first = Review.objects.get(pk=first.pk)
+        first.score = 4
+        first.save()
+        self.assertEqual(self.get_scores(), {4: 2})
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (2, 8))
+
+        first.delete()
+        self.assertEqual(self.get_scores(), {4: 1})
+        self.assertEqual(self.get_group(GenreStats, self.drama), (1, 4))
+        self.assert_consistent()
+
+    def test_deferred_score_saved(self):
+        review = self.add_review(self.users[0], 7)
+        review = Review.objects.only('text').get(pk=review.pk)
+        review.score = 2
+        review.save()
+        self.assertEqual(self.get_scores(), {2: 1})
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (1, 2))
+        review.text = 'Новый текст'
+        with self.assertNumQueries(1):
+            review.save(update_fields=['text'])
+        self.assert_consistent()
+
+    def test_title_moves_between_groups(self):
+        self.add_review(self.users[0], 6)
+        self.add_review(self.users[1], 8)
+        title = Title.objects.get(pk=self.title.pk)
+        title.category = self.book
+        title.save()
+        title.genre.set([self.comedy])
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (0, 0))
+        self.assertEqual(self.get_group(CategoryStats, self.book), (2, 14))
+        self.assertEqual(self.get_group(GenreStats, self.drama), (0, 0))
+        self.assertEqual(self.get_group(GenreStats, self.comedy), (2, 14))
+        self.title.genre.clear()
+        self.assertEqual(self.get_group(GenreStats, self.comedy), (0, 0))
+        self.assert_consistent()
+
+    def test_title_delete(self):
+        other = Title.objects.create(
+            name='Другое', year=2000, category=self.movie)
+        other.genre.set([self.drama])
+        self.add_review(self.users[0], 9)
+        self.add_review(self.users[1], 3, title=other)
+        Title.objects.filter(pk=self.title.pk).delete()
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (1, 3))
+        self.assertEqual(self.get_group(GenreStats, self.drama), (1, 3))
+        other.delete()
+        self.assertEqual(self.get_group(CategoryStats, self.movie), (0, 0))
+        self.assertEqual(self.get_group(GenreStats, self.drama), (0, 0))
+        self.assert_consistent()
+
+    def test_title_delete_queries_do_not_grow_with_reviews(self):
+        def count_queries(reviews):
+            title = Title.objects.create(
+                name='Другое', year=2000, category=self.movie)
+            title.genre.set([self.drama])
+            for user in self.users[:reviews]:
+                self.add_review(user, 5, title=title)
+            with CaptureQueriesContext(connection) as queries:
+                title.delete()
+            return len(queries)
+
+        self.assertEqual(count_queries(3), count_queries(1))
+        self.assert_consistent()
+
+    def test_rebuild_after_bulk_create(self):
+        Review.objects.bulk_create([
+            Review(title=self.title, author=user, text='Текст', score=7)
+            for user in self.users
+        ])
+        out = StringIO()
+        call_command('rebuild_stats', check=True, stdout=out)
+        self.assertIn(f'title_id={self.title.pk}', out.getvalue())
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(self.get_scores(), {7: 3})
+        self.assertEqual(self.get_group(GenreStats, self.drama), (3, 21))
+        self.assertEqual(self.get_group(CategoryStats, self.book), (0, 0))
+        self.assert_consistent()